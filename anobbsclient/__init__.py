@@ -1,5 +1,18 @@
-from .client import Client, BandwidthUsage
+from .client import Client, BandwidthUsage, ThreadSyncResult, PostLocation, ThreadBatch, ThreadFetchResult, ThreadBatchStats
+try:
+    from .asyncclient import AsyncClient
+except ImportError:  # 未安装 aiohttp
+    pass
 from .usercookie import UserCookie
+from .cookiepool import UserCookiePool, UserCookieStats
 from .options import RequestOptions
+from .sessionpool import SessionPool, SessionPoolStats
+from .cache import ResponseCache, ResponseCacheStats
+from .retry import RetryPolicy, RetryBudget, RetryStats
+from .ratelimit import RateLimiter, RateLimitStats
+from .concurrency import AdaptiveConcurrencyLimiter, LimitChange
+from .instrumentation import ClientEvent, MetricsCollector
+from .transport import Transport, HTTPTransport, RecordingTransport, ReplayTransport, ResponseArchive, RecordedResponse
 from .objects import *
+from .postbatch import PostBatch
 from .exceptions import *
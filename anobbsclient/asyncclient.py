@@ -0,0 +1,307 @@
+from typing import Optional, Dict, OrderedDict, Tuple, Hashable
+from dataclasses import dataclass, field
+
+import asyncio
+import logging
+import contextlib
+
+import aiohttp
+from yarl import URL
+
+from .baseclient import BaseClient
+from .requestutils import BandwidthUsage, FetchedContent, calculate_bandwidth_usage, ContentDecoder, STREAM_CHUNK_SIZE, ACCEPT_ENCODING, remaining_time, try_request_async
+from .instrumentation import endpoint_of
+from .transport import HTTPTransport
+from .options import RequestOptions
+from .objects import Board, Timeline, ThreadPage
+from .exceptions import RequiresLoginException
+
+
+@dataclass
+class AsyncClient(BaseClient):
+    """
+    基于 asyncio 的客户端类，提供与 :class:`Client` 相同的基础操作。
+
+    需要安装 ``aiohttp``。
+    同一客户端的所有请求共用一个连接池，可以在同一个事件循环中同时进行大量请求。
+    客户端只能在同一个事件循环中使用，用完后应调用 :meth:`aclose`。
+
+    :attr:`transport` 为默认的 :class:`HTTPTransport` 时通过 aiohttp 发出请求，
+    否则会在事件循环默认的线程池中调用所设置的传输层，不会阻塞事件循环。
+    """
+
+    max_connections: int = 100
+    """同时保持的最大连接数。"""
+
+    _aiohttp_sessions: Dict[Hashable, aiohttp.ClientSession] = field(
+        default_factory=dict, init=False, repr=False)
+    _connector: Optional[aiohttp.TCPConnector] = field(
+        default=None, init=False, repr=False)
+
+    async def __aenter__(self) -> 'AsyncClient':
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
+
+    async def aclose(self):
+        """关闭客户端持有的所有会话及连接。"""
+        for session in self._aiohttp_sessions.values():
+            await session.close()
+        self._aiohttp_sessions.clear()
+        if self._connector is not None:
+            await self._connector.close()
+            self._connector = None
+        self.close()
+
+    async def get_board_page(self, board_id: int, page: int, options: RequestOptions = {}) -> Tuple[Board, BandwidthUsage]:
+        """
+        获取指定板块的指定页。
+
+        见 :meth:`Client.get_board_page`。
+        """
+
+        needs_login = self.board_page_requires_login(
+            page=page, options=options)
+        if needs_login and not self.has_cookie(options):
+            raise RequiresLoginException()
+
+        logging.debug(f"将获取版块：{board_id} 第 {page} 页，将会登录：{needs_login}")
+
+        cache_key = self._response_cache_key(
+            '/Api/showf', board_id, page, options=options, needs_login=needs_login)
+        threads = self._load_cached_json(cache_key, options)
+        if threads is not None:
+            return self._parse_board_page(threads), BandwidthUsage(0, 0)
+
+        async def request_fn():
+            content, bandwidth_usage = await self._get_content_async(
+                path=f'/Api/showf', options=options, needs_login=needs_login,
+                id=board_id,
+                page=page,
+            )
+            board_page = self._build_board_page(
+                content, options, cache_key, bandwidth_usage)
+            return board_page, bandwidth_usage
+
+        return await try_request_async(
+            request_fn, f"获取版块 {board_id} 第 {page} 页",
+            self.get_retry_policy(options), budget=self.retry_budget,
+            deadline=self.get_deadline(options),
+            on_retry=self._retry_hook('/Api/showf'))
+
+    async def get_timeline_page(self, page: int, options: RequestOptions = {}) -> Tuple[Timeline, BandwidthUsage]:
+        """
+        获取时间线的指定页。
+
+        见 :meth:`Client.get_timeline_page`。
+        """
+
+        needs_login = self.timeline_page_requires_login(
+            page=page, options=options)
+        if needs_login and not self.has_cookie(options):
+            raise RequiresLoginException()
+
+        logging.debug(f"将获取时间线：第 {page} 页，将会登录：{needs_login}")
+
+        cache_key = self._response_cache_key(
+            '/Api/timeline', None, page, options=options, needs_login=needs_login)
+        threads = self._load_cached_json(cache_key, options)
+        if threads is not None:
+            return self._parse_timeline_page(threads), BandwidthUsage(0, 0)
+
+        async def request_fn():
+            content, bandwidth_usage = await self._get_content_async(
+                path=f'/Api/timeline', options=options, needs_login=needs_login,
+                page=page,
+            )
+            timeline_page = self._build_board_page(
+                content, options, cache_key, bandwidth_usage, endpoint='/Api/timeline')
+            return timeline_page, bandwidth_usage
+
+        return await try_request_async(
+            request_fn, f"获取时间线第 {page} 页",
+            self.get_retry_policy(options), budget=self.retry_budget,
+            deadline=self.get_deadline(options),
+            on_retry=self._retry_hook('/Api/timeline'))
+
+    async def get_thread_page(self, id: int, page: int, options: RequestOptions = {}, for_analysis: bool = False) -> Tuple[ThreadPage, BandwidthUsage]:
+        """
+        获取指定串的指定页。
+
+        见 :meth:`Client.get_thread_page`。
+        """
+
+        needs_login = self.thread_page_requires_login(
+            page=page, options=options)
+        if needs_login and not self.has_cookie(options):
+            raise RequiresLoginException()
+
+        logging.debug(f"将获取串：{id} 第 {page} 页，将会登录：{needs_login}")
+
+        cache_key = self._response_cache_key(
+            '/Api/thread', id, page, options=options, needs_login=needs_login)
+        thread_page_json = self._load_cached_json(cache_key, options)
+        if thread_page_json is not None:
+            return self._parse_thread_page(thread_page_json, for_analysis=for_analysis), BandwidthUsage(0, 0)
+
+        async def request_fn():
+            content, bandwidth_usage = await self._get_content_async(
+                path=f'/Api/thread/id/{id}', options=options, needs_login=needs_login,
+                page=page,
+            )
+            thread_page = self._build_thread_page(
+                content, page, options, for_analysis, cache_key, bandwidth_usage)
+            return thread_page, bandwidth_usage
+
+        return await try_request_async(
+            request_fn, f"获取串 {id} 第 {page} 页",
+            self.get_retry_policy(options), budget=self.retry_budget,
+            deadline=self.get_deadline(options),
+            on_retry=self._retry_hook('/Api/thread'))
+
+    async def reply_thread(self, content: str, to_thread_id: int,
+                           name: Optional[str] = None, email: Optional[str] = None, title: Optional[str] = None,
+                           options: RequestOptions = {}):
+        """
+        回应指定串。
+
+        见 :meth:`Client.reply_thread`。
+        """
+
+        fields = self._make_reply_fields(
+            content=content, to_thread_id=to_thread_id,
+            name=name, email=email, title=title,
+        )
+        with aiohttp.MultipartWriter("form-data") as data:
+            for (k, v) in fields.items():
+                part = data.append(v)
+                part.set_content_disposition("form-data", name=k)
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(
+                "posting", deadline=self.get_deadline(options))
+        session = self._aiohttp_session(options, needs_login=True)
+        with self._instrument_request('doReplyThread'):
+            async with session.post(self._make_url('/Home/Forum/doReplyThread.html'), data=data) as resp:
+                resp.raise_for_status()
+                resp_body = await resp.text()
+
+        self._parse_reply_response(resp_body)
+
+    async def _get_json_async(self, path: str, options: RequestOptions, needs_login: bool = False, **queries) -> Tuple[OrderedDict, BandwidthUsage]:
+        content, bandwidth_usage = await self._get_content_async(
+            path=path, options=options, needs_login=needs_login, **queries)
+        return self.get_json_loads(options)(content), bandwidth_usage
+
+    async def _get_content_async(self, path: str, options: RequestOptions, needs_login: bool = False, **queries) -> Tuple[bytes, BandwidthUsage]:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async("logged_in" if needs_login else "anonymous",
+                                                  deadline=self.get_deadline(options))
+        url = self._make_request_url(path=path, **queries)
+
+        deadline = self.get_deadline(options)
+        async with contextlib.AsyncExitStack() as stack:
+            user_cookie_pool = self._user_cookie_pool_to_draw(
+                options, needs_login=needs_login)
+            if user_cookie_pool is not None:
+                user_cookie = await stack.enter_async_context(
+                    user_cookie_pool.use_async(deadline=deadline))
+                options = {**options, "user_cookie": user_cookie}
+            if self.concurrency_limiter is not None:
+                await stack.enter_async_context(
+                    self.concurrency_limiter.async_slot(deadline=deadline))
+
+            if not isinstance(self.transport, HTTPTransport):
+                # 自定义的传输层（如回放、录制）是同步的，放到线程池中调用以免阻塞事件循环
+                request = self._transport_request(url, options, needs_login)
+                with self._instrument_request(endpoint_of(path)) as on_fetched:
+                    fetched = await asyncio.get_running_loop().run_in_executor(
+                        None, self.transport.get_content, request)
+                    on_fetched(fetched)
+                return fetched.content, fetched.bandwidth_usage
+
+            session = self._aiohttp_session(options, needs_login=needs_login)
+
+            (connect_timeout, read_timeout) = self.get_timeout(options)
+            timeout = aiohttp.ClientTimeout(
+                total=remaining_time(deadline),
+                sock_connect=connect_timeout, sock_read=read_timeout,
+            )
+
+            with self._instrument_request(endpoint_of(path)) as on_fetched:
+                async with session.get(URL(url, encoded=True), timeout=timeout) as resp:
+                    resp.raise_for_status()
+                    decoder = ContentDecoder(
+                        resp.headers.get('Content-Encoding', ''))
+                    async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        decoder.feed(chunk)
+                    content = decoder.finish()
+
+                bandwidth_usage = calculate_bandwidth_usage(
+                    method=resp.request_info.method, path_url=resp.request_info.url.raw_path_qs,
+                    request_headers=resp.request_info.headers,
+                    reason=resp.reason, response_headers=resp.headers,
+                    raw_content_length=decoder.raw_length,
+                )
+                on_fetched(FetchedContent(
+                    content, bandwidth_usage, decoder.raw_length,
+                    decoder.decompress_seconds))
+
+        return content, bandwidth_usage
+
+    def _aiohttp_session(self, options: RequestOptions, needs_login: bool = False) -> aiohttp.ClientSession:
+        """
+        返回符合请求设置的会话。
+
+        与 :meth:`BaseClient._session` 一样，会话按照实际的登录状态及芦苇岛 cookies 格式分组，
+        同组的请求共用同一个会话，所有会话共用同一个连接池。
+        """
+
+        key = self._session_key(options, needs_login=needs_login)
+        session = self._aiohttp_sessions.get(key, None)
+        if session is not None:
+            return session
+
+        if self._connector is None:
+            self._connector = aiohttp.TCPConnector(limit=self.max_connections)
+
+        cookies: Dict[str, str] = {}
+        if needs_login:
+            cookies["userhash"] = self.get_user_cookie(options).userhash
+        luwei_cookie_format = self.get_uses_luwei_cookie_format(options)
+        if isinstance(luwei_cookie_format, dict):
+            # 见 :meth:`BaseClient.__setup_headers`
+            cookies.update({
+                "expires": luwei_cookie_format["expires"],
+                "domains": self.host,
+                "path": "/",
+            })
+
+        headers = {
+            "Accept": "application/json",
+            "User-Agent": self.user_agent,
+            "Accept-Language": "en-us",
+            "Accept-Encoding": ACCEPT_ENCODING,
+        }
+
+        if needs_login:
+            # 每个饼干的会话各自持有一个 CookieJar，理由同 :attr:`BaseClient.cookiejar_store`
+            cookie_jar = aiohttp.CookieJar(unsafe=True)
+            cookie_jar.update_cookies(
+                cookies, response_url=URL(self._make_url('/')))
+        else:
+            # 未登录时不接收服务器设置的 cookies
+            cookie_jar = aiohttp.DummyCookieJar()
+            if len(cookies) != 0:
+                headers["Cookie"] = "; ".join(
+                    f"{k}={v}" for (k, v) in cookies.items())
+
+        session = aiohttp.ClientSession(
+            connector=self._connector, connector_owner=False,
+            cookie_jar=cookie_jar, headers=headers,
+            auto_decompress=False,
+        )
+        self._aiohttp_sessions[key] = session
+        return session
+
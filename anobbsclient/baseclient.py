@@ -1,14 +1,29 @@
-from typing import Optional, Dict, OrderedDict, Any, Union, Literal, Tuple, NamedTuple
+from typing import Optional, Dict, OrderedDict, Any, Union, Literal, Tuple, NamedTuple, Hashable, Iterator, List, Callable
 from dataclasses import dataclass, field
 
+import time
+import threading
+import contextlib
+from contextlib import contextmanager
+
 import requests
 import urllib
-from http.cookiejar import CookieJar
+from bs4 import BeautifulSoup
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 
 from .options import RequestOptions, UserCookie, LoginPolicy, LuweiCookieFormat
-from .requestutils import BandwidthUsage, get_json
+from .cookiepool import UserCookiePool
+from .requestutils import BandwidthUsage, FetchedContent, make_json_loads, JSONLoads, ACCEPT_ENCODING
+from .sessionpool import SessionPool
+from .cache import ResponseCache, CacheKind
+from .retry import RetryPolicy, RetryBudget
+from .ratelimit import RateLimiter
+from .concurrency import AdaptiveConcurrencyLimiter
+from .instrumentation import ClientEvent, ClientHook, endpoint_of
+from .transport import Transport, TransportRequest, HTTPTransport
 from .utils import current_timestamp_ms_offset_to_utc8
-from .exceptions import RequiresLoginException
+from .objects import Board, Timeline, ThreadPage, BoardThread, TimelineThread, Post
+from .exceptions import ShouldNotReachException, RequiresLoginException, GatekeptException, ResourceNotExistsException, UnknownResponseException, ReplyException
 
 
 @dataclass
@@ -39,8 +54,133 @@ class BaseClient:
     这是因为服务器响应可能会根据饼干要求添加不同的新 cookies，
     这么做可以防止不同饼干间新 cookies 的混淆。
 
-    FIXME: 线程不安全。
+    同一饼干的各个会话共用同一个 :class:`CookieJar`。
+    新建 :class:`CookieJar` 时会加锁，保证每个饼干只有一个；
+    :class:`CookieJar` 本身的读写由其内部的锁保护。
+    """
+
+    session_pool: SessionPool = field(default_factory=SessionPool)
+    """
+    复用会话（及其底层连接）的会话池。
+
+    会话按照实际的登录状态（所用饼干的 ``userhash`` 或未登录）
+    及芦苇岛 cookies 格式分组复用。
+    """
+
+    scheme: str = "https"
+    """请求 API 服务器时使用的协议，一般只有在测试时才需要改为 ``"http"``。"""
+
+    response_cache: Optional[ResponseCache] = None
+    """
+    串页面及版块页面的响应缓存，为 ``None`` 时不缓存。
+
+    见 :attr:`RequestOptions.uses_response_cache`。
+    """
+
+    retry_budget: RetryBudget = field(default_factory=RetryBudget)
     """
+    客户端所有请求共用的重试预算，可以通过其 ``stats()`` 查看重试的统计信息。
+
+    见 :class:`RetryBudget`。
+    """
+
+    rate_limiter: Optional[RateLimiter] = None
+    """
+    客户端所有请求（包括重试）共用的限速器，为 ``None`` 时不限速。
+
+    见 :class:`RateLimiter`。
+    """
+
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+    """
+    根据延迟及错误调整客户端同时进行的请求数上限的限制器，为 ``None`` 时不限制。
+
+    见 :class:`AdaptiveConcurrencyLimiter`。
+    """
+
+    hooks: List[ClientHook] = field(default_factory=list)
+    """
+    接收客户端事件的各个钩子，见 :meth:`add_hook`。
+    """
+
+    transport: Transport = field(default_factory=HTTPTransport)
+    """
+    获取串页面及版块页面等 GET 请求所用的传输层。
+
+    默认实际发出请求，也可以换成 :class:`RecordingTransport` 录制响应，
+    或换成 :class:`ReplayTransport` 离线回放录制的响应。
+    """
+
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def close(self):
+        """关闭会话池中所有闲置的会话。"""
+        self.session_pool.clear()
+
+    def add_hook(self, hook: ClientHook):
+        """
+        添加接收客户端事件的钩子。
+
+        钩子会在发出请求的线程中被同步调用，因此应尽快返回。
+        内置的 :class:`MetricsCollector` 即是一种钩子。
+        """
+        # 复制后替换，正在其他线程中遍历的列表不受影响
+        with self._lock:
+            self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook: ClientHook):
+        """移除之前添加的钩子。"""
+        with self._lock:
+            hooks = list(self.hooks)
+            hooks.remove(hook)
+            self.hooks = hooks
+
+    def emit(self, event: ClientEvent):
+        """将事件传给各个钩子。"""
+        for hook in self.hooks:
+            hook(event)
+
+    @contextmanager
+    def _session(self, options: RequestOptions, needs_login: bool = False) -> Iterator[requests.Session]:
+        """
+        从会话池中取出一个符合请求设置的会话，用完后自动归还。
+
+        Parameters
+        ----------
+        options : RequestOptions
+            请求设置。
+        needs_login : bool
+            是否需要携带饼干。
+        """
+
+        key = self._session_key(options, needs_login=needs_login)
+        session = self.session_pool.acquire(
+            key, lambda: self._make_session(options, needs_login=needs_login))
+        try:
+            yield session
+        finally:
+            self.session_pool.release(key, session)
+
+    def _session_key(self, options: RequestOptions, needs_login: bool = False) -> Hashable:
+        """
+        返回会话在会话池中所属分组的键。
+        """
+
+        userhash = None
+        if needs_login:
+            user_cookie = self.get_user_cookie(options)
+            if user_cookie is None:
+                raise RequiresLoginException()
+            userhash = user_cookie.userhash
+
+        luwei_cookie_format = self.get_uses_luwei_cookie_format(options)
+        if isinstance(luwei_cookie_format, dict):
+            luwei_cookie_format = tuple(sorted(luwei_cookie_format.items()))
+        else:
+            luwei_cookie_format = None
+
+        return (userhash, luwei_cookie_format)
 
     def _make_session(self, options: RequestOptions, needs_login: bool = False) -> requests.Session:
         """
@@ -84,16 +224,11 @@ class BaseClient:
             if user_cookie is None:
                 raise RequiresLoginException()
 
-            if user_cookie.userhash in self.cookiejar_store:
-                cookiejar = self.cookiejar_store[user_cookie.userhash]
-            else:
-                cookiejar: CookieJar = requests.cookies.cookiejar_from_dict({})
-                cookie = requests.cookies.create_cookie(
-                    name="userhash", value=user_cookie.userhash, domain=self.host,
-                )
-                cookiejar.set_cookie(cookie)
-                self.cookiejar_store[user_cookie.userhash] = cookiejar
-            session.cookies = cookiejar
+            session.cookies = self._cookiejar(user_cookie.userhash)
+        else:
+            # 未登录的会话会被复用，
+            # 为了与每次请求都新建会话时的行为保持一致，不接收服务器设置的 cookies
+            session.cookies.set_policy(_RejectingCookiePolicy())
 
         luwei_cookie_format = self.get_uses_luwei_cookie_format(options)
         if isinstance(luwei_cookie_format, dict):
@@ -106,7 +241,7 @@ class BaseClient:
             }.items():
                 if k not in session.cookies.keys():
                     cookie = requests.cookies.create_cookie(
-                        name=k, value=v, domain=self.host,
+                        name=k, value=v, domain=self._cookie_domain,
                     )
                     session.cookies.set_cookie(cookie)
 
@@ -114,13 +249,216 @@ class BaseClient:
             "Accept": "application/json",
             "User-Agent": self.user_agent,
             "Accept-Language": "en-us",
-            "Accept-Encoding": "gzip, deflate, br",
+            "Accept-Encoding": ACCEPT_ENCODING,
         })
 
+    def _cookiejar(self, userhash: str) -> CookieJar:
+        """
+        取出饼干对应的 :class:`CookieJar`，没有则新建一个。
+
+        多个线程同时为同一饼干新建会话时，保证它们得到的是同一个 :class:`CookieJar`。
+        """
+
+        with self._lock:
+            cookiejar = self.cookiejar_store.get(userhash, None)
+            if cookiejar is None:
+                cookiejar = requests.cookies.cookiejar_from_dict({})
+                cookie = requests.cookies.create_cookie(
+                    name="userhash", value=userhash, domain=self._cookie_domain,
+                )
+                cookiejar.set_cookie(cookie)
+                self.cookiejar_store[userhash] = cookiejar
+            return cookiejar
+
     def _get_json(self, path: str, options: RequestOptions, needs_login: bool = False, **queries) -> Tuple[OrderedDict, BandwidthUsage]:
-        session = self._make_session(options=options, needs_login=needs_login)
+        content, bandwidth_usage = self._get_content(
+            path=path, options=options, needs_login=needs_login, **queries)
+        return self.get_json_loads(options)(content), bandwidth_usage
+
+    def _get_content(self, path: str, options: RequestOptions, needs_login: bool = False, **queries) -> Tuple[bytes, BandwidthUsage]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire("logged_in" if needs_login else "anonymous",
+                                      deadline=self.get_deadline(options))
         url = self._make_request_url(path=path, **queries)
-        return get_json(session, url)
+        deadline = self.get_deadline(options)
+        with contextlib.ExitStack() as stack:
+            user_cookie_pool = self._user_cookie_pool_to_draw(
+                options, needs_login=needs_login)
+            if user_cookie_pool is not None:
+                user_cookie = stack.enter_context(
+                    user_cookie_pool.use(deadline=deadline))
+                options = {**options, "user_cookie": user_cookie}
+            if self.concurrency_limiter is not None:
+                stack.enter_context(
+                    self.concurrency_limiter.slot(deadline=deadline))
+            with self._instrument_request(endpoint_of(path)) as on_fetched:
+                fetched = self.transport.get_content(
+                    self._transport_request(url, options, needs_login))
+                on_fetched(fetched)
+        return fetched.content, fetched.bandwidth_usage
+
+    def _user_cookie_pool_to_draw(self, options: RequestOptions, needs_login: bool) -> Optional[UserCookiePool]:
+        """
+        返回本次请求需要从中选取饼干的饼干池。
+
+        只有在需要登录且没有设置 ``user_cookie`` 时才会从饼干池中选取。
+        """
+
+        if not needs_login or self.get_user_cookie(options) is not None:
+            return None
+        return self.get_user_cookie_pool(options)
+
+    def _transport_request(self, url: str, options: RequestOptions, needs_login: bool) -> TransportRequest:
+        return TransportRequest(
+            url=url, logged_in=needs_login,
+            open_session=lambda: self._session(
+                options=options, needs_login=needs_login),
+            timeout=self.get_timeout(options),
+            deadline=self.get_deadline(options),
+        )
+
+    @contextmanager
+    def _instrument_request(self, endpoint: str) -> Iterator[Callable[[FetchedContent], None]]:
+        """
+        在请求前后发出 ``request_start`` 及 ``request_end`` 事件。
+
+        请求成功后应以请求的结果调用产出的函数。
+        """
+
+        if len(self.hooks) == 0:
+            yield lambda _: None
+            return
+
+        self.emit(ClientEvent("request_start", endpoint))
+        started_at = time.monotonic()
+        result: List[FetchedContent] = []
+        try:
+            yield result.append
+        except Exception as e:
+            self.emit(ClientEvent("request_end", endpoint,
+                                  duration=time.monotonic() - started_at, error=e))
+            raise
+        fetched = result[0] if len(result) != 0 else None
+        self.emit(ClientEvent(
+            "request_end", endpoint,
+            duration=time.monotonic() - started_at,
+            bandwidth_usage=fetched and fetched.bandwidth_usage,
+            raw_bytes=fetched and fetched.raw_length,
+            decoded_bytes=fetched and len(fetched.content),
+            decompress_seconds=fetched and fetched.decompress_seconds,
+        ))
+
+    def _retry_hook(self, endpoint: str) -> Optional[Callable[[int, Exception, float], None]]:
+        """返回传给 :func:`try_request` 的、发出 ``retry`` 事件的函数。"""
+        if len(self.hooks) == 0:
+            return None
+        return lambda attempt, e, delay: self.emit(ClientEvent(
+            "retry", endpoint, error=e, attempt=attempt, retry_delay=delay))
+
+    def _gatekept(self, e: GatekeptException, endpoint: str) -> GatekeptException:
+        """发出 ``gatekept`` 事件，并返回要抛出的异常。"""
+        if len(self.hooks) != 0:
+            self.emit(ClientEvent("gatekept", endpoint,
+                                  page_number=e.current_page_number))
+        return e
+
+    def _build_board_page(self, content: bytes, options: RequestOptions,
+                          cache_key: Optional[Hashable], bandwidth_usage: BandwidthUsage,
+                          endpoint: str = "/Api/showf") -> Board:
+        """
+        解析版块页面的响应内容并构建为 :class:`Board`，同时存入响应缓存。
+
+        ``endpoint`` 为 ``"/Api/timeline"`` 时构建为 :class:`Timeline`。
+        """
+        decoded_at = time.perf_counter()
+        threads = self.get_json_loads(options)(content)
+        built_at = time.perf_counter()
+        if endpoint == "/Api/timeline":
+            board_page = self._parse_timeline_page(threads)
+        else:
+            board_page = self._parse_board_page(threads)
+        if len(self.hooks) != 0:
+            self.emit(ClientEvent("response_decoded", endpoint,
+                                  decode_seconds=built_at - decoded_at,
+                                  build_seconds=time.perf_counter() - built_at))
+        self._store_cached_content(
+            cache_key, content, "board_page", bandwidth_usage)
+        return board_page
+
+    def _build_thread_page(self, content: bytes, page: int, options: RequestOptions, for_analysis: bool,
+                           cache_key: Optional[Hashable], bandwidth_usage: BandwidthUsage) -> ThreadPage:
+        """解析串页面的响应内容并构建为 :class:`ThreadPage`，同时存入响应缓存。"""
+        decoded_at = time.perf_counter()
+        thread_page_json = self.get_json_loads(options)(content)
+        built_at = time.perf_counter()
+        kind = self._thread_page_cache_kind(page, thread_page_json, options)
+        thread_page = self._parse_thread_page(
+            thread_page_json, for_analysis=for_analysis)
+        if len(self.hooks) != 0:
+            self.emit(ClientEvent("response_decoded", "/Api/thread",
+                                  decode_seconds=built_at - decoded_at,
+                                  build_seconds=time.perf_counter() - built_at))
+        self._store_cached_content(
+            cache_key, content, kind, bandwidth_usage)
+        return thread_page
+
+    def _response_cache_key(self, path: str, id: int, page: int, options: RequestOptions, needs_login: bool = False) -> Optional[Hashable]:
+        """
+        返回请求在响应缓存中的键。
+
+        不使用缓存时返回 ``None``。
+        未登录与以不同饼干登录时看到的内容可能不同（如卡页），因此分开缓存；
+        从饼干池中选取饼干时，以池中任一饼干登录看到的内容视为相同。
+        """
+
+        if self.response_cache is None or not self.get_uses_response_cache(options):
+            return None
+        userhash = None
+        if needs_login:
+            user_cookie = self.get_user_cookie(options)
+            if user_cookie is not None:
+                userhash = user_cookie.userhash
+            else:
+                userhash = self.get_user_cookie_pool(options).cache_identity
+        return (path, id, page, userhash)
+
+    def _load_cached_json(self, key: Optional[Hashable], options: RequestOptions) -> Optional[Any]:
+        """从响应缓存中取出并解析响应内容，没有缓存时返回 ``None``。"""
+        if key is None:
+            return None
+        content = self.response_cache.get(key)
+        if content is None:
+            return None
+        if len(self.hooks) != 0:
+            (path, _, page, _) = key
+            self.emit(ClientEvent("cache_hit", endpoint_of(path),
+                                  page_number=page))
+        return self.get_json_loads(options)(content)
+
+    def _store_cached_content(self, key: Optional[Hashable], content: bytes, kind: CacheKind, bandwidth_usage: BandwidthUsage):
+        """将响应内容存入响应缓存。"""
+        if key is None:
+            return
+        self.response_cache.put(
+            key, content, kind=kind, downloaded=bandwidth_usage.downloaded)
+
+    def _thread_page_cache_kind(self, page: int, thread_page_json: Any, options: RequestOptions) -> Optional[CacheKind]:
+        """
+        判断串页面的响应内容属于哪种缓存。
+
+        已满的非最后一页的内容基本不会再变化，可以长期缓存。
+        超过守门页的页面可能是卡页后的重复内容，不作长期缓存。
+        串不存在时返回 ``None``，即不缓存。
+        """
+
+        if not isinstance(thread_page_json, dict):
+            return None
+        page_size = self.get_thread_page_size(options)
+        last_page = max(1, (int(thread_page_json["replyCount"]) + page_size - 1) // page_size)
+        if page < last_page and len(thread_page_json["replys"] or []) >= page_size \
+                and page <= self.get_thread_gatekeeper_page_number(options):
+            return "thread_full_page"
+        return "thread_last_page"
 
     def _make_request_url(self, path: str, **queries) -> str:
         queries = OrderedDict(queries)
@@ -130,9 +468,17 @@ class BaseClient:
             queries["appid"] = self.appid
         queries["__t"] = current_timestamp_ms_offset_to_utc8()
 
-        base_url = f'https://{self.host}{path}'
+        base_url = self._make_url(path)
         return base_url + '?' + urllib.parse.urlencode(queries)
 
+    def _make_url(self, path: str) -> str:
+        return f'{self.scheme}://{self.host}{path}'
+
+    @property
+    def _cookie_domain(self) -> str:
+        """设置 cookies 时使用的域名，即去掉端口号的 :attr:`host`。"""
+        return urllib.parse.urlsplit(f'//{self.host}').hostname
+
     def _get_option_value(self, external_options: RequestOptions, key: str, default: Any = None) -> Any:
         """
         获取请求设置中指定键的值。
@@ -141,6 +487,9 @@ class BaseClient:
         其次可能的话返回内部默认请求设置中的值；
         否则返回指定的默认值。
 
+        只有缺少的键及值为 ``None`` 的键视为没有值，
+        ``False``、``0`` 及空字符串、空容器等其他假值都会覆盖之后的来源。
+
         Parameters
         ----------
         external_options : RequestOptions
@@ -154,10 +503,11 @@ class BaseClient:
         -------
         要获取的值。
         """
-        return (
-            external_options.get(key, None)
-            or self.default_request_options.get(key, default)
-        )
+        for options in (external_options, self.default_request_options):
+            value = options.get(key, None)
+            if value is not None:
+                return value
+        return default
 
     def get_user_cookie(self, options: RequestOptions = {}) -> UserCookie:
         """获取用户饼干。"""
@@ -165,9 +515,16 @@ class BaseClient:
             return None
         return self._get_option_value(options, "user_cookie")
 
+    def get_user_cookie_pool(self, options: RequestOptions = {}) -> Optional[UserCookiePool]:
+        """获取饼干池，见 :attr:`RequestOptions.user_cookie_pool`。"""
+        if self.get_login_policy(options) == "always_no":
+            return None
+        return self._get_option_value(options, "user_cookie_pool")
+
     def has_cookie(self, options: RequestOptions = {}) -> bool:
-        """返回是否设置了用户饼干。"""
-        return self.get_user_cookie(options) != None
+        """返回是否设置了用户饼干或饼干池。"""
+        return self.get_user_cookie(options) != None \
+            or self.get_user_cookie_pool(options) != None
 
     def get_login_policy(self, options: RequestOptions = {}) -> LoginPolicy:
         """获取登录策略，见 :class:`LoginPolicy`。"""
@@ -184,3 +541,228 @@ class BaseClient:
         默认为5。
         """
         return self._get_option_value(options, "max_attempts", 5)
+
+    def get_timeout(self, options: RequestOptions = {}) -> Tuple[float, float]:
+        """获取建立连接及等待数据的超时秒数，默认均为20。"""
+        return (
+            self._get_option_value(options, "connect_timeout", 20),
+            self._get_option_value(options, "read_timeout", 20),
+        )
+
+    def get_deadline(self, options: RequestOptions = {}) -> Optional[float]:
+        """获取以 :func:`time.monotonic` 表示的截止时刻，见 :attr:`RequestOptions.deadline`。"""
+        return self._get_option_value(options, "deadline", None)
+
+    def options_with_timeout(self, options: RequestOptions, timeout: Optional[float]) -> RequestOptions:
+        """
+        返回设置了从现在起 ``timeout`` 秒后截止的请求设置。
+
+        原有的截止时刻更早时保留原有的截止时刻；``timeout`` 为 ``None`` 时原样返回。
+        """
+
+        if timeout is None:
+            return options
+        deadline = time.monotonic() + timeout
+        existing_deadline = self.get_deadline(options)
+        if existing_deadline is not None:
+            deadline = min(deadline, existing_deadline)
+        return {**options, "deadline": deadline}
+
+    def get_retry_policy(self, options: RequestOptions = {}) -> RetryPolicy:
+        """
+        获取重试策略。
+
+        未设置时采用默认的重试策略，最多尝试次数见 :meth:`get_max_attempts`。
+        """
+        policy = self._get_option_value(options, "retry_policy", None)
+        if policy is None:
+            policy = RetryPolicy(max_attempts=self.get_max_attempts(options))
+        return policy
+
+    def get_json_loads(self, options: RequestOptions = {}) -> JSONLoads:
+        """
+        获取解析响应的 JSON 时使用的函数。
+
+        见 :attr:`RequestOptions.json_backend` 及 :attr:`RequestOptions.uses_plain_dict`。
+        """
+        return make_json_loads(
+            backend=self._get_option_value(options, "json_backend", None),
+            uses_plain_dict=self._get_option_value(
+                options, "uses_plain_dict", False),
+        )
+
+    def get_thread_page_size(self, options: RequestOptions = {}) -> int:
+        """获取串每页最多的回应数，默认为19。"""
+        return self._get_option_value(options, "thread_page_size", 19)
+
+    def get_uses_response_cache(self, options: RequestOptions = {}) -> bool:
+        """获取是否使用响应缓存。"""
+        return self._get_option_value(options, "uses_response_cache", True)
+
+    def page_requires_login(self, page: int, gate_keeper: int, options: RequestOptions = {}) -> bool:
+        """
+        判断页面是否需要登录才能正常阅读。
+
+        Parameters
+        ----------
+        page : int
+            要请求的页面页数。
+        gate_keeper : int
+            从下页起会出现「卡页」现象的页数，
+            即如果不登录，访问往后的页面都会响应该页的内容。
+
+            2021-03-07: 目前无论是串还是板块，都是从第101页起重复第100页的内容。
+        options : RequestOptions
+            请求设置。
+
+        Returns
+        -------
+        是否需要登录。
+        """
+
+        login_policy = self.get_login_policy(options)
+        has_cookie = self.has_cookie(options)
+
+        if login_policy == "enforce":
+            return True
+
+        if login_policy == "when_has_cookie":
+            return has_cookie or page > gate_keeper
+        elif login_policy in ("always_no", "when_required"):
+            return page > gate_keeper
+
+        raise ShouldNotReachException()
+
+    def thread_page_requires_login(self, page: int, options: RequestOptions = {}) -> bool:
+        return self.page_requires_login(
+            page=page,
+            gate_keeper=self.get_thread_gatekeeper_page_number(options),
+            options=options,
+        )
+
+    def board_page_requires_login(self, page: int, options: RequestOptions = {}) -> bool:
+        return self.__list_page_requires_login(page, options, kind="board", endpoint="/Api/showf")
+
+    def timeline_page_requires_login(self, page: int, options: RequestOptions = {}) -> bool:
+        """时间线与版块一样，使用 :attr:`RequestOptions.board_gatekeeper_page_number`。"""
+        return self.__list_page_requires_login(page, options, kind="timeline", endpoint="/Api/timeline")
+
+    def __list_page_requires_login(self, page: int, options: RequestOptions, kind: str, endpoint: str) -> bool:
+        gk_pn = self.get_board_gatekeeper_page_number(options)
+        if page > gk_pn:  # TODO: 放在这里是不是不太合适？
+            raise self._gatekept(GatekeptException(
+                context=f'check_if_{kind}_page_requires_login',
+                current_page_number=None,
+                gatekeeper_post_id=None,
+            ), endpoint)
+        return self.page_requires_login(
+            page=page,
+            gate_keeper=gk_pn,
+            options=options,
+        )
+
+    def get_thread_gatekeeper_page_number(self, options: RequestOptions = {}) -> int:
+        return self._get_option_value(options, "thread_gatekeeper_page_number", 100)
+
+    def get_board_gatekeeper_page_number(self, options: RequestOptions = {}) -> int:
+        return self._get_option_value(options, "board_gatekeeper_page_number", 100)
+
+    def _parse_board_page(self, board_page_json: Any) -> Board:
+        """将版块页面的响应内容转换为 :class:`Board`。"""
+        return list(map(lambda thread: BoardThread(thread), board_page_json))
+
+    def _parse_timeline_page(self, timeline_page_json: Any) -> Timeline:
+        """将时间线页面的响应内容转换为 :class:`Timeline`。"""
+        return list(map(lambda thread: TimelineThread(thread), timeline_page_json))
+
+    def _parse_thread_page(self, thread_page_json: Any, for_analysis: bool = False) -> ThreadPage:
+        """
+        将串页面的响应内容转换为 :class:`ThreadPage`。
+
+        Parameters
+        ----------
+        thread_page_json : Any
+            响应内容。
+        for_analysis : bool
+            如果为真，将会过滤掉与分析无关的内容，以方便分析。
+        """
+
+        if thread_page_json == '该主题不存在':
+            raise ResourceNotExistsException()
+
+        thread_page = ThreadPage(thread_page_json)
+        if for_analysis:
+            thread_page.replies = self._replies_for_analysis(
+                thread_page.replies)
+        return thread_page
+
+    def _replies_for_analysis(self, replies: List[Post]) -> List[Post]:
+        """
+        过滤掉与分析无关的回应，如每页最前面的芦苇的 Tips。
+
+        Tips 的串号（9999999）与串内的其他回应无关，
+        根据串号判断页面的范围或是否卡页前都应先过滤掉它。
+        """
+        return [post for post in replies if post.user_id != "芦苇"]
+
+    def _make_reply_fields(self, content: str, to_thread_id: int,
+                           name: Optional[str] = None, email: Optional[str] = None, title: Optional[str] = None,
+                           ) -> OrderedDict[str, str]:
+        """生成发表回应时要提交的表单字段。"""
+        fields: OrderedDict[str, str] = OrderedDict()
+        if self.appid is not None:
+            fields['appid'] = self.appid
+        fields['content'] = content
+        fields['name'] = name if name is not None else ""
+        fields['email'] = email if email is not None else ""
+        fields['title'] = title if title is not None else ""
+        fields['resto'] = str(to_thread_id)
+        return fields
+
+    def _parse_reply_response(self, resp_body: str):
+        """
+        解析发表回应后服务器响应的页面。
+
+        发表成功则直接返回，否则抛出相应的异常。
+        """
+
+        doc = BeautifulSoup(resp_body, features='html.parser')
+        sys_msg_div = doc.find('div', attrs={'class': 'system-message'})
+        if sys_msg_div is None:
+            raise UnknownResponseException(response_body=resp_body)
+
+        success_divs = sys_msg_div.find_all('p', attrs={'class': 'success'})
+        if len(success_divs) != 0:
+            return
+
+        error_divs = sys_msg_div.find_all('p', attrs={'class': 'error'})
+        if len(error_divs) == 0:
+            raise UnknownResponseException(response_body=resp_body)
+
+        raw_error = error_divs[0].text
+
+        raw_detail = None
+        detail_divs = sys_msg_div.find_all('p', attrs={'class': 'detail'})
+        if len(detail_divs) != 0:
+            raw_detail = detail_divs[0].text
+            if raw_detail == "":
+                raw_detail = None
+
+        raise ReplyException(raw_error=raw_error, raw_detail=raw_detail)
+
+        # <div class="system-message">
+        # <h1>:)</h1>
+        # <p class="success">回复成功</p>
+        # <p class="detail"></p>
+
+        # <div class="system-message">
+        # <h1>:(</h1>
+        # <p class="error">没有选定回复的帖子</p>
+        # <p class="detail"></p>
+
+
+class _RejectingCookiePolicy(DefaultCookiePolicy):
+    """不接受任何由服务器设置的 cookie 的策略。"""
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
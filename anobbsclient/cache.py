@@ -0,0 +1,256 @@
+from typing import Dict, Hashable, Optional, Union, Literal
+from dataclasses import dataclass, field
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+CacheKind = Union[
+    Literal["board_page"],
+    Literal["thread_last_page"],
+    Literal["thread_full_page"],
+]
+"""
+缓存内容的种类，决定缓存的有效期。
+
+Cases
+-----
+"board_page"
+    版块页面，随时会因为有新回应而变化。
+
+"thread_last_page"
+    串的最后一页（或未满的页面），会因为有新回应而变化。
+
+"thread_full_page"
+    串的已满的非最后一页，只会因为删串而变化。
+"""
+
+
+@dataclass(frozen=True)
+class ResponseCacheStats:
+    """
+    响应缓存的统计信息。
+    """
+
+    hits: int
+    """命中次数。"""
+    misses: int
+    """未命中（含已过期）次数。"""
+    bytes_saved: int
+    """由于命中而省下的下载字节数，以该响应当初实际下载的字节数计。"""
+    evictions: int
+    """由于超出容量限制而被移出内存的条目数。"""
+
+
+@dataclass
+class ResponseCache:
+    """
+    API 响应的缓存。
+
+    缓存的是经过解压的响应 JSON，而非构建好的对象，因此每次命中都会得到新的对象。
+    内存中的一层以 LRU 淘汰；设置了 ``directory`` 时，另有一层存储于磁盘，
+    可以在程序重启后继续使用。
+    """
+
+    max_entries: int = 4096
+    """内存中最多保留的条目数。"""
+
+    max_bytes: int = 64 * 1024 * 1024
+    """内存中最多保留的响应内容的总字节数。"""
+
+    ttls: Dict[str, float] = field(default_factory=lambda: {
+        "board_page": 30,
+        "thread_last_page": 30,
+        "thread_full_page": 24 * 60 * 60,
+    })
+    """各种类的缓存的有效秒数，见 :class:`CacheKind`。"""
+
+    directory: Optional[str] = None
+    """磁盘缓存所在的目录。为 ``None`` 时不使用磁盘缓存。"""
+
+    max_disk_bytes: int = 1024 * 1024 * 1024
+    """
+    磁盘缓存最多占用的字节数。
+
+    磁盘缓存的总大小及写入顺序只在创建时扫描一次目录，之后在内存中记录，
+    因此同时有其他进程写入同一目录时，其写入的文件要到下次创建时才会计入。
+    """
+
+    _entries: 'OrderedDict[Hashable, _Entry]' = field(
+        default_factory=OrderedDict, init=False, repr=False)
+    _bytes: int = field(default=0, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    _hits: int = field(default=0, init=False, repr=False)
+    _misses: int = field(default=0, init=False, repr=False)
+    _bytes_saved: int = field(default=0, init=False, repr=False)
+    _evictions: int = field(default=0, init=False, repr=False)
+
+    # 磁盘缓存的各文件的大小，越靠前的越早写入
+    _disk_files: 'OrderedDict[str, int]' = field(
+        default_factory=OrderedDict, init=False, repr=False)
+    _disk_bytes: int = field(default=0, init=False, repr=False)
+
+    def __post_init__(self):
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.__scan_disk()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        获取缓存的响应内容。
+
+        Returns
+        -------
+        UTF-8 编码的响应 JSON；没有缓存或已过期时返回 ``None``。
+        """
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and entry.expires_at <= now:
+                self.__remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.directory is not None:
+            entry = self.__read_disk(key, now)
+            if entry is not None:
+                with self._lock:
+                    self.__put_memory(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._bytes_saved += entry.downloaded
+        return entry.content
+
+    def put(self, key: Hashable, content: bytes, kind: CacheKind, downloaded: int = 0):
+        """
+        缓存响应内容。
+
+        Parameters
+        ----------
+        key : Hashable
+            缓存的键。
+        content : bytes
+            UTF-8 编码的响应 JSON。
+        kind : CacheKind
+            缓存内容的种类。
+        downloaded : int
+            获取该响应实际下载的字节数，用于统计省下的流量。
+        """
+
+        ttl = self.ttls.get(kind, 0)
+        if ttl <= 0:
+            return
+        entry = _Entry(expires_at=time.time() + ttl,
+                       content=content, downloaded=downloaded)
+        with self._lock:
+            self.__put_memory(key, entry)
+        if self.directory is not None:
+            self.__write_disk(key, entry)
+
+    def clear(self):
+        """清空内存中的缓存。"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> ResponseCacheStats:
+        """返回当前的统计信息。"""
+        with self._lock:
+            return ResponseCacheStats(
+                hits=self._hits, misses=self._misses,
+                bytes_saved=self._bytes_saved, evictions=self._evictions,
+            )
+
+    def __put_memory(self, key: Hashable, entry: '_Entry'):
+        if key in self._entries:
+            self.__remove(key)
+        self._entries[key] = entry
+        self._bytes += len(entry.content)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            (oldest_key, _) = next(iter(self._entries.items()))
+            self.__remove(oldest_key)
+            self._evictions += 1
+
+    def __remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.content)
+
+    def __disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    def __read_disk(self, key: Hashable, now: float) -> Optional['_Entry']:
+        path = self.__disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta["key"] != repr(key) or meta["expires_at"] <= now:
+            return None
+        return _Entry(expires_at=meta["expires_at"],
+                      content=content, downloaded=meta["downloaded"])
+
+    def __write_disk(self, key: Hashable, entry: '_Entry'):
+        path = self.__disk_path(key)
+        meta = json.dumps({
+            "key": repr(key),
+            "expires_at": entry.expires_at,
+            "downloaded": entry.downloaded,
+        }).encode('utf-8')
+        # 先写入临时文件再替换，防止读到写了一半的文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(meta + b"\n" + entry.content)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.__forget_disk_file(path)
+            self._disk_files[path] = len(meta) + 1 + len(entry.content)
+            self._disk_bytes += self._disk_files[path]
+            # 先删除最早写入的
+            to_remove = []
+            while self._disk_bytes > self.max_disk_bytes:
+                (oldest_path, _) = next(iter(self._disk_files.items()))
+                self.__forget_disk_file(oldest_path)
+                to_remove.append(oldest_path)
+        for path in to_remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __scan_disk(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            files.append((stat.st_mtime, entry.path, stat.st_size))
+        for (_, path, size) in sorted(files):
+            self._disk_files[path] = size
+            self._disk_bytes += size
+
+    def __forget_disk_file(self, path: str):
+        size = self._disk_files.pop(path, None)
+        if size is not None:
+            self._disk_bytes -= size
+
+
+@dataclass
+class _Entry:
+    expires_at: float
+    content: bytes
+    downloaded: int
@@ -1,8 +1,10 @@
-from typing import Optional, OrderedDict, Dict, Any, Union, Literal, NamedTuple, Tuple, Callable
+from typing import Optional, OrderedDict, Dict, Any, Union, Literal, NamedTuple, Tuple, Callable, Iterable, Iterator, List, Set
 from dataclasses import dataclass, field
 
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 import urllib3
 import json
 import io
@@ -12,17 +14,19 @@ import requests_toolbelt
 from bs4 import BeautifulSoup
 
 from .baseclient import BaseClient
-from .requestutils import BandwidthUsage, try_request
+from .requestutils import BandwidthUsage, try_request, sum_bandwidth_usages
 from .usercookie import UserCookie
 from .options import RequestOptions, LoginPolicy, LuweiCookieFormat
-from .objects import Board, ThreadPage, BoardThread
-from .exceptions import ShouldNotReachException, RequiresLoginException, NoPermissionException, ResourceNotExistsException, GatekeptException, UnknownResponseException, ReplyException
+from .objects import Board, Timeline, ThreadPage, BoardThread, ThreadBody, Post
+from .exceptions import ShouldNotReachException, RequiresLoginException, NoPermissionException, ResourceNotExistsException, GatekeptException, UnknownResponseException, ReplyException, UnreachableLowerBoundPostIDException
 
 
 @dataclass
 class Client(BaseClient):
     """
         实现各类基础操作的客户端类。
+
+        线程安全，一个客户端可以由线程池中的各个线程共用，以复用会话及底层连接。
     """
 
     def get_board_page(self, board_id: int, page: int, options: RequestOptions = {}) -> Tuple[Board, BandwidthUsage]:
@@ -46,19 +50,75 @@ class Client(BaseClient):
 
         logging.debug(f"将获取版块：{board_id} 第 {page} 页，将会登录：{needs_login}")
 
+        cache_key = self._response_cache_key(
+            '/Api/showf', board_id, page, options=options, needs_login=needs_login)
+        threads = self._load_cached_json(cache_key, options)
+        if threads is not None:
+            return self._parse_board_page(threads), BandwidthUsage(0, 0)
+
         def request_fn():
-            threads, bandwidth_usage = self._get_json(
+            content, bandwidth_usage = self._get_content(
                 path=f'/Api/showf', options=options, needs_login=needs_login,
                 id=board_id,
                 page=page,
             )
-            return list(map(lambda thread: BoardThread(thread), threads)), bandwidth_usage
+            board_page = self._build_board_page(
+                content, options, cache_key, bandwidth_usage)
+            return board_page, bandwidth_usage
 
         (board_page, bandwidth_usage) = try_request(
-            request_fn, f"获取版块 {board_id} 第 {page} 页", self.get_max_attempts(options))
+            request_fn, f"获取版块 {board_id} 第 {page} 页",
+            self.get_retry_policy(options), budget=self.retry_budget,
+            deadline=self.get_deadline(options),
+            on_retry=self._retry_hook('/Api/showf'))
 
         return board_page, bandwidth_usage
 
+    def get_timeline_page(self, page: int, options: RequestOptions = {}) -> Tuple[Timeline, BandwidthUsage]:
+        """
+        获取时间线的指定页。
+
+        时间线按最后回复时间从晚到早列出各版块的串，与版块页面的格式相同，
+        但其中的串（:class:`TimelineThread`）带有所在版块的 ID。
+
+        Parameters
+        ----------
+        page : int
+            页数。
+        options : RequestOptions
+            请求选项。
+        """
+
+        needs_login = self.timeline_page_requires_login(
+            page=page, options=options)
+        if needs_login and not self.has_cookie(options):
+            raise RequiresLoginException()
+
+        logging.debug(f"将获取时间线：第 {page} 页，将会登录：{needs_login}")
+
+        cache_key = self._response_cache_key(
+            '/Api/timeline', None, page, options=options, needs_login=needs_login)
+        threads = self._load_cached_json(cache_key, options)
+        if threads is not None:
+            return self._parse_timeline_page(threads), BandwidthUsage(0, 0)
+
+        def request_fn():
+            content, bandwidth_usage = self._get_content(
+                path=f'/Api/timeline', options=options, needs_login=needs_login,
+                page=page,
+            )
+            timeline_page = self._build_board_page(
+                content, options, cache_key, bandwidth_usage, endpoint='/Api/timeline')
+            return timeline_page, bandwidth_usage
+
+        (timeline_page, bandwidth_usage) = try_request(
+            request_fn, f"获取时间线第 {page} 页",
+            self.get_retry_policy(options), budget=self.retry_budget,
+            deadline=self.get_deadline(options),
+            on_retry=self._retry_hook('/Api/timeline'))
+
+        return timeline_page, bandwidth_usage
+
     def get_thread_page(self, id: int, page: int, options: RequestOptions = {}, for_analysis: bool = False) -> Tuple[ThreadPage, BandwidthUsage]:
         """
         获取指定串的指定页。
@@ -82,134 +142,561 @@ class Client(BaseClient):
 
         logging.debug(f"将获取串：{id} 第 {page} 页，将会登录：{needs_login}")
 
+        cache_key = self._response_cache_key(
+            '/Api/thread', id, page, options=options, needs_login=needs_login)
+        thread_page_json = self._load_cached_json(cache_key, options)
+        if thread_page_json is not None:
+            return self._parse_thread_page(thread_page_json, for_analysis=for_analysis), BandwidthUsage(0, 0)
+
         def request_fn():
-            thread_page_json, bandwidth_usage = self._get_json(
+            content, bandwidth_usage = self._get_content(
                 path=f'/Api/thread/id/{id}', options=options, needs_login=needs_login,
                 page=page,
             )
-            if thread_page_json == '该主题不存在':
-                raise ResourceNotExistsException()
-
-            return ThreadPage(thread_page_json), bandwidth_usage
+            thread_page = self._build_thread_page(
+                content, page, options, for_analysis, cache_key, bandwidth_usage)
+            return thread_page, bandwidth_usage
 
         (thread_page, bandwidth_usage) = try_request(
-            request_fn, f"获取串 {id} 第 {page} 页", self.get_max_attempts(options))
-
-        if for_analysis:
-            thread_page.replies = list(filter(
-                lambda post: post.user_id != "芦苇", thread_page.replies))
+            request_fn, f"获取串 {id} 第 {page} 页",
+            self.get_retry_policy(options), budget=self.retry_budget,
+            deadline=self.get_deadline(options),
+            on_retry=self._retry_hook('/Api/thread'))
 
         return thread_page, bandwidth_usage
 
-    def page_requires_login(self, page: int, gate_keeper: int, options: RequestOptions = {}) -> bool:
+    def get_thread_pages(self, id: int, pages: Iterable[int], options: RequestOptions = {}, for_analysis: bool = False,
+                         max_workers: Optional[int] = None, gatekeeper_post_id: Optional[int] = None,
+                         timeout: Optional[float] = None,
+                         ) -> Tuple[List[Tuple[int, ThreadPage]], BandwidthUsage]:
         """
-        判断页面是否需要登录才能正常阅读。
+        同时获取指定串的多个页面。
+
+        获取完毕后，会像 :meth:`ReversalThreadWalkTarget.check_gatekept` 那样检查各页是否发生卡页：
+        页数较大的页面的首条回应的串号必须严格大于页数较小的页面的，
+        超过守门页的页面的首条回应的串号必须大于 ``gatekeeper_post_id``。
 
         Parameters
         ----------
-        page : int
-            要请求的页面页数。
-        gate_keeper : int
-            从下页起会出现「卡页」现象的页数，
-            即如果不登录，访问往后的页面都会响应该页的内容。
-
-            2021-03-07: 目前无论是串还是板块，都是从第101页起重复第100页的内容。
+        id : int
+            串号。
+        pages : Iterable[int]
+            要获取的各页的页数，如 ``range(1, 11)``。
         options : RequestOptions
-            请求设置。
+            请求选项。
+        for_analysis : bool
+            如果为真，将会过滤掉与分析无关的内容，以方便分析。
+        max_workers : Optional[int]
+            最多同时进行的请求数。
+            默认为 ``4``；设置了 :attr:`concurrency_limiter` 时默认为其 ``max_limit``，
+            实际同时进行的请求数由其动态决定。
+        gatekeeper_post_id : Optional[int]
+            不需要登录能看到的串中最大的串号，见 :attr:`ReversalThreadWalkTarget.gatekeeper_post_id`。
+        timeout : Optional[float]
+            获取所有页面的时限（秒），超过时会抛出 :exc:`DeadlineExceededException`。
+            见 :attr:`RequestOptions.deadline`。
 
         Returns
         -------
-        是否需要登录。
+        按页数从小到大排列的 ``(页数, 页面)``，以及合计的流量。
         """
 
-        login_policy = self.get_login_policy(options)
-        has_cookie = self.has_cookie(options)
+        options = self.options_with_timeout(options, timeout)
+        page_numbers = sorted(set(pages))
+        for page in page_numbers:
+            # 在发出任何请求前检查是否缺少饼干
+            if self.thread_page_requires_login(page=page, options=options) \
+                    and not self.has_cookie(options):
+                raise RequiresLoginException()
+
+        def fetch(page: int) -> Tuple[ThreadPage, BandwidthUsage]:
+            return self.get_thread_page(id, page=page, options=options, for_analysis=for_analysis)
+
+        if max_workers is None:
+            max_workers = self.concurrency_limiter.max_limit \
+                if self.concurrency_limiter is not None else 4
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(fetch, page_numbers))
+
+        thread_pages = [(page, thread_page)
+                        for (page, (thread_page, _)) in zip(page_numbers, results)]
+        self._check_thread_pages_gatekept(
+            thread_pages, gatekeeper_post_id=gatekeeper_post_id, options=options)
+
+        return thread_pages, sum_bandwidth_usages(usage for (_, usage) in results)
+
+    def get_threads(self, ids: Iterable[int], options: RequestOptions = {}, for_analysis: bool = False,
+                    max_workers: Optional[int] = None, timeout: Optional[float] = None,
+                    ) -> 'ThreadBatch':
+        """
+        同时获取多个串的第一页（含串首及回应总数）。
 
-        if login_policy == "enforce":
-            return True
+        返回的 :class:`ThreadBatch` 在迭代时发出请求，并按完成的顺序逐个产出各串的结果。
+        单个串获取失败（如串不存在时的 :exc:`ResourceNotExistsException`）不会中止整批请求，
+        而是作为该串的结果产出。
 
-        if login_policy == "when_has_cookie":
-            return has_cookie or page > gate_keeper
-        elif login_policy in ("always_no", "when_required"):
-            return page > gate_keeper
+        Parameters
+        ----------
+        ids : Iterable[int]
+            各串的串号，可以是惰性的迭代器。
+        options : RequestOptions
+            请求选项。
+        for_analysis : bool
+            如果为真，将会过滤掉与分析无关的内容，以方便分析。
+        max_workers : Optional[int]
+            最多同时进行的请求数，见 :meth:`get_thread_pages`。
+        timeout : Optional[float]
+            获取所有串的时限（秒），从开始迭代时起算，
+            超过后尚未完成的串的结果为 :exc:`DeadlineExceededException`。
 
-        raise ShouldNotReachException()
+        Returns
+        -------
+        尚未开始的批量获取，可以通过其 ``stats()`` 查看统计信息。
+        """
 
-    def thread_page_requires_login(self, page: int, options: RequestOptions = {}) -> bool:
-        return self.page_requires_login(
-            page=page,
-            gate_keeper=self.get_thread_gatekeeper_page_number(options),
-            options=options,
+        if max_workers is None:
+            max_workers = self.concurrency_limiter.max_limit \
+                if self.concurrency_limiter is not None else 4
+        return ThreadBatch(
+            client=self, ids=ids, options=options,
+            for_analysis=for_analysis, max_workers=max_workers, timeout=timeout,
         )
 
-    def board_page_requires_login(self, page: int, options: RequestOptions = {}) -> bool:
-        gk_pn = self.get_board_gatekeeper_page_number(options)
-        if page > gk_pn:  # TODO: 放在这里是不是不太合适？
-            raise GatekeptException(
-                context='check_if_board_page_requires_login',
-                current_page_number=None,
-                gatekeeper_post_id=None,
+    def sync_thread(self, id: int, known_reply_count: int, last_known_post_id: int,
+                    known_post_ids: Optional[Iterable[int]] = None,
+                    options: RequestOptions = {}, for_analysis: bool = False,
+                    max_workers: Optional[int] = None, gatekeeper_post_id: Optional[int] = None,
+                    ) -> Tuple['ThreadSyncResult', BandwidthUsage]:
+        """
+        增量同步指定串：只获取可能包含新回应的页面。
+
+        先获取已知的最后一条回应所在的页面（「重叠页」），
+        再根据其中的回应总数同时获取之后的各页。
+        如果之前的回应被删除导致重叠页中的回应都是新的，会继续向前获取，
+        直到遇到已知的回应或第一页。
+
+        Parameters
+        ----------
+        id : int
+            串号。
+        known_reply_count : int
+            上次同步时串的回应总数。
+        last_known_post_id : int
+            上次同步时最后一条回应的串号，没有回应时为串首的串号。
+        known_post_ids : Optional[Iterable[int]]
+            已知的回应的串号，用于检测重叠页中被删除的回应。
+            只需包含重叠页范围内的串号，为 ``None`` 时不检测。
+        options : RequestOptions
+            请求选项。
+        for_analysis : bool
+            如果为真，将会过滤掉与分析无关的内容，以方便分析。
+        max_workers : Optional[int]
+            最多同时进行的请求数，见 :meth:`get_thread_pages`。
+        gatekeeper_post_id : Optional[int]
+            见 :meth:`get_thread_pages`。
+
+        Returns
+        -------
+        同步的结果，以及合计的流量。
+        """
+
+        page_size = self.get_thread_page_size(options)
+        overlap_page = max(1, (known_reply_count - 1) // page_size + 1)
+
+        (first_page, usage) = self.get_thread_page(
+            id, page=overlap_page, options=options, for_analysis=for_analysis)
+        thread_pages = [(overlap_page, first_page)]
+        usages = [usage]
+
+        # 重叠页之前的回应被删除后，新回应可能被挤到更前面的页
+        # 根据串号判断范围时不考虑芦苇的 Tips
+        while overlap_page > 1:
+            first_replies = self._replies_for_analysis(first_page.replies)
+            if len(first_replies) != 0 and first_replies[0].id <= last_known_post_id:
+                break
+            overlap_page -= 1
+            (first_page, usage) = self.get_thread_page(
+                id, page=overlap_page, options=options, for_analysis=for_analysis)
+            thread_pages.insert(0, (overlap_page, first_page))
+            usages.append(usage)
+
+        total_reply_count = first_page.body.total_reply_count
+        last_page = max(1, (total_reply_count - 1) // page_size + 1)
+        fetched_pages = set(page for (page, _) in thread_pages)
+        remaining_pages = [page for page in range(overlap_page + 1, last_page + 1)
+                           if page not in fetched_pages]
+        if len(remaining_pages) != 0:
+            (tail_pages, usage) = self.get_thread_pages(
+                id, remaining_pages, options=options, for_analysis=for_analysis,
+                max_workers=max_workers, gatekeeper_post_id=gatekeeper_post_id,
             )
-        return self.page_requires_login(
-            page=page,
-            gate_keeper=gk_pn,
-            options=options,
+            thread_pages = sorted(thread_pages + tail_pages,
+                                  key=lambda item: item[0])
+            usages.append(usage)
+        self._check_thread_pages_gatekept(
+            thread_pages, gatekeeper_post_id=gatekeeper_post_id, options=options)
+
+        new_replies = [reply for (_, thread_page) in thread_pages
+                       for reply in self._replies_for_analysis(thread_page.replies)
+                       if reply.id > last_known_post_id]
+
+        deleted_post_ids = []
+        if known_post_ids is not None:
+            overlap_replies = self._replies_for_analysis(
+                thread_pages[0][1].replies)
+            if overlap_page == 1:
+                lower_bound = id
+            elif len(overlap_replies) != 0:
+                lower_bound = overlap_replies[0].id
+            else:
+                lower_bound = last_known_post_id
+            seen_ids = set(reply.id for (_, thread_page) in thread_pages
+                           for reply in thread_page.replies)
+            deleted_post_ids = sorted(
+                post_id for post_id in set(known_post_ids)
+                if lower_bound < post_id <= last_known_post_id and post_id not in seen_ids)
+
+        result = ThreadSyncResult(
+            body=thread_pages[-1][1].body,
+            new_replies=new_replies,
+            deleted_post_ids=deleted_post_ids,
+            fetched_page_numbers=[page for (page, _) in thread_pages],
         )
+        return result, sum_bandwidth_usages(usages)
 
-    def get_thread_gatekeeper_page_number(self, options: RequestOptions = {}) -> int:
-        return self._get_option_value(options, "thread_gatekeeper_page_number", 100)
+    def locate_post(self, id: int, post_id: int, options: RequestOptions = {}
+                    ) -> Tuple['PostLocation', BandwidthUsage]:
+        """
+        以二分查找找出指定回应所在的页。
 
-    def get_board_gatekeeper_page_number(self, options: RequestOptions = {}) -> int:
-        return self._get_option_value(options, "board_gatekeeper_page_number", 100)
+        同一串中回应的串号单调递增，因此只需 O(log 页数) 次请求。
+        查找的范围以第一页中的回应总数及「第 n 条回应的串号至少为串首串号加 n」为界。
+        如果指定的回应已被删除，返回的是它本应在的页，即首条回应的串号不大于它的最后一页。
+
+        查找需要获取超过守门页的页面时，才会获取守门页（已经获取过时直接使用），
+        并将这些页面与守门页最后一条回应的串号对比以检测是否卡页，
+        检测到卡页时会抛出 :exc:`GatekeptException`。
+
+        Parameters
+        ----------
+        id : int
+            串号。
+        post_id : int
+            要查找的回应的串号。
+        options : RequestOptions
+            请求选项。
+
+        Returns
+        -------
+        查找的结果，以及合计的流量。
+        """
+
+        if post_id < id:
+            raise UnreachableLowerBoundPostIDException(
+                lower_bound_post_id=post_id)
+
+        page_size = self.get_thread_page_size(options)
+        gk_pn = self.get_thread_gatekeeper_page_number(options)
+        probed: Dict[int, ThreadPage] = {}
+        usages: List[BandwidthUsage] = []
+
+        def probe(page: int) -> ThreadPage:
+            if page not in probed:
+                # 过滤掉芦苇的 Tips，以免其串号干扰对页面范围的判断
+                (thread_page, usage) = self.get_thread_page(
+                    id, page=page, options=options, for_analysis=True)
+                probed[page] = thread_page
+                usages.append(usage)
+            return probed[page]
+
+        total_reply_count = probe(1).body.total_reply_count
+        last_page = max(1, (total_reply_count - 1) // page_size + 1)
+
+        gatekeeper_post_id = None
+
+        def first_id(page: int) -> Optional[int]:
+            nonlocal gatekeeper_post_id
+            if page > gk_pn and gatekeeper_post_id is None:
+                # 查找的范围越过了守门页，才需要守门页来检测卡页
+                gatekeeper_replies = probe(gk_pn).replies
+                if len(gatekeeper_replies) != 0:
+                    gatekeeper_post_id = gatekeeper_replies[-1].id
+            thread_page = probe(page)
+            if len(thread_page.replies) == 0:
+                return None
+            min_id = thread_page.replies[0].id
+            if gatekeeper_post_id is not None \
+                    and page > gk_pn and min_id <= gatekeeper_post_id:
+                raise self._gatekept(GatekeptException(
+                    context="gatekeeper_post_id",
+                    current_page_number=page,
+                    gatekeeper_post_id=gatekeeper_post_id,
+                ), '/Api/thread')
+            return min_id
+
+        # 找出首条回应的串号不大于 post_id 的最后一页
+        lo = 1
+        hi = min(last_page, max(1, (post_id - id - 1) // page_size + 1))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            min_id = first_id(mid)
+            if min_id is not None and min_id <= post_id:
+                lo = mid
+                if probed[mid].replies[-1].id >= post_id:
+                    # 已经确定在此页
+                    break
+            else:
+                hi = mid - 1
+
+        location = PostLocation(
+            page_number=lo,
+            total_reply_count=total_reply_count,
+            last_page_number=last_page,
+            gatekeeper_post_id=gatekeeper_post_id,
+            probed_page_numbers=sorted(probed.keys()),
+        )
+        return location, sum_bandwidth_usages(usages)
+
+    def _check_thread_pages_gatekept(self, thread_pages: List[Tuple[int, ThreadPage]],
+                                     gatekeeper_post_id: Optional[int], options: RequestOptions = {}):
+        """
+        检查按页数从小到大排列的同一串的各页面是否发生卡页。
+
+        如检测到发生卡页，会抛出 :exc:`GatekeptException`。
+        无论页面是否以 ``for_analysis`` 获取，都不考虑芦苇的 Tips。
+        """
+
+        gk_pn = self.get_thread_gatekeeper_page_number(options)
+        last_page_min_id = None
+        for (page, thread_page) in reversed(thread_pages):
+            replies = self._replies_for_analysis(thread_page.replies)
+            if len(replies) == 0:
+                continue
+            min_id = replies[0].id
+
+            # 页数较大的页面应该至少有1串比页数较小的页面的所有串号要大
+            if last_page_min_id is not None and min_id >= last_page_min_id:
+                raise self._gatekept(GatekeptException(
+                    context="previous_page_min_post_id",
+                    current_page_number=page,
+                    gatekeeper_post_id=last_page_min_id,
+                ), '/Api/thread')
+            last_page_min_id = min_id
+
+            if gatekeeper_post_id is not None \
+                    and page > gk_pn and min_id <= gatekeeper_post_id:
+                raise self._gatekept(GatekeptException(
+                    context="gatekeeper_post_id",
+                    current_page_number=page,
+                    gatekeeper_post_id=gatekeeper_post_id,
+                ), '/Api/thread')
 
     def reply_thread(self, content: str, to_thread_id: int,
                      name: Optional[str] = None, email: Optional[str] = None, title: Optional[str] = None,
                      options: RequestOptions = {}):
-        session = self._make_session(options, needs_login=True)
-        data: OrderedDict[str, str] = OrderedDict()
-        if self.appid is not None:
-            data['appid'] = (None, self.appid)
-        data['content'] = (None, content)
-        data['name'] = (None, name if name is not None else "")
-        data['email'] = (None, email if email is not None else "")
-        data['title'] = (None, title if title is not None else "")
-        data['resto'] = (None, str(to_thread_id))
-
-        resp_body = None
-        with session.post(url=f'https://{self.host}/Home/Forum/doReplyThread.html', files=data) as resp:
+        fields = self._make_reply_fields(
+            content=content, to_thread_id=to_thread_id,
+            name=name, email=email, title=title,
+        )
+        data = OrderedDict((k, (None, v)) for (k, v) in fields.items())
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(
+                "posting", deadline=self.get_deadline(options))
+
+        with self._instrument_request('doReplyThread'), \
+                self._session(options, needs_login=True) as session, \
+                session.post(url=self._make_url('/Home/Forum/doReplyThread.html'), files=data) as resp:
             resp.raise_for_status()
             resp_body = resp.text
 
-        doc = BeautifulSoup(resp_body, features='html.parser')
-        sys_msg_div = doc.find('div', attrs={'class': 'system-message'})
-        if sys_msg_div is None:
-            raise UnknownResponseException(response_body=resp.text)
+        self._parse_reply_response(resp_body)
+
+
+@dataclass
+class ThreadFetchResult:
+    """
+    :meth:`Client.get_threads` 中单个串的结果。
+    """
+
+    id: int
+    """串号。"""
+
+    thread_page: Optional[ThreadPage]
+    """串的第一页，获取失败时为 ``None``。"""
+
+    bandwidth_usage: Optional[BandwidthUsage]
+    """获取该串产生的流量，获取失败时为 ``None``。"""
+
+    exception: Optional[Exception] = None
+    """获取失败时的异常，串不存在时为 :exc:`ResourceNotExistsException`。"""
 
-        success_divs = sys_msg_div.find_all('p', attrs={'class': 'success'})
-        if len(success_divs) != 0:
-            return
 
-        error_divs = sys_msg_div.find_all('p', attrs={'class': 'error'})
-        if len(error_divs) == 0:
-            raise UnknownResponseException(response_body=resp.text)
+@dataclass(frozen=True)
+class ThreadBatchStats:
+    """
+    :class:`ThreadBatch` 的统计信息。
+    """
+
+    completed: int
+    """已产出结果的串数。"""
+    succeeded: int
+    """其中获取成功的串数。"""
+    not_found: int
+    """其中不存在的串数。"""
+    failed: int
+    """其中由于其他原因获取失败的串数。"""
+    bandwidth_usage: BandwidthUsage
+    """获取成功的各串合计的流量。"""
+    errors: Dict[str, int]
+    """各种异常（含 :exc:`ResourceNotExistsException`）出现的次数，键为异常的类名。"""
+
+
+@dataclass
+class ThreadBatch:
+    """
+    :meth:`Client.get_threads` 返回的批量获取。
+
+    迭代时以线程池发出请求，按完成的顺序逐个产出 :class:`ThreadFetchResult`。
+    同时进行的请求不超过 ``max_workers``，串号按需从 ``ids`` 中取出，
+    因此可以处理数量很大的串号。请求经过客户端的限速器及并发限制器。
 
-        raw_error = error_divs[0].text
+    只能迭代一次；中途停止迭代时，尚未开始的请求会被取消。
+    """
+
+    client: Client
+    """发出请求的客户端。"""
+
+    ids: Iterable[int]
+    """各串的串号。"""
+
+    options: RequestOptions = field(default_factory=dict)
+    """请求选项。"""
+
+    for_analysis: bool = False
+    """见 :meth:`Client.get_thread_page`。"""
+
+    max_workers: int = 4
+    """最多同时进行的请求数。"""
+
+    timeout: Optional[float] = None
+    """获取所有串的时限（秒），从开始迭代时起算。"""
+
+    _succeeded: int = field(default=0, init=False, repr=False)
+    _not_found: int = field(default=0, init=False, repr=False)
+    _failed: int = field(default=0, init=False, repr=False)
+    _bandwidth_usage: BandwidthUsage = field(
+        default=BandwidthUsage(0, 0), init=False, repr=False)
+    _errors: Dict[str, int] = field(
+        default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def __iter__(self) -> Iterator[ThreadFetchResult]:
+        ids = iter(self.ids)
+        pending: Set[Future] = set()
+        options = self.client.options_with_timeout(self.options, self.timeout)
+
+        def submit_next():
+            id = next(ids, None)
+            if id is not None:
+                pending.add(executor.submit(self.__fetch, id, options))
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            # 多提交一些，使产出结果期间工作线程不会闲置
+            for _ in range(self.max_workers * 2):
+                submit_next()
+            while len(pending) != 0:
+                (done, _) = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    submit_next()
+                    result = future.result()
+                    self.__record(result)
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def stats(self) -> ThreadBatchStats:
+        """返回当前的统计信息，迭代期间也可以调用。"""
+        with self._lock:
+            return ThreadBatchStats(
+                completed=self._succeeded + self._not_found + self._failed,
+                succeeded=self._succeeded,
+                not_found=self._not_found,
+                failed=self._failed,
+                bandwidth_usage=self._bandwidth_usage,
+                errors=dict(self._errors),
+            )
+
+    def __fetch(self, id: int, options: RequestOptions) -> ThreadFetchResult:
+        try:
+            (thread_page, usage) = self.client.get_thread_page(
+                id, page=1, options=options, for_analysis=self.for_analysis)
+        except Exception as e:
+            return ThreadFetchResult(id, None, None, e)
+        return ThreadFetchResult(id, thread_page, usage)
+
+    def __record(self, result: ThreadFetchResult):
+        with self._lock:
+            if result.exception is None:
+                self._succeeded += 1
+                self._bandwidth_usage = sum_bandwidth_usages(
+                    [self._bandwidth_usage, result.bandwidth_usage])
+                return
+            if isinstance(result.exception, ResourceNotExistsException):
+                self._not_found += 1
+            else:
+                self._failed += 1
+            name = type(result.exception).__name__
+            self._errors[name] = self._errors.get(name, 0) + 1
 
-        raw_detail = None
-        detail_divs = sys_msg_div.find_all('p', attrs={'class': 'detail'})
-        if len(detail_divs) != 0:
-            raw_detail = detail_divs[0].text
-            if raw_detail == "":
-                raw_detail = None
 
-        raise ReplyException(raw_error=raw_error, raw_detail=raw_detail)
+@dataclass
+class ThreadSyncResult:
+    """
+    :meth:`Client.sync_thread` 的同步结果。
+    """
+
+    body: ThreadBody
+    """串首，其中的 ``total_reply_count`` 为同步时的回应总数。"""
 
-        # <div class="system-message">
-        # <h1>:)</h1>
-        # <p class="success">回复成功</p>
-        # <p class="detail"></p>
+    new_replies: List[Post]
+    """串号大于已知的最后一条回应的各回应，按串号从小到大排列。"""
+
+    deleted_post_ids: List[int]
+    """在重叠页的范围内已知但已不存在的回应的串号。"""
+
+    fetched_page_numbers: List[int]
+    """实际获取的各页的页数。"""
+
+
+@dataclass
+class PostLocation:
+    """
+    :meth:`Client.locate_post` 的查找结果。
+    """
+
+    page_number: int
+    """回应所在（或被删除前本应在）的页数。"""
+
+    total_reply_count: int
+    """查找时串的回应总数。"""
+
+    last_page_number: int
+    """查找时串的最后一页的页数。"""
+
+    gatekeeper_post_id: Optional[int]
+    """
+    守门页最后一条回应的串号。
+
+    串的页数未超过守门页，或查找不需要获取超过守门页的页面（因而没有获取守门页）时为 ``None``。
+
+    见 :attr:`ReversalThreadWalkTarget.gatekeeper_post_id`。
+    """
 
-        # <div class="system-message">
-        # <h1>:(</h1>
-        # <p class="error">没有选定回复的帖子</p>
-        # <p class="detail"></p>
+    probed_page_numbers: List[int]
+    """查找过程中获取的各页的页数。"""
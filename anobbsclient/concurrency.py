@@ -0,0 +1,236 @@
+from typing import Optional, List, Callable, Deque, Iterator, AsyncIterator, NamedTuple
+from dataclasses import dataclass, field
+
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # 未安装 aiohttp
+    aiohttp = None
+
+from .exceptions import DeadlineExceededException
+
+
+class LimitChange(NamedTuple):
+    """并发上限的一次变化。"""
+
+    time: float
+    """以 :func:`time.monotonic` 表示的变化时刻。"""
+    limit: int
+    """变化后的上限。"""
+    reason: str
+    """变化的原因，``"increase"``、``"latency"`` 或 ``"error"``。"""
+
+
+_OVERLOAD_EXCEPTIONS = (
+    requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+    ConnectionError, TimeoutError,
+    # Python 3.11 之前与 TimeoutError 不同
+    asyncio.TimeoutError,
+)
+if aiohttp is not None:
+    # 包括 ServerDisconnectedError 等
+    _OVERLOAD_EXCEPTIONS += (aiohttp.ClientConnectionError,
+                             aiohttp.ClientPayloadError)
+
+
+def is_overload_error(e: Exception) -> bool:
+    """
+    判断请求的异常是否表明服务器过载。
+
+    连接问题、超时以及 429 和 5xx 响应视为过载，其余异常（如 404）与负载无关。
+    """
+
+    if isinstance(e, _OVERLOAD_EXCEPTIONS):
+        return True
+    status = None
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+        status = e.response.status_code
+    elif isinstance(getattr(e, "status", None), int):
+        # aiohttp.ClientResponseError
+        status = e.status
+    return status is not None and (status == 429 or status >= 500)
+
+
+@dataclass
+class AdaptiveConcurrencyLimiter:
+    """
+    以 AIMD（加性增、乘性减）调整同时进行的请求数上限的限制器。
+
+    每个成功且延迟稳定的请求使上限增加 ``1 / 上限``，即每一轮请求约增加1；
+    请求延迟超过基准延迟的 ``latency_tolerance`` 倍（且至少多出 ``latency_slack`` 秒），
+    或因过载而失败（见 :func:`is_overload_error`）时，上限乘以 ``backoff_ratio``。
+    基准延迟为最近 ``latency_window`` 个请求中的最小延迟。
+    同一时刻开始的一批请求至多使上限下降一次。
+
+    线程安全，也可以在异步客户端中使用。
+    """
+
+    initial_limit: int = 4
+    """初始的并发上限。"""
+
+    min_limit: int = 1
+    """并发上限的最小值。"""
+
+    max_limit: int = 64
+    """并发上限的最大值。"""
+
+    backoff_ratio: float = 0.5
+    """下降时上限所乘的比例。"""
+
+    latency_tolerance: float = 2.0
+    """延迟超过基准延迟的此倍数时视为拥塞。"""
+
+    latency_slack: float = 0.05
+    """延迟至少比基准延迟多出此秒数才视为拥塞，避免延迟本身很短时的抖动被误判。"""
+
+    latency_window: int = 100
+    """计算基准延迟时参考的最近的请求数。"""
+
+    history_size: int = 1000
+    """最多保留的上限变化记录数。"""
+
+    _limit: float = field(default=None, init=False, repr=False)
+    _in_flight: int = field(default=0, init=False, repr=False)
+    _last_decreased_at: float = field(default=0, init=False, repr=False)
+    _latencies: Deque[float] = field(default=None, init=False, repr=False)
+    _history: Deque[LimitChange] = field(default=None, init=False, repr=False)
+    _condition: threading.Condition = field(
+        default_factory=threading.Condition, init=False, repr=False)
+    _async_waiters: Deque[asyncio.Future] = field(
+        default_factory=deque, init=False, repr=False)
+
+    def __post_init__(self):
+        self._limit = float(self.initial_limit)
+        self._latencies = deque(maxlen=self.latency_window)
+        self._history = deque(maxlen=self.history_size)
+        self._history.append(LimitChange(
+            time.monotonic(), self.limit, "initial"))
+
+    @property
+    def limit(self) -> int:
+        """当前的并发上限。"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """当前进行中的请求数。"""
+        return self._in_flight
+
+    def history(self) -> List[LimitChange]:
+        """返回并发上限的变化记录，按时间顺序排列。"""
+        with self._condition:
+            return list(self._history)
+
+    @contextmanager
+    def slot(self, deadline: Optional[float] = None,
+             classify: Callable[[Exception], bool] = is_overload_error) -> Iterator[None]:
+        """
+        占用一个并发名额进行请求，并根据请求的结果调整上限。
+
+        名额不足时阻塞等待。
+
+        Parameters
+        ----------
+        deadline : Optional[float]
+            以 :func:`time.monotonic` 表示的截止时刻。
+            到截止时刻仍未等到名额时抛出 :exc:`DeadlineExceededException`。
+        classify : Callable[[Exception], bool]
+            判断请求的异常是否表明服务器过载的函数。
+        """
+
+        with self._condition:
+            while self._in_flight >= self.limit:
+                timeout = None
+                if deadline is not None:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        raise DeadlineExceededException()
+                self._condition.wait(timeout)
+            self._in_flight += 1
+        started_at = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.__release(started_at, overloaded=classify(e), succeeded=False)
+            raise
+        self.__release(started_at, overloaded=False, succeeded=True)
+
+    @asynccontextmanager
+    async def async_slot(self, deadline: Optional[float] = None,
+                         classify: Callable[[Exception], bool] = is_overload_error) -> AsyncIterator[None]:
+        """:meth:`slot` 的异步版本，等待名额时不阻塞事件循环。"""
+
+        while True:
+            with self._condition:
+                if self._in_flight < self.limit:
+                    self._in_flight += 1
+                    break
+                waiter = asyncio.get_running_loop().create_future()
+                self._async_waiters.append(waiter)
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    raise DeadlineExceededException()
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                raise DeadlineExceededException()
+        started_at = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.__release(started_at, overloaded=classify(e), succeeded=False)
+            raise
+        self.__release(started_at, overloaded=False, succeeded=True)
+
+    def __release(self, started_at: float, overloaded: bool, succeeded: bool):
+        now = time.monotonic()
+        latency = now - started_at
+        with self._condition:
+            self._in_flight -= 1
+            old_limit = self.limit
+            reason = None
+
+            if succeeded:
+                baseline = min(self._latencies) if len(
+                    self._latencies) != 0 else latency
+                self._latencies.append(latency)
+                if latency > max(baseline * self.latency_tolerance, baseline + self.latency_slack):
+                    reason = "latency"
+                else:
+                    self._limit = min(float(self.max_limit),
+                                      self._limit + 1 / self._limit)
+                    if self.limit != old_limit:
+                        self.__record(now, "increase")
+            elif overloaded:
+                reason = "error"
+
+            # 在上次下降之前就已开始的请求不再使上限下降
+            if reason is not None and started_at >= self._last_decreased_at:
+                self._limit = max(float(self.min_limit),
+                                  self._limit * self.backoff_ratio)
+                self._last_decreased_at = now
+                self.__record(now, reason)
+
+            # 唤醒所有等待者，由它们重新争夺名额
+            self._condition.notify_all()
+            while len(self._async_waiters) != 0:
+                waiter = self._async_waiters.popleft()
+                if not waiter.done():
+                    waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+
+    def __record(self, now: float, reason: str):
+        self._history.append(LimitChange(now, self.limit, reason))
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -0,0 +1,252 @@
+from typing import Optional, List, Dict, Tuple, FrozenSet, Iterator, AsyncIterator, Union, Literal
+from dataclasses import dataclass, field
+
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+import requests
+
+from .usercookie import UserCookie
+from .exceptions import DeadlineExceededException
+
+CookieSelection = Union[
+    Literal["lru"],
+    Literal["weighted"],
+]
+"""
+饼干池选取饼干的方式。
+
+Cases
+-----
+"lru"
+    选取最久没有使用过的饼干，各饼干轮流使用。
+
+"weighted"
+    按 :attr:`UserCookiePool.weights` 的比例选取饼干（平滑加权轮询）。
+"""
+
+
+@dataclass(frozen=True)
+class UserCookieStats:
+    """
+    饼干池中单个饼干的统计信息。
+    """
+
+    requests: int
+    """使用该饼干发出的请求数。"""
+    failures: int
+    """使用该饼干的请求失败的次数。"""
+    cooldowns: int
+    """由于连续失败而进入冷却的次数。"""
+    cooling_down: bool
+    """当前是否处于冷却中。"""
+
+
+@dataclass
+class _CookieState:
+    user_cookie: UserCookie
+    last_used_at: float = float("-inf")
+    cooldown_until: float = float("-inf")
+    consecutive_failures: int = 0
+    current_weight: float = 0
+
+    requests: int = 0
+    failures: int = 0
+    cooldowns: int = 0
+
+
+@dataclass(eq=False)
+class UserCookiePool:
+    """
+    在多个饼干间分摊需要登录的请求的饼干池，见 :attr:`RequestOptions.user_cookie_pool`。
+
+    每次请求从池中选取一个饼干，使得卡页之后的页面等需要登录的请求能以多个饼干并行获取，
+    不受单个饼干的频率限制。各饼干仍然各自使用独立的 :class:`CookieJar`。
+
+    使用某个饼干的请求连续失败（响应 ``failure_statuses`` 中的状态码）``failure_threshold`` 次后，该饼干进入冷却，
+    ``cooldown`` 秒内不会被选取；所有饼干都在冷却时，请求会等待最先结束冷却的饼干。
+    线程安全，也可以在异步客户端中使用。
+    """
+
+    user_cookies: List[UserCookie]
+    """池中的各个饼干。"""
+
+    selection: CookieSelection = "lru"
+    """选取饼干的方式，见 :class:`CookieSelection`。"""
+
+    weights: Dict[str, float] = field(default_factory=dict)
+    """
+    ``selection`` 为 ``"weighted"`` 时各饼干的权重，键为 ``userhash``，未设置的饼干权重为 ``1``。
+    """
+
+    min_interval: float = 0
+    """同一个饼干两次请求之间至少间隔的秒数，用于遵守单个饼干的频率限制。"""
+
+    failure_threshold: int = 3
+    """连续失败多少次后进入冷却。"""
+
+    cooldown: float = 60
+    """冷却的秒数。"""
+
+    failure_statuses: FrozenSet[int] = frozenset({401, 403, 429})
+    """
+    响应这些状态码时视为饼干的请求失败。
+
+    连接问题及 5xx 等与饼干无关的错误不计入失败，以免服务器出现问题时所有饼干都进入冷却。
+    """
+
+    _states: Dict[str, _CookieState] = field(
+        default=None, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self):
+        if len(self.user_cookies) == 0:
+            raise ValueError("饼干池中至少要有一个饼干")
+        self._states = {user_cookie.userhash: _CookieState(user_cookie)
+                        for user_cookie in self.user_cookies}
+
+    @property
+    def cache_identity(self) -> Tuple[str, ...]:
+        """在响应缓存的键中代表整个饼干池，池中的饼干看到的内容视为相同。"""
+        return tuple(sorted(self._states.keys()))
+
+    def acquire(self, deadline: Optional[float] = None) -> UserCookie:
+        """
+        为一次请求选取饼干，必要时阻塞等待。
+
+        Parameters
+        ----------
+        deadline : Optional[float]
+            以 :func:`time.monotonic` 表示的截止时刻。
+            等待后会超过截止时刻时抛出 :exc:`DeadlineExceededException`。
+
+        Returns
+        -------
+        选取的饼干。请求结束后应通过 :meth:`record_success` 或 :meth:`record_failure` 报告结果。
+        """
+
+        (user_cookie, wait) = self.__reserve(deadline)
+        if wait > 0:
+            time.sleep(wait)
+        return user_cookie
+
+    async def acquire_async(self, deadline: Optional[float] = None) -> UserCookie:
+        """:meth:`acquire` 的异步版本，等待时不阻塞事件循环。"""
+        (user_cookie, wait) = self.__reserve(deadline)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return user_cookie
+
+    @contextmanager
+    def use(self, deadline: Optional[float] = None) -> Iterator[UserCookie]:
+        """
+        选取饼干进行请求，并根据请求的结果记录成功或失败。
+
+        Parameters
+        ----------
+        deadline : Optional[float]
+            见 :meth:`acquire`。
+        """
+
+        user_cookie = self.acquire(deadline)
+        try:
+            yield user_cookie
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(user_cookie)
+            raise
+        self.record_success(user_cookie)
+
+    @asynccontextmanager
+    async def use_async(self, deadline: Optional[float] = None) -> AsyncIterator[UserCookie]:
+        """:meth:`use` 的异步版本，等待时不阻塞事件循环。"""
+
+        user_cookie = await self.acquire_async(deadline)
+        try:
+            yield user_cookie
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(user_cookie)
+            raise
+        self.record_success(user_cookie)
+
+    def is_failure(self, e: Exception) -> bool:
+        """判断请求的异常是否应计为饼干的请求失败。"""
+        status = None
+        if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+            status = e.response.status_code
+        elif isinstance(getattr(e, "status", None), int):
+            # aiohttp.ClientResponseError
+            status = e.status
+        return status in self.failure_statuses
+
+    def record_success(self, user_cookie: UserCookie):
+        """报告使用该饼干的请求成功。"""
+        with self._lock:
+            self._states[user_cookie.userhash].consecutive_failures = 0
+
+    def record_failure(self, user_cookie: UserCookie):
+        """
+        报告使用该饼干的请求失败。
+
+        通过 :meth:`use` 请求时会自动报告，
+        调用方发现饼干失效（如登录后仍然卡页）时也可以自行报告。
+        """
+        with self._lock:
+            state = self._states[user_cookie.userhash]
+            state.failures += 1
+            state.consecutive_failures += 1
+            if state.consecutive_failures >= self.failure_threshold:
+                state.consecutive_failures = 0
+                state.cooldown_until = time.monotonic() + self.cooldown
+                state.cooldowns += 1
+
+    def stats(self) -> Dict[str, UserCookieStats]:
+        """返回各饼干的统计信息，键为 ``userhash``。"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                userhash: UserCookieStats(
+                    requests=state.requests,
+                    failures=state.failures,
+                    cooldowns=state.cooldowns,
+                    cooling_down=state.cooldown_until > now,
+                ) for (userhash, state) in self._states.items()
+            }
+
+    def __reserve(self, deadline: Optional[float]) -> Tuple[UserCookie, float]:
+        with self._lock:
+            now = time.monotonic()
+            ready = [state for state in self._states.values()
+                     if self.__available_at(state) <= now]
+            if len(ready) == 0:
+                # 都不可用时等待最先可用的饼干
+                state = min(self._states.values(), key=self.__available_at)
+            elif self.selection == "weighted":
+                state = self.__select_weighted(ready)
+            else:
+                state = min(ready, key=lambda state: state.last_used_at)
+
+            wait = max(0.0, self.__available_at(state) - now)
+            if deadline is not None and now + wait >= deadline:
+                raise DeadlineExceededException()
+            state.last_used_at = now + wait
+            state.requests += 1
+            return state.user_cookie, wait
+
+    def __available_at(self, state: _CookieState) -> float:
+        return max(state.cooldown_until, state.last_used_at + self.min_interval)
+
+    def __select_weighted(self, ready: List[_CookieState]) -> _CookieState:
+        # 平滑加权轮询：各饼干累加自身权重，选取累计最多者，并扣除本轮的总权重
+        total = 0
+        for state in ready:
+            weight = self.weights.get(state.user_cookie.userhash, 1)
+            state.current_weight += weight
+            total += weight
+        selected = max(ready, key=lambda state: state.current_weight)
+        selected.current_weight -= total
+        return selected
@@ -80,6 +80,18 @@ class ResourceNotExistsException(ClientException):
         )
 
 
+@dataclass
+class DeadlineExceededException(ClientException):
+    """
+    超过请求设置中的截止时刻（见 :attr:`RequestOptions.deadline`）时会抛出的异常。
+    """
+
+    def __init__(self):
+        super(DeadlineExceededException, self).__init__(
+            message="已超过截止时刻",
+        )
+
+
 @dataclass
 class UnreachableLowerBoundPostIDException(ClientException):
     """
@@ -139,3 +151,19 @@ class ReplyException(ClientException):
 
     raw_error: str
     raw_detail: str
+
+
+@dataclass
+class ReplayMissException(ClientException):
+    """
+    回放时存档中没有与请求对应的响应时会抛出的异常，见 :class:`ReplayTransport`。
+    """
+
+    url: str
+
+    def __init__(self, url: str):
+        super(ReplayMissException, self).__init__(
+            message="回放存档中没有对应的响应",
+        )
+
+        self.url = url
@@ -0,0 +1,282 @@
+from typing import Optional, Dict, List, Tuple, Callable, Union, Literal, Sequence
+from dataclasses import dataclass, field
+
+import os
+import time
+import bisect
+import threading
+
+from .requestutils import BandwidthUsage
+
+EventType = Union[
+    Literal["request_start"],
+    Literal["request_end"],
+    Literal["retry"],
+    Literal["response_decoded"],
+    Literal["cache_hit"],
+    Literal["gatekept"],
+]
+"""
+客户端事件的种类。
+
+Cases
+-----
+"request_start"
+    即将发出一次请求（重试时每次尝试各算一次）。
+
+"request_end"
+    一次请求结束，无论成功与否。
+
+"retry"
+    请求失败，将在等待后重试。
+
+"response_decoded"
+    响应内容已解析为 JSON 并构建为对象。
+
+"cache_hit"
+    命中响应缓存，没有发出请求。
+
+"gatekept"
+    检测到卡页。
+"""
+
+
+@dataclass(frozen=True)
+class ClientEvent:
+    """
+    客户端事件，会传给 :meth:`BaseClient.add_hook` 添加的各个钩子。
+
+    除 ``type``、``endpoint`` 及 ``time`` 外，各字段只在相应种类的事件中有值。
+    """
+
+    type: EventType
+    """事件的种类。"""
+
+    endpoint: str
+    """
+    请求的端点，如 ``"/Api/showf"``、``"/Api/thread"`` 或 ``"doReplyThread"``。
+
+    串号等参数不包括在内。
+    """
+
+    time: float = field(default_factory=time.monotonic)
+    """以 :func:`time.monotonic` 表示的事件发生时刻。"""
+
+    duration: Optional[float] = None
+    """请求所用的秒数（``request_end``）。"""
+
+    error: Optional[Exception] = None
+    """请求失败的异常（``request_end``、``retry``）。"""
+
+    bandwidth_usage: Optional[BandwidthUsage] = None
+    """请求产生的流量（``request_end``）。"""
+
+    raw_bytes: Optional[int] = None
+    """响应内容解压前的字节数（``request_end``）。"""
+
+    decoded_bytes: Optional[int] = None
+    """响应内容解压后的字节数（``request_end``）。"""
+
+    decompress_seconds: Optional[float] = None
+    """解压响应内容所用的秒数，已包含在 ``duration`` 中（``request_end``）。"""
+
+    attempt: Optional[int] = None
+    """失败的是第几次尝试（``retry``）。"""
+
+    retry_delay: Optional[float] = None
+    """重试前要等待的秒数（``retry``）。"""
+
+    decode_seconds: Optional[float] = None
+    """解析 JSON 所用的秒数（``response_decoded``）。"""
+
+    build_seconds: Optional[float] = None
+    """构建对象所用的秒数（``response_decoded``）。"""
+
+    page_number: Optional[int] = None
+    """涉及的页数（``cache_hit``、``gatekept``）。"""
+
+
+ClientHook = Callable[[ClientEvent], None]
+
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                           1.0, 2.5, 5.0, 10.0)
+
+
+@dataclass
+class MetricsCollector:
+    """
+    内置的指标收集器，本身即是钩子，通过 ``client.add_hook(collector)`` 使用。
+
+    按端点统计请求数、请求延迟的直方图、重试数、缓存命中数、流量、
+    解压前后的字节数及解析 JSON 与构建对象所用的时间，并按端点统计卡页次数。
+    可以以 Prometheus 的文本格式导出，见 :meth:`to_prometheus`。线程安全。
+    """
+
+    latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    """请求延迟直方图各桶的上界（秒）。"""
+
+    prefix: str = "anobbsclient"
+    """导出时各指标名称的前缀。"""
+
+    _counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = field(
+        default_factory=dict, init=False, repr=False)
+    _histograms: Dict[str, List[float]] = field(
+        default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def __call__(self, event: ClientEvent):
+        endpoint = event.endpoint
+        with self._lock:
+            if event.type == "request_start":
+                self.__inc("requests_started_total", endpoint)
+            elif event.type == "request_end":
+                outcome = "success" if event.error is None else "error"
+                self.__inc("requests_total", endpoint, outcome=outcome)
+                if event.duration is not None:
+                    self.__observe(endpoint, event.duration)
+                if event.bandwidth_usage is not None:
+                    self.__inc("uploaded_bytes_total", endpoint,
+                               value=event.bandwidth_usage.uploaded)
+                    self.__inc("downloaded_bytes_total", endpoint,
+                               value=event.bandwidth_usage.downloaded)
+                if event.raw_bytes is not None:
+                    self.__inc("response_raw_bytes_total", endpoint,
+                               value=event.raw_bytes)
+                if event.decoded_bytes is not None:
+                    self.__inc("response_decoded_bytes_total", endpoint,
+                               value=event.decoded_bytes)
+                if event.decompress_seconds is not None:
+                    self.__inc("decompress_seconds_total", endpoint,
+                               value=event.decompress_seconds)
+            elif event.type == "retry":
+                self.__inc("retries_total", endpoint)
+                self.__inc("retry_wait_seconds_total", endpoint,
+                           value=event.retry_delay or 0)
+            elif event.type == "response_decoded":
+                self.__inc("json_decode_seconds_total", endpoint,
+                           value=event.decode_seconds or 0)
+                self.__inc("object_build_seconds_total", endpoint,
+                           value=event.build_seconds or 0)
+            elif event.type == "cache_hit":
+                self.__inc("cache_hits_total", endpoint)
+            elif event.type == "gatekept":
+                self.__inc("gatekept_total", endpoint)
+
+    def counter(self, name: str, endpoint: str, **labels: str) -> float:
+        """返回指定计数器的当前值，``name`` 不含前缀，如 ``"requests_total"``。"""
+        key = (name, tuple(sorted({"endpoint": endpoint, **labels}.items())))
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def latency_histogram(self, endpoint: str) -> List[Tuple[float, int]]:
+        """
+        返回指定端点请求延迟的直方图。
+
+        Returns
+        -------
+        按上界从小到大排列的 ``(上界, 累计请求数)``，最后一项的上界为 ``inf``。
+        """
+
+        with self._lock:
+            counts = self._histograms.get(endpoint, None)
+            if counts is None:
+                return []
+            bounds = list(self.latency_buckets) + [float("inf")]
+            result, total = [], 0
+            for (bound, count) in zip(bounds, counts[:-1]):
+                total += count
+                result.append((bound, total))
+            return result
+
+    def to_prometheus(self) -> str:
+        """以 Prometheus 的文本格式导出所有指标。"""
+
+        lines = []
+        with self._lock:
+            counter_names = sorted(set(name for (name, _) in self._counters))
+            for name in counter_names:
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full_name} counter")
+                for ((n, labels), value) in sorted(self._counters.items()):
+                    if n == name:
+                        lines.append(
+                            f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+            if len(self._histograms) != 0:
+                full_name = f"{self.prefix}_request_duration_seconds"
+                lines.append(f"# TYPE {full_name} histogram")
+                bounds = list(self.latency_buckets) + [float("inf")]
+                for (endpoint, counts) in sorted(self._histograms.items()):
+                    total = 0
+                    for (bound, count) in zip(bounds, counts[:-1]):
+                        total += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        labels = (("endpoint", endpoint), ("le", le))
+                        lines.append(
+                            f"{full_name}_bucket{_format_labels(labels)} {total}")
+                    labels = (("endpoint", endpoint),)
+                    lines.append(
+                        f"{full_name}_sum{_format_labels(labels)} {_format_value(counts[-1])}")
+                    lines.append(
+                        f"{full_name}_count{_format_labels(labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, target: Union[str, Callable[[str], None]]):
+        """
+        以 Prometheus 的文本格式导出所有指标。
+
+        Parameters
+        ----------
+        target : Union[str, Callable[[str], None]]
+            为字符串时视为文件路径，以先写临时文件再替换的方式写入，
+            可供 node_exporter 的 textfile collector 读取；
+            否则视为回调，以导出的文本调用之。
+        """
+
+        text = self.to_prometheus()
+        if callable(target):
+            target(text)
+            return
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, target)
+
+    def __inc(self, name: str, endpoint: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted({"endpoint": endpoint, **labels}.items())))
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def __observe(self, endpoint: str, duration: float):
+        counts = self._histograms.get(endpoint, None)
+        if counts is None:
+            # 各桶的计数，再加上 +Inf 桶及总和
+            counts = [0] * (len(self.latency_buckets) + 2)
+            self._histograms[endpoint] = counts
+        counts[bisect.bisect_left(self.latency_buckets, duration)] += 1
+        counts[-1] += duration
+
+
+def endpoint_of(path: str) -> str:
+    """由请求的路径得出端点的名称，如 ``/Api/thread/id/123`` 对应 ``/Api/thread``。"""
+    if path.startswith("/Api/thread/"):
+        return "/Api/thread"
+    if path.endswith("/doReplyThread.html"):
+        return "doReplyThread"
+    return path
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    escaped = (f'{k}="{_escape(v)}"' for (k, v) in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
@@ -1,15 +1,11 @@
-from typing import OrderedDict, Any, List, Tuple, Optional
+from typing import OrderedDict, Any, List, Tuple, Optional, Dict, NamedTuple
 from dataclasses import dataclass
 
 import json
-import re
 from datetime import datetime
+from functools import lru_cache
 
-from dateutil import tz
-
-
-datetime_re = re.compile(r"^(.*?)\(.\)(.*?)$")
-local_tz = tz.gettz("Asia/Shanghai")
+from .utils import datetime_re, local_tz, parse_now_text, parse_now_text_as_datetime
 
 
 @dataclass
@@ -47,9 +43,12 @@ class Post:
 
     @property
     def created_at(self) -> datetime:
-        g = datetime_re.match(self.created_at_raw_text)
-        dt = datetime.strptime(f"{g[1]} {g[2]}", "%Y-%m-%d %H:%M:%S")
-        return dt.replace(tzinfo=local_tz)
+        return _parse_created_at(self.created_at_raw_text)
+
+    @property
+    def created_at_timestamp(self) -> int:
+        """发布时间的 Unix 时间戳（秒），比 :attr:`created_at` 更快。"""
+        return parse_now_text(self.created_at_raw_text)
 
     @property
     def user_id(self) -> str:
@@ -97,6 +96,121 @@ def _none_if(content, none_mark) -> Optional[Any]:
     return content
 
 
+def _parse_created_at(text: str) -> datetime:
+    return parse_now_text_as_datetime(text)
+
+
+class _RawLayout(NamedTuple):
+    """帖子原始数据的字段顺序，由字段相同的各帖子共用。"""
+
+    keys: Tuple[str, ...]
+    indices: Dict[str, int]
+
+
+@lru_cache(maxsize=64)
+def _raw_layout(keys: Tuple[str, ...]) -> _RawLayout:
+    return _RawLayout(keys, {key: i for (i, key) in enumerate(keys)})
+
+
+class CompactPost:
+    """
+    紧凑的帖子。
+
+    与 :class:`Post` 的接口相同，但以 ``__slots__`` 存储，且不保留原始数据的字典：
+    各字段的值存放在一个元组中，字段名及顺序由字段相同的各帖子共用。
+    串号及发布时间的时间戳在构建时就解析好，之后访问时无需再次解析；
+    :attr:`created_at` 则在访问时才构建。
+    适合需要大量持有、排序或筛选帖子的场景，排序及筛选时宜使用 :attr:`created_at_timestamp`。
+
+    注意它并不是 :class:`Post` 的子类。
+    """
+
+    __slots__ = ("_layout", "_values", "id", "created_at_timestamp")
+
+    id: int
+    created_at_timestamp: int
+    """发布时间的 Unix 时间戳（秒）。"""
+
+    def __init__(self, data: OrderedDict[str, Any]):
+        self._layout = _raw_layout(tuple(data.keys()))
+        self._values = tuple(data.values())
+        self.id = int(data["id"])
+        self.created_at_timestamp = parse_now_text(data["now"])
+
+    @classmethod
+    def from_post(cls, post: Post) -> 'CompactPost':
+        return cls(post._raw)
+
+    def __repr__(self) -> str:
+        return f"CompactPost(id={self.id!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactPost):
+            return NotImplemented
+        return self._layout.keys == other._layout.keys and self._values == other._values
+
+    def __get(self, key: str) -> Any:
+        return self._values[self._layout.indices[key]]
+
+    def raw_copy(self) -> OrderedDict[str, Any]:
+        return OrderedDict(zip(self._layout.keys, self._values))
+
+    @property
+    def attachment_base(self) -> Optional[str]:
+        return _none_if(self.__get("img"), "")
+
+    @property
+    def attachment_extension(self) -> Optional[str]:
+        return _none_if(self.__get("ext"), "")
+
+    @property
+    def created_at_raw_text(self) -> str:
+        return self.__get("now")
+
+    @property
+    def created_at(self) -> datetime:
+        return _parse_created_at(self.created_at_raw_text)
+
+    @property
+    def user_id(self) -> str:
+        return self.__get("userid")
+
+    @property
+    def name(self) -> Optional[str]:
+        return _none_if(self.__get("name"), "无名氏")
+
+    @property
+    def email(self) -> Optional[str]:
+        return _none_if(self.__get("email"), "")
+
+    @property
+    def title(self) -> Optional[str]:
+        return _none_if(self.__get("title"), "无标题")
+
+    @property
+    def content(self) -> str:
+        return self.__get("content")
+
+    @property
+    def sage_mark(self) -> str:
+        return self.__get("sage")
+
+    @property
+    def marked_sage(self) -> bool:
+        return self.sage_mark != "0"
+
+    @property
+    def admin_mark(self) -> str:
+        return self.__get("admin")
+
+    @property
+    def marked_admin(self) -> bool:
+        return self.admin_mark != "0"
+
+    def to_json(self) -> str:
+        return json.dumps(self.raw_copy(), indent=2, ensure_ascii=False)
+
+
 @dataclass
 class ThreadBody(Post):
     """
@@ -146,6 +260,7 @@ class ThreadPage(ThreadBody):
         self._replies = list(map(lambda post: Post(post), self._raw["replys"]))
         # 不 pop 来保持顺序
         self._raw["replys"] = None
+        self._body = None
 
     def raw_copy(self) -> OrderedDict[str, Any]:
         copy = super(ThreadPage, self).raw_copy(_keeps_replies_slot=True)
@@ -154,7 +269,10 @@ class ThreadPage(ThreadBody):
 
     @property
     def body(self) -> ThreadBody:
-        return ThreadBody(self._raw, _total_reply_count=self._total_reply_count)
+        if self._body is None:
+            self._body = ThreadBody(
+                self._raw, _total_reply_count=self._total_reply_count)
+        return self._body
 
     @property
     def replies(self) -> List[Post]:
@@ -164,6 +282,10 @@ class ThreadPage(ThreadBody):
     def replies(self, replies: List[Post]):
         self._replies = replies
 
+    def compact_replies(self) -> List[CompactPost]:
+        """以 :class:`CompactPost` 的形式返回该页的各回复帖。"""
+        return list(map(CompactPost.from_post, self._replies))
+
     def to_json(self) -> str:
         data = self.raw_copy()
         if self._replies != None:
@@ -190,11 +312,18 @@ class BoardThread(ThreadPage):
             return self.created_at
         return self.replies[-1].created_at
 
+    @property
+    def last_modified_timestamp(self) -> int:
+        """:attr:`last_modified_time` 的 Unix 时间戳（秒），比前者更快。"""
+        if len(self.replies) == 0:
+            return self.created_at_timestamp
+        return self.replies[-1].created_at_timestamp
+
 
 @dataclass
 class TimelineThread(BoardThread):
     """
-    暂未使用，预计用于组成时间线。
+    时间线中的串，与版块中的串相比可以得知其所在的版块。
     """
 
     def __init__(self, data: OrderedDict[str, Any]):
@@ -206,3 +335,5 @@ class TimelineThread(BoardThread):
 
 
 Board = List[BoardThread]
+
+Timeline = List[TimelineThread]
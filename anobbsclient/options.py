@@ -1,6 +1,9 @@
 from typing import Optional, TypedDict, Union, Literal
 
 from .usercookie import UserCookie
+from .cookiepool import UserCookiePool
+from .requestutils import JSONBackend
+from .retry import RetryPolicy
 
 LoginPolicy = Union[
     Literal["enforce"],
@@ -36,6 +39,11 @@ class LuweiCookieFormat(TypedDict, total=False):
 class RequestOptions(TypedDict, total=False):
     """
     客户端相关的请求设置。
+
+    调用时传入的设置优先于客户端的 ``default_request_options``，后者又优先于各项的默认值。
+    只有缺少的项及值为 ``None`` 的项会退回到之后的来源；
+    ``False``、``0`` 及空容器等其他假值都视为明确的设置，例如 ``max_attempts=0`` 不会退回到默认的 ``5``，
+    而是在请求时抛出 :exc:`ValueError`。
     """
 
     user_cookie: UserCookie
@@ -45,6 +53,13 @@ class RequestOptions(TypedDict, total=False):
     若为 ``None``, 则不使用饼干。
     """
 
+    user_cookie_pool: UserCookiePool
+    """
+    没有设置 ``user_cookie`` 时，需要登录的请求每次从中选取饼干的饼干池，默认为 ``None``。
+
+    见 :class:`UserCookiePool`。发表回应等发布请求不使用饼干池，仍需设置 ``user_cookie``。
+    """
+
     login_policy: LoginPolicy
     """饼干登录的策略。"""
 
@@ -65,5 +80,56 @@ class RequestOptions(TypedDict, total=False):
     为了保持与芦苇客户端一致，可以开启此项。
     """
 
+    connect_timeout: float
+    """建立连接的超时秒数，默认为 ``20``。"""
+
+    read_timeout: float
+    """等待服务器发送数据的超时秒数，默认为 ``20``。"""
+
+    deadline: float
+    """
+    以 :func:`time.monotonic` 表示的截止时刻，默认为 ``None``，即不设截止时刻。
+
+    超过截止时刻后不会再发出请求或重试，进行中的请求也会中止，
+    并抛出 :exc:`DeadlineExceededException`。
+    将同一截止时刻传给遍历或批量获取（如 :meth:`Client.get_thread_pages`），
+    即可限制整个操作所用的时间，如 ``{"deadline": time.monotonic() + 60}``。
+    """
+
     max_attempts: int
-    """最多由于网络连接问题进行尝试的次数，默认为 ``5``。"""
+    """
+    最多由于网络连接问题进行尝试的次数，默认为 ``5``。设置了 ``retry_policy`` 时不使用。
+
+    至少为 ``1``，否则请求时会抛出 :exc:`ValueError`。
+    """
+
+    retry_policy: RetryPolicy
+    """
+    请求失败后的重试策略，见 :class:`RetryPolicy`。
+
+    默认为最多尝试 ``max_attempts`` 次，指数退避并随机化等待时间。
+    """
+
+    json_backend: JSONBackend
+    """
+    解析响应的 JSON 所用的库，见 :class:`JSONBackend`。
+
+    默认在 ``uses_plain_dict`` 为真且安装了 orjson 时使用 orjson，否则使用标准库。
+    """
+
+    uses_plain_dict: bool
+    """
+    是否以普通的 ``dict`` 而非 ``OrderedDict`` 表示响应中的 JSON 对象，默认为 ``False``。
+
+    Python 3.7 起 ``dict`` 也会保持键的顺序，开启此项可以省下构建 ``OrderedDict`` 的开销。
+    """
+
+    thread_page_size: int
+    """串每页最多的回应数，默认为 ``19``。"""
+
+    uses_response_cache: bool
+    """
+    在客户端设置了 :attr:`BaseClient.response_cache` 时，是否使用缓存，默认为 ``True``。
+
+    命中缓存时不会发出请求，返回的流量为 ``BandwidthUsage(0, 0)``。
+    """
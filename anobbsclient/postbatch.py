@@ -0,0 +1,173 @@
+from typing import Any, Dict, Iterable, List, Mapping
+
+import sys
+import itertools
+from array import array
+
+from .objects import ThreadPage, Board
+from .utils import parse_now_texts
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class PostBatch:
+    """
+    以列存储的一批帖子。
+
+    直接由 API 响应的 JSON 构建，不会为每个帖子创建 :class:`Post` 对象，
+    适合对大量帖子的串号、发布时间、饼干及标记进行统计。
+
+    各列按相同的下标对应同一个帖子：
+
+    * ``ids``、``thread_ids``、``created_at_timestamps``: ``array('q')``，
+      分别为串号、所属串的串号及发布时间的 Unix 时间戳（秒）。
+      串首本身所属串的串号即其自身的串号。
+    * ``user_ids``: ``List[str]``，饼干，字符串经过 :func:`sys.intern`，重复的饼干只占一份内存。
+    * ``sage_marks``、``admin_marks``: ``array('b')``，是否被标记 sage、是否为管理员发布。
+    """
+
+    __slots__ = ("ids", "thread_ids", "created_at_timestamps",
+                 "user_ids", "sage_marks", "admin_marks")
+
+    def __init__(self):
+        self.ids = array('q')
+        self.thread_ids = array('q')
+        self.created_at_timestamps = array('q')
+        self.user_ids: List[str] = []
+        self.sage_marks = array('b')
+        self.admin_marks = array('b')
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"PostBatch(len={len(self)})"
+
+    def __getitem__(self, index: slice) -> 'PostBatch':
+        """返回切片对应的新的一批帖子。"""
+        if not isinstance(index, slice):
+            raise TypeError("PostBatch 只支持切片")
+        batch = PostBatch()
+        for name in PostBatch.__slots__:
+            setattr(batch, name, getattr(self, name)[index])
+        return batch
+
+    def _extend_json(self, posts: List[Mapping[str, Any]], thread_ids: Iterable[int]):
+        """逐列追加帖子，发布时间以 :func:`parse_now_texts` 一次性解析。"""
+        self.ids.extend(int(post["id"]) for post in posts)
+        self.thread_ids.extend(thread_ids)
+        self.created_at_timestamps.extend(
+            parse_now_texts(post["now"] for post in posts))
+        self.user_ids.extend(sys.intern(post["userid"]) for post in posts)
+        self.sage_marks.extend(post["sage"] != "0" for post in posts)
+        self.admin_marks.extend(post["admin"] != "0" for post in posts)
+
+    @classmethod
+    def from_thread_page_json(cls, data: Mapping[str, Any], includes_body: bool = False) -> 'PostBatch':
+        """
+        由串页面的响应内容构建。
+
+        Parameters
+        ----------
+        data : Mapping[str, Any]
+            串页面的响应内容。
+        includes_body : bool
+            是否包含串首。
+        """
+
+        posts = list(data["replys"] or [])
+        if includes_body:
+            posts.insert(0, data)
+        batch = cls()
+        batch._extend_json(posts, itertools.repeat(int(data["id"]), len(posts)))
+        return batch
+
+    @classmethod
+    def from_board_page_json(cls, data: Iterable[Mapping[str, Any]]) -> 'PostBatch':
+        """由版块页面的响应内容构建，包含各串的串首及响应中附带的最新回应。"""
+        posts, thread_ids = [], []
+        for thread in data:
+            thread_posts = [thread] + list(thread["replys"] or [])
+            posts.extend(thread_posts)
+            thread_ids.extend([int(thread["id"])] * len(thread_posts))
+        batch = cls()
+        batch._extend_json(posts, thread_ids)
+        return batch
+
+    @classmethod
+    def from_thread_page(cls, page: ThreadPage, includes_body: bool = False) -> 'PostBatch':
+        """
+        由 :class:`ThreadPage` 构建，只包含 ``page.replies`` 中剩下的回应，
+        因此可以直接用于 ``create_walker`` 产出的（可能已被截掉部分回应的）页面。
+        """
+
+        posts = [reply._raw for reply in page.replies]
+        if includes_body:
+            posts.insert(0, page._raw)
+        batch = cls()
+        batch._extend_json(posts, itertools.repeat(page.id, len(posts)))
+        return batch
+
+    @classmethod
+    def from_board(cls, board: Board) -> 'PostBatch':
+        """由 :class:`Board` 构建。"""
+        posts, thread_ids = [], []
+        for thread in board:
+            thread_posts = [thread._raw] + \
+                [reply._raw for reply in thread.replies]
+            posts.extend(thread_posts)
+            thread_ids.extend([thread.id] * len(thread_posts))
+        batch = cls()
+        batch._extend_json(posts, thread_ids)
+        return batch
+
+    @classmethod
+    def concat(cls, batches: Iterable['PostBatch']) -> 'PostBatch':
+        """将多批帖子按顺序合并为一批。"""
+        result = cls()
+        for batch in batches:
+            result.extend(batch)
+        return result
+
+    def extend(self, other: 'PostBatch'):
+        """将另一批帖子追加到此批之后。"""
+        for name in PostBatch.__slots__:
+            getattr(self, name).extend(getattr(other, name))
+
+    def filter(self, mask: Iterable[bool]) -> 'PostBatch':
+        """返回 ``mask`` 中对应为真的帖子组成的新的一批帖子。"""
+        return self.take([i for (i, keeps) in enumerate(mask) if keeps])
+
+    def take(self, indices: Iterable[int]) -> 'PostBatch':
+        """返回指定下标的帖子组成的新的一批帖子。"""
+        indices = list(indices)
+        batch = PostBatch()
+        for name in PostBatch.__slots__:
+            column = getattr(self, name)
+            values = [column[i] for i in indices]
+            if isinstance(column, array):
+                values = array(column.typecode, values)
+            setattr(batch, name, values)
+        return batch
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        以 NumPy 数组的形式返回各列，需要安装 NumPy。
+
+        ``created_at`` 为 ``datetime64[s]`` (UTC)，其余数值列不复制内存。
+        """
+
+        if numpy is None:
+            raise ImportError("需要安装 numpy")
+        return {
+            "ids": numpy.frombuffer(self.ids, dtype=numpy.int64),
+            "thread_ids": numpy.frombuffer(self.thread_ids, dtype=numpy.int64),
+            "created_at": numpy.frombuffer(self.created_at_timestamps, dtype=numpy.int64)
+            .astype("datetime64[s]"),
+            "user_ids": numpy.array(self.user_ids, dtype=object),
+            "sage_marks": numpy.frombuffer(self.sage_marks, dtype=numpy.int8).astype(bool),
+            "admin_marks": numpy.frombuffer(self.admin_marks, dtype=numpy.int8).astype(bool),
+        }
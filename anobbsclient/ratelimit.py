@@ -0,0 +1,176 @@
+from typing import Optional, Dict, Union, Literal
+from dataclasses import dataclass, field
+
+import time
+import asyncio
+import threading
+
+from .exceptions import DeadlineExceededException
+
+RequestKind = Union[
+    Literal["anonymous"],
+    Literal["logged_in"],
+    Literal["posting"],
+]
+"""
+限速时区分的请求种类。
+
+Cases
+-----
+"anonymous"
+    未登录的读取请求。
+
+"logged_in"
+    携带饼干的读取请求。
+
+"posting"
+    发表回应等发布请求。
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitStats:
+    """
+    某一种类的请求的限速统计信息。
+    """
+
+    requests: int
+    """经过限速器的请求数。"""
+    delayed_requests: int
+    """由于限速而需要等待的请求数。"""
+    wait_seconds: float
+    """所有请求排队等待的总秒数。"""
+    max_wait_seconds: float
+    """单个请求排队等待的最长秒数。"""
+
+
+@dataclass
+class TokenBucket:
+    """
+    令牌桶。
+
+    令牌以每秒 ``rate`` 个的速度补充，最多存有 ``burst`` 个。
+    每次请求预定一个令牌，令牌不足时算出需要等待的时间，
+    先预定的请求先获得令牌。线程安全。
+    """
+
+    rate: float
+    """每秒补充的令牌数，即长期来看每秒最多的请求数，必须为正数。"""
+
+    burst: float = 1
+    """最多存有的令牌数，即短时间内最多可以连续发出的请求数，至少为 ``1``。"""
+
+    _tokens: float = field(default=None, init=False, repr=False)
+    _updated_at: float = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self):
+        if not self.rate > 0:
+            raise ValueError(f"令牌桶的速度必须为正数，而不是 {self.rate}")
+        if not self.burst >= 1:
+            raise ValueError(f"令牌桶至少要能存有 1 个令牌，而不是 {self.burst}")
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+
+    def reserve(self, deadline: Optional[float] = None) -> float:
+        """
+        预定一个令牌，返回需要等待的秒数。
+
+        等待后会超过截止时刻（以 :func:`time.monotonic` 表示）时不预定，
+        并抛出 :exc:`DeadlineExceededException`。
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if deadline is not None and now + wait >= deadline:
+                raise DeadlineExceededException()
+            self._tokens -= 1
+            return wait
+
+
+@dataclass
+class RateLimiter:
+    """
+    客户端所有请求共用的限速器。
+
+    未登录的请求、携带饼干的请求及发布请求各自使用独立的令牌桶，
+    速度设为 ``None`` 的种类不限速，设为非正数时抛出 :exc:`ValueError`。线程安全，也可以在异步客户端中使用。
+    """
+
+    anonymous_rate: Optional[float] = None
+    """未登录的请求每秒最多的请求数。"""
+    anonymous_burst: float = 1
+    """未登录的请求短时间内最多可以连续发出的请求数。"""
+
+    logged_in_rate: Optional[float] = None
+    """携带饼干的请求每秒最多的请求数。"""
+    logged_in_burst: float = 1
+    """携带饼干的请求短时间内最多可以连续发出的请求数。"""
+
+    posting_rate: Optional[float] = None
+    """发布请求每秒最多的请求数。"""
+    posting_burst: float = 1
+    """发布请求短时间内最多可以连续发出的请求数。"""
+
+    _buckets: Dict[str, TokenBucket] = field(
+        default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+    _stats: Dict[str, Dict[str, float]] = field(
+        default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        for kind in ("anonymous", "logged_in", "posting"):
+            rate = getattr(self, f"{kind}_rate")
+            if rate is not None:
+                self._buckets[kind] = TokenBucket(
+                    rate=rate, burst=getattr(self, f"{kind}_burst"))
+            self._stats[kind] = {
+                "requests": 0, "delayed_requests": 0,
+                "wait_seconds": 0, "max_wait_seconds": 0,
+            }
+
+    def acquire(self, kind: RequestKind, deadline: Optional[float] = None):
+        """
+        在发出请求前调用，必要时阻塞等待。
+
+        Parameters
+        ----------
+        kind : RequestKind
+            请求的种类。
+        deadline : Optional[float]
+            以 :func:`time.monotonic` 表示的截止时刻。
+            等待后会超过截止时刻时抛出 :exc:`DeadlineExceededException`。
+        """
+
+        wait = self.__reserve(kind, deadline)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, kind: RequestKind, deadline: Optional[float] = None):
+        """:meth:`acquire` 的异步版本，等待时不阻塞事件循环。"""
+        wait = self.__reserve(kind, deadline)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self, kind: RequestKind) -> RateLimitStats:
+        """返回指定种类的请求的统计信息。"""
+        with self._lock:
+            return RateLimitStats(**self._stats[kind])
+
+    def __reserve(self, kind: RequestKind, deadline: Optional[float]) -> float:
+        bucket = self._buckets.get(kind, None)
+        wait = bucket.reserve(deadline) if bucket is not None else 0.0
+        with self._lock:
+            stats = self._stats[kind]
+            stats["requests"] += 1
+            if wait > 0:
+                stats["delayed_requests"] += 1
+            stats["wait_seconds"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+        return wait
@@ -1,14 +1,35 @@
-from typing import NamedTuple, Callable, Any, OrderedDict
+from typing import NamedTuple, Callable, Awaitable, Any, OrderedDict, Mapping, Iterable, Iterator, Optional, Union, Literal, Tuple
 
+import asyncio
+import time
 import logging
-import urllib3
 import json
-import io
+import zlib
 
 import requests
 import requests_toolbelt
+import urllib3
+
+try:
+    import aiohttp
+except ImportError:  # 未安装 aiohttp
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
 
-from .exceptions import ResourceNotExistsException
+from .exceptions import ResourceNotExistsException, DeadlineExceededException
+from .retry import RetryPolicy, RetryBudget, RetryReport, parse_retry_after
 
 
 class BandwidthUsage(NamedTuple):
@@ -21,9 +42,23 @@ class BandwidthUsage(NamedTuple):
     """下载字节数。"""
 
 
-def try_request(fn: Callable[[], Any], description: str, max_attempts: int) -> Any:
+def sum_bandwidth_usages(usages: Iterable[BandwidthUsage]) -> BandwidthUsage:
+    """合计多次操作产生的流量。"""
+    uploaded, downloaded = 0, 0
+    for usage in usages:
+        uploaded += usage.uploaded
+        downloaded += usage.downloaded
+    return BandwidthUsage(uploaded, downloaded)
+
+
+def try_request(fn: Callable[[], Any], description: str, policy: Union[int, RetryPolicy],
+                budget: Optional[RetryBudget] = None, deadline: Optional[float] = None,
+                on_retry: Optional[Callable[[int, Exception, float], None]] = None,
+                sleep: Callable[[float], None] = time.sleep) -> Any:
     """
-    尝试进行请求。
+    尝试进行请求，失败时按照重试策略重试。
+
+    连接问题、超时、响应内容不完整及 :attr:`RetryPolicy.retry_statuses` 中的状态码会触发重试。
 
     Parameters
     ----------
@@ -31,87 +66,525 @@ def try_request(fn: Callable[[], Any], description: str, max_attempts: int) -> A
         请求本身。
     description : str
         对于请求的可读描述。
-    max_attempts : int
-        最多可尝试的次数。
+    policy : Union[int, RetryPolicy]
+        重试策略。为整数时视为最多可尝试的次数，其余采用默认的重试策略。
+    budget : Optional[RetryBudget]
+        重试预算，同时用于统计重试情况。
+    deadline : Optional[float]
+        以 :func:`time.monotonic` 表示的截止时刻。
+        等待后会超过截止时刻时不再重试，抛出 :exc:`DeadlineExceededException`。
+    on_retry : Optional[Callable[[int, Exception, float], None]]
+        决定重试时，以失败的是第几次尝试、失败的异常及重试前要等待的秒数调用。
+    sleep : Callable[[float], None]
+        重试前用于等待的函数。
     """
 
-    for i in range(1, max_attempts + 1):
-        try:
-            return fn()
-        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-            # 对于连接、超时等可以重试的问题进行重试
-            msg = f'执行「{description}」失败：{e}。'
-            if i < max_attempts:
-                logging.warning(msg + f'将会重试。尝试次数：{i}/{max_attempts}')
-            else:
-                logging.error(msg + f'已经失败 {max_attempts} 次，超过最大尝试次数，放弃')
-                raise e
-        except Exception as e:
-            msg = f'执行「{description}」失败：{e}。将不重试，放弃'
-            if isinstance(e, requests.exceptions.HTTPError):
-                # pylint: disable=maybe-no-member
-                if e.response != None and e.response.status_code == 404:
-                    # 如果能够确认是 404，那就抛出 :class:`ResourceNotExistsException`
-                    e = ResourceNotExistsException()
-            elif isinstance(e, requests.exceptions.RequestException):
-                # pylint: disable=maybe-no-member
-                dump = requests_toolbelt.utils.dump.dump_all(e.response)
-                msg += "。dump：" + dump.decode('utf-8')
-            logging.error(msg)
-            raise e
-
-
-def get_json(session: requests.Session, url: str):
-    # TODO: 不要 hardcode timeout
-    with session.get(url, stream=True, timeout=20) as resp:
+    if isinstance(policy, int):
+        policy = RetryPolicy(max_attempts=policy)
+    report = RetryReport()
+    if budget is not None:
+        budget.on_request()
+
+    try:
+        for i in range(1, policy.max_attempts + 1):
+            remaining_time(deadline)
+            try:
+                return fn()
+            except Exception as e:
+                retry_after = None
+                if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                                  requests.exceptions.ChunkedEncodingError, TruncatedContentError)):
+                    retryable = True
+                elif isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+                    retryable = e.response.status_code in policy.retry_statuses
+                    retry_after = parse_retry_after(
+                        e.response.headers.get('Retry-After', None))
+                else:
+                    retryable = False
+
+                if not retryable:
+                    raise _non_retryable(e, description)
+
+                delay = _next_delay(e, description, policy, i,
+                                    retry_after, budget, report, deadline)
+                if delay is None:
+                    raise e
+                report.retries += 1
+                report.wait_seconds += delay
+                if on_retry is not None:
+                    on_retry(i, e, delay)
+                sleep(delay)
+    finally:
+        if report.retries > 0:
+            logging.debug(
+                f'「{description}」共重试 {report.retries} 次，等待 {report.wait_seconds:.3f} 秒')
+        if budget is not None:
+            budget.record(report)
+
+
+async def try_request_async(fn: Callable[[], Awaitable[Any]], description: str, policy: Union[int, RetryPolicy],
+                            budget: Optional[RetryBudget] = None, deadline: Optional[float] = None,
+                            on_retry: Optional[Callable[[int, Exception, float], None]] = None) -> Any:
+    """
+    尝试进行异步的请求，失败时按照重试策略重试。
+
+    见 :func:`try_request`，需要安装 ``aiohttp``。
+    """
+
+    if isinstance(policy, int):
+        policy = RetryPolicy(max_attempts=policy)
+    report = RetryReport()
+    if budget is not None:
+        budget.on_request()
+
+    try:
+        for i in range(1, policy.max_attempts + 1):
+            remaining_time(deadline)
+            try:
+                return await fn()
+            except Exception as e:
+                retry_after = None
+                if isinstance(e, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                                  asyncio.TimeoutError, TruncatedContentError)):
+                    retryable = True
+                elif isinstance(e, aiohttp.ClientResponseError):
+                    retryable = e.status in policy.retry_statuses
+                    if e.headers is not None:
+                        retry_after = parse_retry_after(
+                            e.headers.get('Retry-After', None))
+                else:
+                    retryable = False
+
+                if not retryable:
+                    raise _non_retryable(e, description)
+
+                delay = _next_delay(e, description, policy, i,
+                                    retry_after, budget, report, deadline)
+                if delay is None:
+                    raise e
+                report.retries += 1
+                report.wait_seconds += delay
+                if on_retry is not None:
+                    on_retry(i, e, delay)
+                await asyncio.sleep(delay)
+    finally:
+        if report.retries > 0:
+            logging.debug(
+                f'「{description}」共重试 {report.retries} 次，等待 {report.wait_seconds:.3f} 秒')
+        if budget is not None:
+            budget.record(report)
+
+
+def _next_delay(e: Exception, description: str, policy: RetryPolicy, attempt: int,
+                retry_after: Optional[float], budget: Optional[RetryBudget], report: RetryReport,
+                deadline: Optional[float] = None) -> Optional[float]:
+    """
+    决定失败后是否重试。
+
+    等待后会超过截止时刻时抛出 :exc:`DeadlineExceededException`。
+
+    Returns
+    -------
+    重试前要等待的秒数；不重试时返回 ``None``。
+    """
+
+    msg = f'执行「{description}」失败：{e!r}。'
+    if attempt >= policy.max_attempts:
+        logging.error(
+            msg + f'已经失败 {policy.max_attempts} 次，超过最大尝试次数，放弃')
+        return None
+    delay = policy.compute_delay(attempt, retry_after=retry_after)
+    if delay is None:
+        logging.error(msg + f'服务器要求 {retry_after} 秒后再重试，超过上限，放弃')
+        return None
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        logging.error(msg + '重试会超过截止时刻，放弃')
+        raise DeadlineExceededException() from e
+    if budget is not None and not budget.try_acquire():
+        report.budget_exhausted = True
+        logging.error(msg + '重试预算已耗尽，放弃')
+        return None
+    logging.warning(
+        msg + f'将会在 {delay:.3f} 秒后重试。尝试次数：{attempt}/{policy.max_attempts}')
+    return delay
+
+
+def _non_retryable(e: Exception, description: str) -> Exception:
+    """记录不可重试的异常，并返回要抛出的异常。"""
+    msg = f'执行「{description}」失败：{e}。将不重试，放弃'
+    if aiohttp is not None and isinstance(e, aiohttp.ClientResponseError):
+        if e.status == 404:
+            # 如果能够确认是 404，那就抛出 :class:`ResourceNotExistsException`
+            e = ResourceNotExistsException()
+    elif isinstance(e, requests.exceptions.HTTPError):
+        # pylint: disable=maybe-no-member
+        if e.response != None and e.response.status_code == 404:
+            # 如果能够确认是 404，那就抛出 :class:`ResourceNotExistsException`
+            e = ResourceNotExistsException()
+    elif isinstance(e, requests.exceptions.RequestException) and e.response is not None:
+        # pylint: disable=maybe-no-member
+        dump = requests_toolbelt.utils.dump.dump_all(e.response)
+        msg += "。dump：" + dump.decode('utf-8')
+    logging.error(msg)
+    return e
+
+
+JSONLoads = Callable[[bytes], Any]
+"""将 UTF-8 编码的 JSON 文本解析为 Python 对象的函数。"""
+
+JSONBackend = Union[
+    Literal["json"],
+    Literal["orjson"],
+]
+"""
+解析 JSON 所用的库。
+
+Cases
+-----
+"json"
+    标准库的 :mod:`json`。
+
+"orjson"
+    `orjson <https://github.com/ijl/orjson>`_，需要另行安装。
+    只能以普通的 ``dict`` 表示 JSON 对象。
+"""
+
+
+def make_json_loads(backend: Optional[JSONBackend] = None, uses_plain_dict: bool = False) -> JSONLoads:
+    """
+    创建用于解析 JSON 的函数。
+
+    Parameters
+    ----------
+    backend : Optional[JSONBackend]
+        解析 JSON 所用的库。
+        为 ``None`` 时，如果 ``uses_plain_dict`` 为真且安装了 orjson，则使用 orjson，
+        否则使用标准库。
+    uses_plain_dict : bool
+        是否以普通的 ``dict`` 而非 ``OrderedDict`` 表示 JSON 对象。
+    """
+
+    if backend is None:
+        backend = "orjson" if uses_plain_dict and orjson is not None else "json"
+
+    if backend == "orjson":
+        if orjson is None:
+            raise ValueError("未安装 orjson")
+        if not uses_plain_dict:
+            raise ValueError("orjson 只能以 dict 表示 JSON 对象")
+        return orjson.loads
+    elif backend == "json":
+        if uses_plain_dict:
+            return json.loads
+        return _loads_with_ordered_dict
+
+    raise ValueError(f"未知的 JSON 库：{backend}")
+
+
+def _loads_with_ordered_dict(content: bytes) -> Any:
+    return json.loads(content, object_pairs_hook=OrderedDict)
+
+
+STREAM_CHUNK_SIZE = 64 * 1024
+"""流式读取响应内容时每次读取的字节数。"""
+
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+"""请求时的 ``Accept-Encoding``，只包含 :class:`ContentDecoder` 能够解压的编码。"""
+
+
+def remaining_time(deadline: Optional[float]) -> Optional[float]:
+    """
+    返回距截止时刻剩余的秒数，没有截止时刻时返回 ``None``。
+
+    已超过截止时刻时抛出 :exc:`DeadlineExceededException`。
+    """
+
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededException()
+    return remaining
+
+
+def get_json(session: requests.Session, url: str, loads: JSONLoads = None):
+    """
+    请求并解析 JSON 格式的响应。
+
+    Parameters
+    ----------
+    session : requests.Session
+        会话。
+    url : str
+        请求的 URL。
+    loads : JSONLoads
+        用于解析 JSON 的函数，默认见 :func:`make_json_loads`。
+    """
+
+    if loads is None:
+        loads = make_json_loads()
+    (content, bandwidth_usage, _) = get_content(session, url)
+    return loads(content), bandwidth_usage
+
+
+class FetchedContent(NamedTuple):
+    """:func:`get_content` 的结果。"""
+
+    content: bytes
+    """经过解压的响应内容。"""
+    bandwidth_usage: BandwidthUsage
+    """请求产生的流量。"""
+    raw_length: int
+    """响应内容解压前的字节数。"""
+    decompress_seconds: float = 0
+    """解压响应内容所用的秒数。"""
+
+
+def get_content(session: requests.Session, url: str,
+                timeout: Tuple[float, float] = (20, 20), deadline: Optional[float] = None,
+                ) -> FetchedContent:
+    """
+    请求并返回经过解压的响应内容。
+
+    响应内容会在接收的同时被解压，而不会先完整读入未经解压的内容。
+
+    Parameters
+    ----------
+    session : requests.Session
+        会话。
+    url : str
+        请求的 URL。
+    timeout : Tuple[float, float]
+        建立连接及等待数据的超时秒数。
+    deadline : Optional[float]
+        以 :func:`time.monotonic` 表示的截止时刻。
+        超时秒数不会超过距截止时刻剩余的时间，接收期间超过截止时刻会抛出 :exc:`DeadlineExceededException`。
+    """
+
+    remaining = remaining_time(deadline)
+    if remaining is not None:
+        timeout = tuple(min(t, remaining) for t in timeout)
+
+    with session.get(url, stream=True, timeout=timeout) as resp:
         resp.raise_for_status()
-        raw_content = resp.raw.read()
+        decoder = ContentDecoder(resp.headers.get('content-encoding', ''))
+        for chunk in iter_raw_content(resp, deadline):
+            decoder.feed(chunk)
+        content = decoder.finish()
 
-    bandwidth_usage = BandwidthUsage(
-        __calculate_request_size(resp),
-        __calculate_response_size(resp, raw_content),
+    bandwidth_usage = calculate_bandwidth_usage(
+        method=resp.request.method, path_url=resp.request.path_url,
+        request_headers=resp.request.headers,
+        reason=resp.reason, response_headers=resp.headers,
+        raw_content_length=decoder.raw_length,
     )
 
-    headers = {
-        'Content-Encoding': resp.headers.get('content-encoding', '')
-    }
+    return FetchedContent(content, bandwidth_usage, decoder.raw_length,
+                          decoder.decompress_seconds)
 
-    with io.BytesIO(raw_content) as f:
-        fake_resp = urllib3.response.HTTPResponse(
-            body=f,
-            headers=headers,
-        )
-        decoded_content = fake_resp.data
-        obj = json.loads(decoded_content, object_pairs_hook=OrderedDict)
 
-    return obj, bandwidth_usage
+def iter_raw_content(resp: requests.Response, deadline: Optional[float] = None) -> Iterator[bytes]:
+    """
+    逐块产出未经解压的响应内容，每块之后检查是否超过截止时刻。
+
+    直接读取 ``resp.raw`` 时 urllib3 的异常不会被 requests 转换，
+    这里按照 :meth:`requests.Response.iter_content` 的方式转换，以便重试时识别。
+    """
+
+    try:
+        for chunk in resp.raw.stream(STREAM_CHUNK_SIZE, decode_content=False):
+            yield chunk
+            remaining_time(deadline)
+    except urllib3.exceptions.ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
 
 
-def __calculate_request_size(resp: requests.Response) -> BandwidthUsage:
+def decode_json(raw_content: bytes, content_encoding: str, loads: JSONLoads = None) -> Any:
     """
-    …
+    解压并解析未经解码的响应内容。
 
-    See: https://stackoverflow.com/a/33217154
+    Parameters
+    ----------
+    raw_content : bytes
+        未经解码的响应内容。
+    content_encoding : str
+        响应的 ``Content-Encoding``。
+    loads : JSONLoads
+        用于解析 JSON 的函数，默认见 :func:`make_json_loads`。
     """
 
-    request_line_size = len(resp.request.method) + \
-        len(resp.request.path_url) + 12
-    request_size = request_line_size + \
-        __calculate_header_size(resp.request.headers) + \
-        int(resp.request.headers.get("content-length", 0)
-            )  # 没有 body 就不会生成 Content-Length?
+    if loads is None:
+        loads = make_json_loads()
+    decoder = ContentDecoder(content_encoding)
+    decoder.feed(raw_content)
+    return loads(decoder.finish())
+
+
+class TruncatedContentError(ValueError):
+    """
+    压缩的响应内容在压缩流结束前就已结束时会抛出的异常。
 
-    return request_size
+    通常是由于连接在传输中途被关闭，会被视为可以重试的失败。
+    """
+    pass
+
+
+class ContentDecoder:
+    """
+    依照 ``Content-Encoding`` 逐块解压响应内容。
 
+    支持 ``gzip``、``deflate`` 及（安装了 brotli 时的）``br``。
+    """
+
+    def __init__(self, content_encoding: str):
+        self.raw_length = 0
+        """已输入的未经解压的字节数。"""
 
-def __calculate_response_size(resp: requests.Response, raw_content):
+        self.decompress_seconds = 0.0
+        """解压所用的秒数。"""
+
+        self._decoders = []
+        # 多重编码时，最后应用的编码要最先解开
+        for encoding in reversed(content_encoding.lower().split(',')):
+            encoding = encoding.strip()
+            if encoding in ('', 'identity'):
+                continue
+            elif encoding in ('gzip', 'x-gzip'):
+                self._decoders.append(_ZlibDecoder(16 + zlib.MAX_WBITS))
+            elif encoding == 'deflate':
+                self._decoders.append(_DeflateDecoder())
+            elif encoding == 'br' and brotli is not None:
+                self._decoders.append(_BrotliDecoder())
+            else:
+                raise ValueError(f"不支持的 Content-Encoding：{encoding}")
+
+        self._chunks = []
+
+    def feed(self, chunk: bytes):
+        """输入一块未经解压的内容。"""
+        self.raw_length += len(chunk)
+        if len(self._decoders) != 0:
+            started_at = time.perf_counter()
+            for decoder in self._decoders:
+                chunk = decoder.decompress(chunk)
+            self.decompress_seconds += time.perf_counter() - started_at
+        if chunk:
+            self._chunks.append(chunk)
+
+    def finish(self) -> bytes:
+        """
+        结束输入，返回解压后的完整内容。
+
+        压缩的内容不完整时抛出 :exc:`TruncatedContentError`。
+        """
+        tail = b''
+        started_at = time.perf_counter()
+        for decoder in self._decoders:
+            tail = decoder.decompress(tail) + decoder.flush()
+        self.decompress_seconds += time.perf_counter() - started_at
+        if tail:
+            self._chunks.append(tail)
+        if len(self._chunks) == 1:
+            return self._chunks[0]
+        return b''.join(self._chunks)
+
+
+class _ZlibDecoder:
+
+    def __init__(self, wbits: int):
+        self._obj = zlib.decompressobj(wbits)
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        tail = self._obj.flush()
+        if not self._obj.eof:
+            raise TruncatedContentError("压缩的响应内容不完整")
+        return tail
+
+
+class _DeflateDecoder:
+    """
+    ``deflate`` 本应是 zlib 格式，但有的服务器会直接发送裸 deflate 数据，
+    因此在 zlib 格式解压失败时改为按裸 deflate 解压。
+    """
+
+    def __init__(self):
+        self._obj = zlib.decompressobj()
+        self._first_try = True
+        self._data = b''
+
+    def decompress(self, data: bytes) -> bytes:
+        if not self._first_try:
+            return self._obj.decompress(data)
+
+        self._data += data
+        try:
+            decompressed = self._obj.decompress(data)
+            if decompressed:
+                self._first_try = False
+                self._data = b''
+            return decompressed
+        except zlib.error:
+            self._first_try = False
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            try:
+                return self.decompress(self._data)
+            finally:
+                self._data = b''
+
+    def flush(self) -> bytes:
+        tail = self._obj.flush()
+        if not self._obj.eof:
+            raise TruncatedContentError("压缩的响应内容不完整")
+        return tail
+
+
+class _BrotliDecoder:
+
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+        # brotli 与 brotlicffi 的方法名不同
+        self._decompress = getattr(self._obj, 'process', None) \
+            or self._obj.decompress
+
+    def decompress(self, data: bytes) -> bytes:
+        if not data:
+            return b''
+        return self._decompress(data)
+
+    def flush(self) -> bytes:
+        # 旧版本的 brotli 没有 is_finished，无法检查
+        is_finished = getattr(self._obj, 'is_finished', None)
+        if is_finished is not None and not is_finished():
+            raise TruncatedContentError("压缩的响应内容不完整")
+        return b''
+
+
+def calculate_bandwidth_usage(method: str, path_url: str, request_headers: Mapping[str, str],
+                              reason: str, response_headers: Mapping[str, str],
+                              raw_content_length: int) -> BandwidthUsage:
+    """
+    估算一次请求产生的流量。
+
+    See: https://stackoverflow.com/a/33217154
+    """
+
+    request_line_size = len(method) + len(path_url) + 12
+    request_size = request_line_size + \
+        __calculate_header_size(request_headers) + \
+        int(request_headers.get("content-length", 0)
+            )  # 没有 body 就不会生成 Content-Length?
 
-    response_line_size = len(resp.reason) + 15
+    response_line_size = len(reason or "") + 15
     response_size = response_line_size + \
-        __calculate_header_size(resp.headers) + \
-        len(raw_content)
+        __calculate_header_size(response_headers) + \
+        raw_content_length
 
-    return response_size
+    return BandwidthUsage(request_size, response_size)
 
 
 def __calculate_header_size(headers) -> int:
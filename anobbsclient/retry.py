@@ -0,0 +1,198 @@
+from typing import Optional, FrozenSet, Dict
+from dataclasses import dataclass, field
+
+import random
+import threading
+import email.utils
+from datetime import datetime, timezone
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    请求失败后的重试策略。
+
+    第 n 次重试前等待的秒数在 0 与 ``min(max_delay, base_delay * multiplier ** (n-1))`` 之间均匀随机选取
+    （即「full jitter」），避免大量客户端在同一时刻一齐重试。
+    """
+
+    max_attempts: int = 5
+    """最多尝试的次数，包括第一次请求，至少为 ``1``。"""
+
+    base_delay: float = 0.5
+    """第一次重试前等待时间的上限（秒）。"""
+
+    multiplier: float = 2
+    """每次重试后等待时间上限的增长倍数。"""
+
+    max_delay: float = 30
+    """等待时间上限的最大值（秒）。"""
+
+    jitter: bool = True
+    """是否随机化等待时间。为假时总是等待上限的时间。"""
+
+    retry_statuses: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+    """响应这些状态码时进行重试。"""
+
+    respects_retry_after: bool = True
+    """是否遵守响应中的 ``Retry-After``，即至少等待其指定的时间。"""
+
+    max_retry_after: float = 120
+    """``Retry-After`` 超过此秒数时不再重试。"""
+
+    def __post_init__(self):
+        if self.max_attempts < 1:
+            raise ValueError(
+                f"最多尝试的次数至少为 1，而不是 {self.max_attempts}")
+
+    def compute_delay(self, retry: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        计算第 ``retry`` 次重试（从1开始）前要等待的秒数。
+
+        Parameters
+        ----------
+        retry : int
+            第几次重试。
+        retry_after : Optional[float]
+            响应中 ``Retry-After`` 指定的秒数。
+
+        Returns
+        -------
+        要等待的秒数；``Retry-After`` 太长而应放弃时返回 ``None``。
+        """
+
+        cap = min(self.max_delay, self.base_delay *
+                  self.multiplier ** (retry - 1))
+        delay = random.uniform(0, cap) if self.jitter else cap
+        if retry_after is not None and self.respects_retry_after:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 ``Retry-After`` 的值，支持秒数及 HTTP 日期两种格式。
+
+    无法解析时返回 ``None``。
+    """
+
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (dt - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RetryReport:
+    """
+    单次请求（包括其各次重试）的重试情况。
+    """
+
+    retries: int = 0
+    """重试的次数。"""
+
+    wait_seconds: float = 0
+    """重试前等待的总秒数。"""
+
+    budget_exhausted: bool = False
+    """是否由于重试预算耗尽而放弃了重试。"""
+
+
+@dataclass(frozen=True)
+class RetryStats:
+    """
+    重试的统计信息。
+    """
+
+    requests: int
+    """请求数，同一请求的多次重试只计一次。"""
+    retries: int
+    """重试的总次数。"""
+    retried_requests: int
+    """进行过重试的请求数。"""
+    budget_exhausted: int
+    """由于重试预算耗尽而放弃重试的次数。"""
+    wait_seconds: float
+    """重试前等待的总秒数。"""
+    retries_histogram: Dict[int, int]
+    """各重试次数对应的请求数。"""
+
+
+@dataclass
+class RetryBudget:
+    """
+    客户端的重试预算，限制重试占请求总数的比例，防止服务器出现问题时重试进一步加重其负担。
+
+    每次请求往预算中存入 ``ratio`` 个令牌，每次重试取出一个，令牌不足时放弃重试。
+    预算最多存有 ``max_tokens`` 个令牌，起初是满的。
+
+    同时负责统计重试的情况，见 :meth:`stats`。线程安全。
+    """
+
+    ratio: float = 0.2
+    """每次请求存入的令牌数，即长期来看重试数最多占请求数的比例。"""
+
+    max_tokens: float = 10
+    """最多存有的令牌数，即短时间内最多可以连续重试的次数。"""
+
+    _tokens: float = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    _requests: int = field(default=0, init=False, repr=False)
+    _retries: int = field(default=0, init=False, repr=False)
+    _retried_requests: int = field(default=0, init=False, repr=False)
+    _budget_exhausted: int = field(default=0, init=False, repr=False)
+    _wait_seconds: float = field(default=0, init=False, repr=False)
+    _retries_histogram: Dict[int, int] = field(
+        default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self._tokens = self.max_tokens
+
+    def on_request(self):
+        """记录一次新的请求。"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """尝试为一次重试取出令牌，返回是否允许重试。"""
+        with self._lock:
+            if self._tokens < 1:
+                self._budget_exhausted += 1
+                return False
+            self._tokens -= 1
+            return True
+
+    def record(self, report: RetryReport):
+        """记录一次请求（包括其各次重试）结束后的重试情况。"""
+        with self._lock:
+            self._requests += 1
+            self._retries += report.retries
+            if report.retries > 0:
+                self._retried_requests += 1
+            self._wait_seconds += report.wait_seconds
+            self._retries_histogram[report.retries] = \
+                self._retries_histogram.get(report.retries, 0) + 1
+
+    def stats(self) -> RetryStats:
+        """返回当前的统计信息。"""
+        with self._lock:
+            return RetryStats(
+                requests=self._requests,
+                retries=self._retries,
+                retried_requests=self._retried_requests,
+                budget_exhausted=self._budget_exhausted,
+                wait_seconds=self._wait_seconds,
+                retries_histogram=dict(self._retries_histogram),
+            )
@@ -0,0 +1,191 @@
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+from dataclasses import dataclass, field
+
+import time
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+@dataclass(frozen=True)
+class SessionPoolStats:
+    """
+    会话池的统计信息。
+    """
+
+    sessions_created: int
+    """新建会话的次数。"""
+    sessions_reused: int
+    """复用闲置会话的次数。"""
+    sessions_evicted: int
+    """由于闲置过久或池已满而被关闭的会话数。"""
+
+    connections_created: int
+    """底层新建 TCP（及 TLS）连接的次数。"""
+    requests_sent: int
+    """通过池中会话发出的请求数。"""
+
+    @property
+    def connections_reused(self) -> int:
+        """复用已有连接发出的请求数。"""
+        return self.requests_sent - self.connections_created
+
+
+@dataclass
+class SessionPool:
+    """
+    按登录状态分组复用 :class:`requests.Session` 的会话池。
+
+    同一分组内的会话可以直接复用，从而复用其底层的 keep-alive 连接，
+    省去每次请求都要重新进行的 TCP 及 TLS 握手。
+    """
+
+    max_idle_sessions_per_key: int = 4
+    """每个分组最多保留的闲置会话数，超出的会话在归还时直接关闭。"""
+
+    connections_per_host: int = 10
+    """每个会话对同一主机最多保持的连接数。"""
+
+    keep_alive: bool = True
+    """是否保持连接。为假时每次请求后都会关闭连接。"""
+
+    idle_timeout: float = 60
+    """闲置会话最多保留的秒数，超过后会在下次取用会话时被关闭。"""
+
+    _idle: Dict[Hashable, deque] = field(
+        default_factory=dict, init=False, repr=False)
+    _live: List[requests.Session] = field(
+        default_factory=list, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    _sessions_created: int = field(default=0, init=False, repr=False)
+    _sessions_reused: int = field(default=0, init=False, repr=False)
+    _sessions_evicted: int = field(default=0, init=False, repr=False)
+    _closed_connections_created: int = field(
+        default=0, init=False, repr=False)
+    _closed_requests_sent: int = field(default=0, init=False, repr=False)
+
+    def acquire(self, key: Hashable, factory: Callable[[], requests.Session]) -> requests.Session:
+        """
+        取出一个属于指定分组的会话。
+
+        如果该分组有闲置的会话则复用之，否则调用 ``factory`` 新建一个。
+
+        Parameters
+        ----------
+        key : Hashable
+            分组的键。
+        factory : Callable[[], requests.Session]
+            用于新建会话的函数。
+
+        Returns
+        -------
+        取出的会话。用完后应通过 :meth:`release` 归还。
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            self.__evict_expired(now)
+            idle = self._idle.get(key, None)
+            if idle:
+                (_, session) = idle.pop()
+                self._sessions_reused += 1
+                return session
+
+        session = factory()
+        self.__configure(session)
+        with self._lock:
+            self._live.append(session)
+            self._sessions_created += 1
+        return session
+
+    def release(self, key: Hashable, session: requests.Session):
+        """
+        归还通过 :meth:`acquire` 取出的会话。
+
+        Parameters
+        ----------
+        key : Hashable
+            取出会话时使用的分组的键。
+        session : requests.Session
+            要归还的会话。
+        """
+
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if self.keep_alive and len(idle) < self.max_idle_sessions_per_key:
+                idle.append((time.monotonic(), session))
+                return
+            self.__close(session)
+            self._sessions_evicted += 1
+
+    def clear(self):
+        """关闭所有闲置的会话。"""
+        with self._lock:
+            for idle in self._idle.values():
+                for (_, session) in idle:
+                    self.__close(session)
+            self._idle.clear()
+
+    def stats(self) -> SessionPoolStats:
+        """返回当前的统计信息。"""
+        with self._lock:
+            connections_created = self._closed_connections_created
+            requests_sent = self._closed_requests_sent
+            for session in self._live:
+                (c, r) = _count_connections(session)
+                connections_created += c
+                requests_sent += r
+            return SessionPoolStats(
+                sessions_created=self._sessions_created,
+                sessions_reused=self._sessions_reused,
+                sessions_evicted=self._sessions_evicted,
+                connections_created=connections_created,
+                requests_sent=requests_sent,
+            )
+
+    def __configure(self, session: requests.Session):
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.connections_per_host,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+
+    def __evict_expired(self, now: float):
+        for idle in self._idle.values():
+            # 越靠左的会话闲置得越久
+            while idle and now - idle[0][0] > self.idle_timeout:
+                (_, session) = idle.popleft()
+                self.__close(session)
+                self._sessions_evicted += 1
+
+    def __close(self, session: requests.Session):
+        (c, r) = _count_connections(session)
+        self._closed_connections_created += c
+        self._closed_requests_sent += r
+        self._live.remove(session)
+        session.close()
+
+
+def _count_connections(session: requests.Session) -> Tuple[int, int]:
+    """
+    统计会话底层各连接池新建的连接数及发出的请求数。
+    """
+
+    connections_created, requests_sent = 0, 0
+    for adapter in set(session.adapters.values()):
+        poolmanager = getattr(adapter, "poolmanager", None)
+        if poolmanager is None:
+            continue
+        for key in list(poolmanager.pools.keys()):
+            pool: Any = poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            connections_created += pool.num_connections
+            requests_sent += pool.num_requests
+    return connections_created, requests_sent
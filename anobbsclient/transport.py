@@ -0,0 +1,253 @@
+from typing import Optional, Dict, List, Tuple, Hashable, Callable, ContextManager, NamedTuple
+from dataclasses import dataclass, field
+
+import abc
+import json
+import time
+import threading
+import urllib.parse
+
+import requests
+
+from .requestutils import BandwidthUsage, FetchedContent, ContentDecoder, \
+    get_content, iter_raw_content, calculate_bandwidth_usage, remaining_time
+from .exceptions import ReplayMissException
+
+
+class TransportRequest(NamedTuple):
+    """客户端交给传输层的一次 GET 请求。"""
+
+    url: str
+    """请求的完整 URL。"""
+    logged_in: bool
+    """请求是否携带饼干。"""
+    open_session: Callable[[], ContextManager[requests.Session]]
+    """从客户端的会话池中取出符合请求设置的会话，不需要实际发出请求的传输层不必调用。"""
+    timeout: Tuple[float, float]
+    """建立连接及等待数据的超时秒数。"""
+    deadline: Optional[float]
+    """以 :func:`time.monotonic` 表示的截止时刻。"""
+
+
+class Transport(abc.ABC):
+    """
+    客户端发出 GET 请求所用的传输层，见 :attr:`BaseClient.transport`。
+
+    传输层负责取得并解压响应内容，请求失败时应抛出与 ``requests`` 相同的异常，
+    以便客户端进行重试等处理。
+    """
+
+    @abc.abstractmethod
+    def get_content(self, request: TransportRequest) -> FetchedContent:
+        raise NotImplementedError()
+
+
+class HTTPTransport(Transport):
+    """默认的传输层，通过会话池中的会话实际发出请求。"""
+
+    def get_content(self, request: TransportRequest) -> FetchedContent:
+        with request.open_session() as session:
+            return get_content(session, request.url,
+                               timeout=request.timeout, deadline=request.deadline)
+
+
+@dataclass(frozen=True)
+class RecordedResponse:
+    """存档中的一条响应。"""
+
+    path: str
+    """请求的路径。"""
+    queries: Tuple[Tuple[str, str], ...]
+    """除时间戳外按名称排列的请求参数。"""
+    logged_in: bool
+    """请求是否携带饼干。"""
+    status_code: int
+    """响应的状态码。"""
+    reason: str
+    """响应的状态描述。"""
+    headers: Dict[str, str]
+    """响应头。"""
+    bandwidth_usage: BandwidthUsage
+    """录制时请求产生的流量。"""
+    recorded_at: float
+    """录制时的 Unix 时间戳。"""
+    body: bytes
+    """未经解压的响应体。"""
+
+    @property
+    def key(self) -> Hashable:
+        """回放时用于匹配请求的键。"""
+        return (self.path, self.queries, self.logged_in)
+
+    def to_fetched_content(self) -> FetchedContent:
+        """
+        解压响应体，得到与实际请求相同的结果。
+
+        状态码表示失败时，抛出相应的 :exc:`requests.exceptions.HTTPError`。
+        """
+
+        if self.status_code >= 400:
+            resp = requests.Response()
+            resp.status_code = self.status_code
+            resp.reason = self.reason
+            resp.headers.update(self.headers)
+            resp._content = self.body
+            resp.raise_for_status()
+
+        decoder = ContentDecoder(self.headers.get("Content-Encoding", ""))
+        decoder.feed(self.body)
+        content = decoder.finish()
+        return FetchedContent(content, self.bandwidth_usage, len(self.body),
+                              decoder.decompress_seconds)
+
+
+def request_key(url: str, logged_in: bool) -> Hashable:
+    """返回请求在存档中的键，忽略主机及每次请求都不同的时间戳参数。"""
+    (path, queries) = _split_url(url)
+    return (path, queries, logged_in)
+
+
+def _split_url(url: str) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    parts = urllib.parse.urlsplit(url)
+    queries = tuple(sorted((k, v) for (k, v) in urllib.parse.parse_qsl(parts.query)
+                           if k != "__t"))
+    return parts.path, queries
+
+
+_SESSION_HEADERS = frozenset({"set-cookie", "set-cookie2", "cookie"})
+"""不写入存档的头（小写）。"""
+
+
+@dataclass
+class ResponseArchive:
+    """
+    录制的响应的存档文件。
+
+    每条响应以一行 JSON 记录元信息，紧接着是未经解压的响应体，依次追加在同一个文件中。
+    不记录请求头，响应头中的 ``Set-Cookie`` 等与会话有关的头也会在写入前去掉，
+    因此饼干不会被写入存档，存档可以放心分享。线程安全。
+    """
+
+    path: str
+    """存档文件的路径。"""
+
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def append(self, response: RecordedResponse):
+        """在存档末尾追加一条响应。"""
+        meta = {
+            "path": response.path,
+            "queries": response.queries,
+            "logged_in": response.logged_in,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": {key: value for (key, value) in response.headers.items()
+                        if key.lower() not in _SESSION_HEADERS},
+            "bandwidth_usage": response.bandwidth_usage,
+            "recorded_at": response.recorded_at,
+            "body_length": len(response.body),
+        }
+        data = json.dumps(meta, ensure_ascii=False).encode("utf-8") \
+            + b"\n" + response.body
+        with self._lock, open(self.path, "ab") as f:
+            f.write(data)
+
+    def load(self) -> List[RecordedResponse]:
+        """按录制的顺序读出存档中的所有响应。"""
+        responses = []
+        with self._lock, open(self.path, "rb") as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                meta = json.loads(line)
+                body = f.read(meta.pop("body_length"))
+                responses.append(RecordedResponse(
+                    path=meta["path"],
+                    queries=tuple(tuple(q) for q in meta["queries"]),
+                    logged_in=meta["logged_in"],
+                    status_code=meta["status_code"],
+                    reason=meta["reason"],
+                    headers=meta["headers"],
+                    bandwidth_usage=BandwidthUsage(*meta["bandwidth_usage"]),
+                    recorded_at=meta["recorded_at"],
+                    body=body,
+                ))
+        return responses
+
+
+@dataclass
+class RecordingTransport(Transport):
+    """
+    实际发出请求，同时将未经解压的响应录制到存档中的传输层。
+
+    失败的响应（如 404、502）也会被录制，连接错误等没有响应的失败则不会。
+    """
+
+    archive: ResponseArchive
+    """录制到的存档。"""
+
+    def get_content(self, request: TransportRequest) -> FetchedContent:
+        remaining = remaining_time(request.deadline)
+        timeout = request.timeout
+        if remaining is not None:
+            timeout = tuple(min(t, remaining) for t in timeout)
+
+        with request.open_session() as session, \
+                session.get(request.url, stream=True, timeout=timeout) as resp:
+            body = b"".join(iter_raw_content(resp, request.deadline))
+
+        (path, queries) = _split_url(request.url)
+        recorded = RecordedResponse(
+            path=path, queries=queries, logged_in=request.logged_in,
+            status_code=resp.status_code, reason=resp.reason,
+            headers=dict(resp.headers),
+            bandwidth_usage=calculate_bandwidth_usage(
+                method=resp.request.method, path_url=resp.request.path_url,
+                request_headers=resp.request.headers,
+                reason=resp.reason, response_headers=resp.headers,
+                raw_content_length=len(body),
+            ),
+            recorded_at=time.time(),
+            body=body,
+        )
+        self.archive.append(recorded)
+        return recorded.to_fetched_content()
+
+
+@dataclass
+class ReplayTransport(Transport):
+    """
+    不发出请求，而是从存档中回放录制的响应的传输层。
+
+    请求按路径、参数（不含时间戳）及是否携带饼干匹配响应，与主机无关。
+    同一请求录制了多条响应时按录制的顺序依次回放，用完后重复最后一条。
+    存档中没有对应的响应时抛出 :exc:`ReplayMissException`。
+    """
+
+    archive: ResponseArchive
+    """回放的存档。"""
+
+    _responses: Dict[Hashable, List[RecordedResponse]] = field(
+        default=None, init=False, repr=False)
+    _served: Dict[Hashable, int] = field(
+        default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self):
+        self._responses = {}
+        for response in self.archive.load():
+            self._responses.setdefault(response.key, []).append(response)
+
+    def get_content(self, request: TransportRequest) -> FetchedContent:
+        remaining_time(request.deadline)
+        key = request_key(request.url, request.logged_in)
+        with self._lock:
+            responses = self._responses.get(key, None)
+            if responses is None:
+                raise ReplayMissException(request.url)
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        return responses[min(served, len(responses) - 1)].to_fetched_content()
@@ -1,9 +1,236 @@
-from typing import Tuple
+from typing import Tuple, Optional, Iterable, Sequence, Dict, Any
 
+import re
 import time
+from array import array
+from datetime import datetime
+from functools import lru_cache
 
 import requests
+from dateutil import tz
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def current_timestamp_ms_offset_to_utc8() -> int:
     return int((time.time() + 60*60*8)*1000)
+
+
+datetime_re = re.compile(r"^(.*?)\(.\)(.*?)$")
+local_tz = tz.gettz("Asia/Shanghai")
+
+_now_text_length = len("2021-03-07(日)12:34:56")
+
+
+def ensure_aware_datetime(dt: datetime, name: str) -> datetime:
+    """
+    确保 ``dt`` 带有时区后原样返回。
+
+    不带时区的 :class:`datetime` 的 ``timestamp()`` 会被当作本地时间，
+    与发布时间比较时容易出错，因此直接拒绝。
+
+    Raises
+    ------
+    TypeError
+        ``dt`` 不带时区时抛出。
+    """
+
+    if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
+        raise TypeError(f"{name} 需要带有时区")
+    return dt
+
+
+def parse_now_text(text: str) -> int:
+    """
+    将 A 岛格式的发布时间（如 ``2021-03-07(日)12:34:56``，即帖子的 ``now`` 字段）
+    转换为 Unix 时间戳（秒）。
+
+    对于标准格式的文本，只需切片及查表，不需要正则表达式及 ``strptime``；
+    其他格式的文本会退回到基于正则表达式的解析。
+
+    Raises
+    ------
+    ValueError
+        无法解析时抛出。
+    """
+
+    ts = _parse_now_text_fast(text)
+    if ts is None:
+        ts = _parse_now_text_slow(text)
+    return ts
+
+
+def parse_now_text_as_datetime(text: str) -> datetime:
+    """
+    将 A 岛格式的发布时间转换为带有上海时区的 :class:`datetime`，见 :func:`parse_now_text`。
+
+    Raises
+    ------
+    ValueError
+        无法解析时抛出。
+    """
+
+    parts = _split_now_text(text)
+    if parts is None:
+        return _parse_now_text_slow_as_datetime(text)
+    ((_, year, month, day), hour, minute, second) = parts
+    return datetime(year, month, day, hour, minute, second, tzinfo=local_tz)
+
+
+def parse_now_texts(texts: Iterable[str], invalid: Optional[int] = None) -> array:
+    """
+    一次性将一批发布时间的文本转换为 Unix 时间戳（秒），见 :func:`parse_now_text`。
+
+    Parameters
+    ----------
+    texts : Iterable[str]
+        发布时间的文本。
+    invalid : Optional[int]
+        无法解析的文本对应的值。为 ``None`` 时遇到无法解析的文本会抛出 :exc:`ValueError`。
+
+    Returns
+    -------
+    ``array('q')``。
+    """
+
+    result = array('q')
+    for text in texts:
+        ts = _parse_now_text_fast(text)
+        if ts is None:
+            try:
+                ts = _parse_now_text_slow(text)
+            except ValueError:
+                if invalid is None:
+                    raise
+                ts = invalid
+        result.append(ts)
+    return result
+
+
+def parse_now_texts_as_datetime64(texts: Sequence[str]) -> Any:
+    """
+    以 NumPy 向量化地将一批发布时间的文本转换为 ``datetime64[s]`` (UTC) 数组，需要安装 NumPy。
+
+    标准格式的文本按固定的 UTC+8 一并计算；
+    其余的文本逐个以 :func:`parse_now_text` 解析，仍无法解析的对应 ``NaT``。
+    """
+
+    if numpy is None:
+        raise ImportError("需要安装 numpy")
+
+    texts = list(texts)
+    n = len(texts)
+    lengths = numpy.fromiter(map(len, texts), dtype=numpy.int64, count=n)
+    codes = numpy.array(texts, dtype=f"U{_now_text_length}") \
+        .view(numpy.uint32).reshape(n, _now_text_length).astype(numpy.int64)
+
+    valid = lengths == _now_text_length
+    for (i, c) in [(4, '-'), (7, '-'), (10, '('), (12, ')'), (15, ':'), (18, ':')]:
+        valid &= codes[:, i] == ord(c)
+    digits = codes - ord('0')
+    for i in [0, 1, 2, 3, 5, 6, 8, 9, 13, 14, 16, 17, 19, 20]:
+        valid &= (digits[:, i] >= 0) & (digits[:, i] <= 9)
+
+    def number(*positions: int):
+        value = numpy.zeros(n, dtype=numpy.int64)
+        for i in positions:
+            value = value * 10 + digits[:, i]
+        return value
+
+    (year, month, day) = (number(0, 1, 2, 3), number(5, 6), number(8, 9))
+    (hour, minute, second) = (number(13, 14), number(16, 17), number(19, 20))
+    # 1991 年及以前的上海时间存在夏令时，交给逐个解析处理
+    valid &= (year >= 1992) & (month >= 1) & (month <= 12) & (day >= 1) \
+        & (hour < 24) & (minute < 60) & (second < 60)
+
+    days = _days_from_civil(year, numpy.clip(month, 1, 12), day)
+    next_month_days = _days_from_civil(
+        year + (month >= 12), numpy.clip(month, 1, 12) % 12 + 1, 1)
+    valid &= days < next_month_days
+
+    timestamps = days * 86400 + hour * 3600 + minute * 60 + second - 8 * 60 * 60
+    nat = numpy.iinfo(numpy.int64).min
+    for i in numpy.flatnonzero(~valid):
+        try:
+            timestamps[i] = parse_now_text(texts[i])
+        except ValueError:
+            timestamps[i] = nat
+    return timestamps.astype("datetime64[s]")
+
+
+def _days_from_civil(year, month, day):
+    """
+    公历日期距 1970-01-01 的天数，可以用于 NumPy 数组。
+
+    See: http://howardhinnant.github.io/date_algorithms.html#days_from_civil
+    """
+
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + numpy.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+def _parse_now_text_fast(text: str) -> Optional[int]:
+    parts = _split_now_text(text)
+    if parts is None:
+        return None
+    (day, hour, minute, second) = parts
+    if day[1] < 1992:
+        # 1991 年及以前的上海时间存在夏令时，切换当日不能以零点加上秒数计算，
+        # 与 parse_now_texts_as_datetime64 一样交给逐个解析处理
+        return None
+    return day[0] + hour * 3600 + minute * 60 + second
+
+
+def _split_now_text(text: str) -> Optional[Tuple[Tuple[int, int, int, int], int, int, int]]:
+    """
+    拆分标准格式的发布时间。
+
+    Returns
+    -------
+    ``((当日零点的时间戳, 年, 月, 日), 时, 分, 秒)``；不是标准格式时返回 ``None``。
+    """
+
+    if len(text) != _now_text_length or text[10] != '(' or text[12] != ')' \
+            or text[15] != ':' or text[18] != ':':
+        return None
+
+    day = _parse_day(text[:10])
+    if day is None:
+        return None
+
+    (hour, minute, second) = (text[13:15], text[16:18], text[19:21])
+    if not (hour + minute + second).isdecimal() or not (hour + minute + second).isascii():
+        return None
+    (hour, minute, second) = (int(hour), int(minute), int(second))
+    if hour >= 24 or minute >= 60 or second >= 60:
+        return None
+    return (day, hour, minute, second)
+
+
+@lru_cache(maxsize=4096)
+def _parse_day(date: str) -> Optional[Tuple[int, int, int, int]]:
+    """返回日期对应的零点的时间戳及年、月、日；无法解析时返回 ``None``。"""
+    try:
+        dt = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=local_tz)
+    except ValueError:
+        return None
+    return (int(dt.timestamp()), dt.year, dt.month, dt.day)
+
+
+def _parse_now_text_slow(text: str) -> int:
+    return int(_parse_now_text_slow_as_datetime(text).timestamp())
+
+
+def _parse_now_text_slow_as_datetime(text: str) -> datetime:
+    g = datetime_re.match(text)
+    if g is None:
+        raise ValueError(f"无法解析的时间：{text}")
+    dt = datetime.strptime(f"{g[1]} {g[2]}", "%Y-%m-%d %H:%M:%S")
+    return dt.replace(tzinfo=local_tz)
@@ -1,4 +1,7 @@
 from .walk import create_walker
+from .asyncwalk import create_async_walker
 from .walktarget import WalkTargetInterface
 from .threadwalktarget import ReversalThreadWalkTarget
-from .boardwalktarget import BoardWalkTarget
+from .boardwalktarget import BoardWalkTarget, ThreadListWalkTarget
+from .timelinewalktarget import TimelineWalkTarget
+from .profiler import WalkProfiler, PageProfile, StageTiming, StageSummary
@@ -0,0 +1,125 @@
+from typing import Any, AsyncIterator, Tuple, Optional
+
+import asyncio
+import inspect
+
+import anobbsclient
+from anobbsclient.requestutils import remaining_time
+
+from .walktarget import WalkTargetInterface
+from .profiler import WalkProfiler, profile_stage
+
+
+_END = object()
+
+
+async def create_async_walker(target: WalkTargetInterface, client: 'anobbsclient.AsyncClient',
+                              options: anobbsclient.RequestOptions = None,
+                              max_queued_pages: int = 1, timeout: Optional[float] = None,
+                              profiler: Optional[WalkProfiler] = None,
+                              ) -> AsyncIterator[Tuple[int, Any, anobbsclient.BandwidthUsage]]:
+    """
+    :func:`create_walker` 的异步版本。
+
+    页面在后台依次获取，检查是否卡页及是否满足终止条件的顺序与 :func:`create_walker` 一致。
+    已获取（包括正在获取）而未被消费的页面最多只有 ``max_queued_pages`` 页，
+    消费较慢时，后台的获取会随之暂停，而不会无限制地缓存页面。
+
+    提前结束遍历（如在 ``async for`` 中 ``break``）时，应调用所返回的生成器的 ``aclose()``，
+    或以 ``contextlib.aclosing`` (Python 3.10+) 包裹生成器，
+    以立即取消后台的获取并释放积压的页面；
+    否则要等到生成器被回收时才会取消，在此之前后台的获取会保持暂停。
+
+    Parameters
+    ----------
+    target : WalkTargetInterface
+        遍历的目标。
+    client : anobbsclient.AsyncClient
+        用于发送请求的客户端。
+        目标的 ``get_page`` 返回 awaitable 时会等待其结果。
+    options : anobbsclient.RequestOptions
+        要传入客户端的外部的请求设置。
+    max_queued_pages : int
+        最多积压的页面数，至少为 1。
+    timeout : Optional[float]
+        整个遍历的时限（秒），见 :func:`create_walker`。
+    profiler : Optional[WalkProfiler]
+        用于记录各页在各阶段用时的 :class:`WalkProfiler`，见 :func:`create_walker`。
+        页面在队列中积压的时间不计入任何阶段。
+    """
+
+    if max_queued_pages < 1:
+        raise ValueError(f"最多积压的页面数至少为 1，而不是 {max_queued_pages}")
+
+    g = target.create_state()
+    if options is None:
+        options = {}
+    options = client.options_with_timeout(options, timeout)
+    deadline = client.get_deadline(options)
+    queue = asyncio.Queue()
+    # 每获取一页前占用一个位置，消费者取走该页后归还
+    slots = asyncio.Semaphore(max_queued_pages)
+
+    async def produce():
+        try:
+            current_pn = target.start_page_number
+            while True:
+                # 积压的页面已满时在此等待，直到消费者取走页面
+                await slots.acquire()
+                remaining_time(deadline)
+                # 获取页面
+                with profile_stage(profiler, current_pn, "fetch"):
+                    result = target.get_page(current_pn, client, options)
+                    if inspect.isawaitable(result):
+                        result = await result
+                (current_page, usage) = result
+                # 检查是否卡页（卡页则抛异常）
+                with profile_stage(profiler, current_pn, "check_gatekept"):
+                    target.check_gatekept(
+                        current_pn, current_page, client, options, g)
+                # 检查是否满足终止条件
+                with profile_stage(profiler, current_pn, "should_stop"):
+                    should_stop = target.should_stop(
+                        current_page, current_pn, client, options, g)
+
+                queue.put_nowait((current_pn, current_page, usage))
+
+                # 满足终止条件则终止
+                if should_stop:
+                    break
+
+                # 翻到下一页
+                current_pn = target.get_next_page_number(current_pn, g)
+        except Exception as e:
+            queue.put_nowait(_Failure(e))
+        queue.put_nowait(_END)
+
+    if profiler is not None:
+        profiler.start(client)
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if isinstance(item, _Failure):
+                raise item.exception
+            slots.release()
+            # 产出当前页
+            with profile_stage(profiler, item[0], "consumer"):
+                yield item
+    finally:
+        producer.cancel()
+        try:
+            await producer
+        except asyncio.CancelledError:
+            pass
+        if profiler is not None:
+            profiler.finish(client)
+
+
+class _Failure:
+    """包装后台获取页面时抛出的异常。"""
+
+    def __init__(self, exception: Exception):
+        self.exception = exception
@@ -1,9 +1,11 @@
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, Optional, Set, List
 from dataclasses import dataclass, field
+import abc
 
 from datetime import datetime
 
 import anobbsclient
+from anobbsclient.utils import ensure_aware_datetime
 
 from .walktarget import WalkTargetInterface
 
@@ -20,31 +22,34 @@ class BoardWalkTargetState:
 
 
 @dataclass(frozen=True)
-class BoardWalkTarget(WalkTargetInterface):
+class ThreadListWalkTarget(WalkTargetInterface):
+    """
+    遍历按最后回复时间排列的串列表（版块或时间线）的共同逻辑。
 
-    board_id: int
-    """要遍历的版块的id。"""
+    从起始页向后遍历，直到看到最后回复时间早于 ``stop_before_datetime`` 的串为止，
+    并去除由于遍历途中串被顶上去而重复出现的串。
+    子类需提供 ``stop_before_datetime`` 字段，并实现 :meth:`get_page` 及 :meth:`page_requires_login`。
+    """
 
-    # overriding
-    start_page_number: int
+    gatekept_context = 'board_page_number'
+    """页数超出范围时抛出的 :exc:`GatekeptException` 的 ``context``。"""
 
-    stop_before_datetime: datetime
-    """
-    停止于时间。
-    在看到最后回复时间早于此时间时停止。
-    """
+    @abc.abstractmethod
+    def page_requires_login(self, current_page_number: int, client: anobbsclient.Client) -> bool:
+        """
+        返回当前页是否需要登录。
 
-    def create_state(self) -> BoardWalkTargetState:
-        return BoardWalkTargetState(stop_before_datetime=self.stop_before_datetime)
+        超出能看到的页数时应抛出 :exc:`GatekeptException`，见 :meth:`BaseClient.board_page_requires_login`。
+        """
+        raise NotImplementedError()
 
-    # overriding
-    def get_page(self, current_page_number: int,
-                 client: anobbsclient.Client, options: anobbsclient.RequestOptions
-                 ) -> [anobbsclient.Board, anobbsclient.BandwidthUsage]:
-        return client.get_board_page(
-            board_id=self.board_id, page=current_page_number,
-            options=options,
-        )
+    def filter_page(self, current_page: List[anobbsclient.BoardThread]):
+        """在去重后就地过滤当前页中的串，默认不过滤。"""
+        pass
+
+    def create_state(self) -> BoardWalkTargetState:
+        return BoardWalkTargetState(stop_before_datetime=ensure_aware_datetime(
+            self.stop_before_datetime, "stop_before_datetime"))
 
     # overriding
     def check_gatekept(self, current_page_number: int,
@@ -56,12 +61,13 @@ class BoardWalkTarget(WalkTargetInterface):
             # 在第一页记录这一轮见过的最晚的时间
             g.latest_seen_datetime = current_page[0].last_modified_time
 
-        stop_before_datetime = g.stop_before_datetime
-        if current_page[-1].last_modified_time < stop_before_datetime:
+        # 以时间戳比较，省去构建 datetime 的开销
+        stop_before_timestamp = g.stop_before_datetime.timestamp()
+        if current_page[-1].last_modified_timestamp < stop_before_timestamp:
             # 如果该页最后一串超过停止时间
             g.found_last_replies_before_stop_datetime = True
             for (i, thread) in enumerate(current_page):
-                if thread.last_modified_time < stop_before_datetime:
+                if thread.last_modified_timestamp < stop_before_timestamp:
                     current_page[:] = current_page[:i]
 
         # 借用这里去重
@@ -69,11 +75,12 @@ class BoardWalkTarget(WalkTargetInterface):
             thread for thread in current_page if thread.id not in g.seen_thread_ids]
         for thread in current_page:
             g.seen_thread_ids.add(thread.id)
+        self.filter_page(current_page)
 
         # TODO: 超过100页无论是否登录都会卡页，应该给下面的方法改个名
-        if client.board_page_requires_login(current_page_number):
+        if self.page_requires_login(current_page_number, client):
             raise anobbsclient.GatekeptException(
-                context='board_page_number',
+                context=self.gatekept_context,
                 current_page_number=current_page_number,
                 gatekeeper_post_id=None,
             )
@@ -100,3 +107,37 @@ class BoardWalkTarget(WalkTargetInterface):
             return 1
 
         return current_page_number + 1
+
+    # overriding
+    def predict_next_page_numbers(self, current_page_number: int, count: int, g: BoardWalkTargetState) -> List[int]:
+        # 回到第1页时的预测不会命中，届时预取的页面会被丢弃
+        return list(range(current_page_number + 1, current_page_number + 1 + count))
+
+
+@dataclass(frozen=True)
+class BoardWalkTarget(ThreadListWalkTarget):
+
+    board_id: int
+    """要遍历的版块的id。"""
+
+    # overriding
+    start_page_number: int
+
+    stop_before_datetime: datetime
+    """
+    停止于时间。
+    在看到最后回复时间早于此时间时停止。
+    """
+
+    # overriding
+    def get_page(self, current_page_number: int,
+                 client: anobbsclient.Client, options: anobbsclient.RequestOptions
+                 ) -> [anobbsclient.Board, anobbsclient.BandwidthUsage]:
+        return client.get_board_page(
+            board_id=self.board_id, page=current_page_number,
+            options=options,
+        )
+
+    # overriding
+    def page_requires_login(self, current_page_number: int, client: anobbsclient.Client) -> bool:
+        return client.board_page_requires_login(current_page_number)
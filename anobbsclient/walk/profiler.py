@@ -0,0 +1,311 @@
+from typing import Optional, Dict, List, Iterator, ContextManager, Union, Literal
+from dataclasses import dataclass, field
+
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import anobbsclient
+from anobbsclient.instrumentation import ClientEvent
+
+_CAN_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+"""``tracemalloc.reset_peak`` 是 Python 3.9 才加入的。"""
+
+WalkStage = Union[
+    Literal["fetch"],
+    Literal["network"],
+    Literal["decompress"],
+    Literal["json_decode"],
+    Literal["object_build"],
+    Literal["check_gatekept"],
+    Literal["should_stop"],
+    Literal["consumer"],
+]
+"""
+遍历中各页所经过的阶段。
+
+Cases
+-----
+"fetch"
+    ``target.get_page`` 的整体，包括下面四个子阶段。
+
+"network"
+    发出请求并接收响应（不含解压），发生重试时为各次尝试之和。
+
+"decompress"
+    解压响应内容。
+
+"json_decode"
+    将响应内容解析为 JSON。
+
+"object_build"
+    由 JSON 构建 :class:`ThreadPage`、:class:`BoardThread` 等对象。
+
+"check_gatekept"
+    ``target.check_gatekept``。
+
+"should_stop"
+    ``target.should_stop``。
+
+"consumer"
+    产出页面后，遍历的使用者处理该页的时间。
+"""
+
+STAGES: List[WalkStage] = ["fetch", "network", "decompress", "json_decode",
+                           "object_build", "check_gatekept", "should_stop", "consumer"]
+
+FETCH_SUBSTAGES = {"network", "decompress", "json_decode", "object_build"}
+
+
+@dataclass
+class StageTiming:
+    """某页在某一阶段的用时。"""
+
+    wall_seconds: float = 0
+    """实际经过的秒数。"""
+
+    cpu_seconds: Optional[float] = None
+    """
+    所在线程占用 CPU 的秒数。
+
+    ``fetch`` 的子阶段由客户端事件得出，没有此项。
+    """
+
+    allocated_bytes: Optional[int] = None
+    """
+    该阶段中以 :mod:`tracemalloc` 观测到的内存分配峰值（相对阶段开始时），
+    只在开启 :attr:`WalkProfiler.traces_allocations` 时有值。
+
+    Python 3.8 的 :mod:`tracemalloc` 不能重置峰值，此时改为记录阶段结束时的内存增长量。
+    """
+
+
+@dataclass
+class PageProfile:
+    """某一页在遍历中各阶段的用时。"""
+
+    page_number: int
+    """页数。"""
+
+    stages: Dict[WalkStage, StageTiming] = field(default_factory=dict)
+    """各阶段的用时，没有经过的阶段不在其中（如命中缓存时没有 ``network``）。"""
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    """某一阶段在整个遍历中的汇总。"""
+
+    stage: WalkStage
+    """阶段。"""
+    pages: int
+    """经过该阶段的页数。"""
+    wall_seconds: float
+    """所有页在该阶段实际经过的总秒数。"""
+    max_wall_seconds: float
+    """单页在该阶段实际经过的最长秒数。"""
+    cpu_seconds: Optional[float]
+    """所有页在该阶段占用 CPU 的总秒数。"""
+    max_allocated_bytes: Optional[int]
+    """单页在该阶段的内存分配峰值的最大值。"""
+
+    @property
+    def mean_wall_seconds(self) -> float:
+        """每页在该阶段实际经过的平均秒数。"""
+        return self.wall_seconds / self.pages if self.pages != 0 else 0
+
+
+@dataclass
+class WalkProfiler:
+    """
+    记录遍历中每一页在各阶段（见 :data:`WalkStage`）的用时及内存分配。
+
+    传入 :func:`create_walker` 或 :func:`create_async_walker` 的 ``profiler`` 参数以开启，
+    遍历结束后以 :meth:`summary` 或 :meth:`report` 查看汇总。
+
+    ``fetch`` 的各子阶段通过客户端的钩子（见 :meth:`BaseClient.add_hook`）得出，
+    遍历期间会临时为客户端添加钩子。
+    预取的页面在后台线程获取，其 ``fetch`` 的用时与主线程的各阶段会有重叠；
+    异步遍历中各阶段可能交错进行，CPU 时间也会包含同时进行的其他协程，仅供参考。
+    """
+
+    traces_allocations: bool = False
+    """
+    是否以 :mod:`tracemalloc` 记录各阶段的内存分配。
+
+    开销较大，``tracemalloc`` 未在运行时会在遍历期间临时开启。
+    多线程同时运行时，记录到的峰值会包括其他线程的分配。
+    """
+
+    _pages: Dict[int, PageProfile] = field(
+        default_factory=dict, init=False, repr=False)
+    _started_at: Optional[float] = field(default=None, init=False, repr=False)
+    _finished_at: Optional[float] = field(default=None, init=False, repr=False)
+    _started_tracemalloc: bool = field(default=False, init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False)
+    _local: threading.local = field(
+        default_factory=threading.local, init=False, repr=False)
+
+    @property
+    def wall_seconds(self) -> float:
+        """整个遍历实际经过的秒数，遍历尚未结束时为目前为止的秒数。"""
+        if self._started_at is None:
+            return 0
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        return end - self._started_at
+
+    def pages(self) -> List[PageProfile]:
+        """返回各页的用时，按首次经过的顺序排列。"""
+        with self._lock:
+            return list(self._pages.values())
+
+    def summary(self) -> List[StageSummary]:
+        """返回各阶段的汇总，按 :data:`STAGES` 的顺序排列，没有经过的阶段不在其中。"""
+
+        result = []
+        pages = self.pages()
+        for stage in STAGES:
+            timings = [page.stages[stage]
+                       for page in pages if stage in page.stages]
+            if len(timings) == 0:
+                continue
+            cpu = [t.cpu_seconds for t in timings if t.cpu_seconds is not None]
+            allocated = [t.allocated_bytes for t in timings
+                         if t.allocated_bytes is not None]
+            result.append(StageSummary(
+                stage=stage,
+                pages=len(timings),
+                wall_seconds=sum(t.wall_seconds for t in timings),
+                max_wall_seconds=max(t.wall_seconds for t in timings),
+                cpu_seconds=sum(cpu) if len(cpu) != 0 else None,
+                max_allocated_bytes=max(allocated) if len(
+                    allocated) != 0 else None,
+            ))
+        return result
+
+    def report(self) -> str:
+        """以表格的形式返回各阶段的汇总。"""
+
+        total = self.wall_seconds
+        lines = [f"遍历 {len(self._pages)} 页，共 {total:.3f}s",
+                 f"{'stage':<16}{'pages':>7}{'wall(s)':>11}{'mean(ms)':>11}"
+                 f"{'max(ms)':>11}{'cpu(s)':>11}{'share':>8}{'max alloc':>12}"]
+        for s in self.summary():
+            name = ("  " if s.stage in FETCH_SUBSTAGES else "") + s.stage
+            cpu = f"{s.cpu_seconds:.3f}" if s.cpu_seconds is not None else "-"
+            share = f"{s.wall_seconds / total:.1%}" if total > 0 else "-"
+            allocated = _format_bytes(s.max_allocated_bytes) \
+                if s.max_allocated_bytes is not None else "-"
+            lines.append(
+                f"{name:<16}{s.pages:>7}{s.wall_seconds:>11.3f}"
+                f"{s.mean_wall_seconds * 1000:>11.2f}{s.max_wall_seconds * 1000:>11.2f}"
+                f"{cpu:>11}{share:>8}{allocated:>12}")
+        return "\n".join(lines)
+
+    def __call__(self, event: ClientEvent):
+        # 作为客户端的钩子，只统计在 measure("fetch") 期间于同一线程发出的事件
+        page_number = getattr(self._local, "page_number", None)
+        if page_number is None:
+            return
+        if event.type == "request_end":
+            decompress_seconds = event.decompress_seconds or 0
+            self.__add(page_number, "network",
+                       StageTiming(event.duration - decompress_seconds))
+            if decompress_seconds != 0:
+                self.__add(page_number, "decompress",
+                           StageTiming(decompress_seconds))
+        elif event.type == "response_decoded":
+            self.__add(page_number, "json_decode",
+                       StageTiming(event.decode_seconds))
+            self.__add(page_number, "object_build",
+                       StageTiming(event.build_seconds))
+
+    def start(self, client: anobbsclient.Client):
+        """开始遍历时由遍历器调用。"""
+        self._started_at = time.perf_counter()
+        self._finished_at = None
+        if self.traces_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        client.add_hook(self)
+
+    def finish(self, client: anobbsclient.Client):
+        """遍历结束（包括因异常结束）时由遍历器调用。"""
+        self._finished_at = time.perf_counter()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        client.remove_hook(self)
+
+    @contextmanager
+    def measure(self, page_number: int, stage: WalkStage) -> Iterator[None]:
+        """记录某页在某一阶段的用时，由遍历器调用。"""
+
+        if stage == "fetch":
+            self._local.page_number = page_number
+        allocated_from = None
+        if self.traces_allocations and tracemalloc.is_tracing():
+            if _CAN_RESET_PEAK:
+                tracemalloc.reset_peak()
+            allocated_from = tracemalloc.get_traced_memory()[0]
+        cpu_started_at = time.thread_time()
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = StageTiming(
+                wall_seconds=time.perf_counter() - started_at,
+                cpu_seconds=time.thread_time() - cpu_started_at,
+            )
+            if allocated_from is not None:
+                (current, peak) = tracemalloc.get_traced_memory()
+                timing.allocated_bytes = max(
+                    0, (peak if _CAN_RESET_PEAK else current) - allocated_from)
+            if stage == "fetch":
+                self._local.page_number = None
+            self.__add(page_number, stage, timing)
+
+    def __add(self, page_number: int, stage: WalkStage, timing: StageTiming):
+        with self._lock:
+            page = self._pages.get(page_number, None)
+            if page is None:
+                page = self._pages[page_number] = PageProfile(page_number)
+            old = page.stages.get(stage, None)
+            if old is not None:
+                # 同一页在同一阶段经过多次（如发生重试），累加之
+                timing = StageTiming(
+                    wall_seconds=old.wall_seconds + timing.wall_seconds,
+                    cpu_seconds=_sum_optional(
+                        old.cpu_seconds, timing.cpu_seconds),
+                    allocated_bytes=_max_optional(
+                        old.allocated_bytes, timing.allocated_bytes),
+                )
+            page.stages[stage] = timing
+
+
+def profile_stage(profiler: Optional[WalkProfiler], page_number: int, stage: WalkStage) -> ContextManager[None]:
+    """没有 ``profiler`` 时什么也不做的 :meth:`WalkProfiler.measure`。"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.measure(page_number, stage)
+
+
+def _sum_optional(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None or b is None:
+        return a if b is None else b
+    return a + b
+
+
+def _max_optional(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    if a is None or b is None:
+        return a if b is None else b
+    return max(a, b)
+
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}GiB"
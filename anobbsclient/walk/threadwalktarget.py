@@ -1,9 +1,10 @@
-from typing import Optional, Tuple, OrderedDict, Dict, Any
+from typing import Optional, Tuple, OrderedDict, Dict, Any, List
 from dataclasses import dataclass, field
 
 from datetime import datetime
 
 import anobbsclient
+from anobbsclient.utils import parse_now_texts, ensure_aware_datetime
 
 from .walktarget import WalkTargetInterface
 
@@ -67,10 +68,47 @@ class ReversalThreadWalkTarget(WalkTargetInterface):
         if self.stop_before_post_id is not None:
             stop_condition_count += 1
         if self.stop_before_datetime is not None:
+            ensure_aware_datetime(
+                self.stop_before_datetime, "stop_before_datetime")
             stop_condition_count += 1
         if stop_condition_count > 1:
             raise ValueError()  # TODO: 更明确的异常
 
+    @classmethod
+    def locate(cls, thread_id: int, stop_before_post_id: int,
+               client: anobbsclient.Client, options: anobbsclient.RequestOptions = {},
+               ) -> Tuple['ReversalThreadWalkTarget', anobbsclient.BandwidthUsage]:
+        """
+        以 :meth:`Client.locate_post` 查找 ``stop_before_post_id`` 所在的页，
+        据此填好 ``start_page_number``、``gatekeeper_post_id`` 及 ``expected_stop_page_number`` 后返回。
+
+        Parameters
+        ----------
+        thread_id : int
+            要遍历的串的串号。
+        stop_before_post_id : int
+            串号的停止条件。
+        client : anobbsclient.Client
+            用于发送请求的客户端。
+        options : anobbsclient.RequestOptions
+            要传入客户端的外部的请求设置。
+
+        Returns
+        -------
+        遍历目标，以及查找所用的流量。
+        """
+
+        (location, usage) = client.locate_post(
+            thread_id, stop_before_post_id, options=options)
+        target = cls(
+            thread_id=thread_id,
+            gatekeeper_post_id=location.gatekeeper_post_id,
+            start_page_number=location.last_page_number,
+            stop_before_post_id=stop_before_post_id,
+            expected_stop_page_number=location.page_number,
+        )
+        return target, usage
+
     # overriding
     def create_state(self) -> ReversalThreadWalkTargetState:
         return ReversalThreadWalkTargetState()
@@ -123,11 +161,11 @@ class ReversalThreadWalkTarget(WalkTargetInterface):
         # 极端情况下，在获取两页期间，小于等于本页的地方有19串被删会导致误判，这里不考虑
         if g.last_page_min_id is not None \
                 and current_page.replies[0].id >= g.last_page_min_id:
-            raise anobbsclient.GatekeptException(
+            raise client._gatekept(anobbsclient.GatekeptException(
                 context="previous_page_min_post_id",
                 current_page_number=current_page_number,
                 gatekeeper_post_id=g.last_page_min_id,
-            )
+            ), '/Api/thread')
         g.last_page_min_id = current_page.replies[0].id
 
         # 如果确认此页不登录会卡页，
@@ -137,25 +175,26 @@ class ReversalThreadWalkTarget(WalkTargetInterface):
         if self.gatekeeper_post_id is not None \
                 and client.thread_page_requires_login(current_page_number) \
                 and current_page.replies[0].id <= self.gatekeeper_post_id:
-            raise anobbsclient.GatekeptException(
+            raise client._gatekept(anobbsclient.GatekeptException(
                 context="gatekeeper_post_id",
                 current_page_number=current_page_number,
                 gatekeeper_post_id=self.gatekeeper_post_id,
-            )
+            ), '/Api/thread')
 
         # 如果 expected_stop_page_number 超过守门页，就用 stop_before_post_id 判断是否卡页
         if self.expected_stop_page_number is not None \
+                and self.stop_before_post_id is not None \
                 and current_page_number > self.expected_stop_page_number \
                 and (True or client.thread_page_requires_login(self.expected_stop_page_number)) \
-                and current_page.replies[0].id <= self.expected_stop_page_number:
+                and current_page.replies[0].id <= self.stop_before_post_id:
             # 当前页面还没到预期停止页面，却得到了串号不大于停止串号的串，代表卡页了。
             # 当然，极端情况下，在页数小于等于预期停止页数的页面连删19串以上，
             # 会导致此验证法失效，这里不考虑
-            raise anobbsclient.GatekeptException(
+            raise client._gatekept(anobbsclient.GatekeptException(
                 context="lower_bound_post_id",
                 current_page_number=current_page_number,
                 gatekeeper_post_id=self.stop_before_post_id,
-            )
+            ), '/Api/thread')
 
     # overriding
     def should_stop(self, current_page: anobbsclient.ThreadPage, current_page_number: int,
@@ -178,13 +217,18 @@ class ReversalThreadWalkTarget(WalkTargetInterface):
         # 如果有设置停止串号，
         # 则试着找到停止串号（如果没有，则比它小且离它最近的串号）在回复中的 index
         if (self.stop_before_post_id or self.stop_before_datetime) is not None:
+            if self.stop_before_datetime is not None:
+                # 一次性解析本页各回复的发布时间
+                stop_before_timestamp = self.stop_before_datetime.timestamp()
+                created_at_timestamps = parse_now_texts(
+                    reply.created_at_raw_text for reply in current_page.replies)
             stop_i = None
             for (i, reply) in enumerate(current_page.replies):
                 if False \
                     or (self.stop_before_post_id is not None
                         and reply.id <= self.stop_before_post_id) \
                     or (self.stop_before_datetime is not None
-                        and reply.created_at < self.stop_before_datetime):
+                        and created_at_timestamps[i] < stop_before_timestamp):
                     stop_i = i
                 else:
                     break
@@ -209,3 +253,12 @@ class ReversalThreadWalkTarget(WalkTargetInterface):
             当前页的页数。
         """
         return current_page_number - 1
+
+    # overriding
+    def predict_next_page_numbers(self, current_page_number: int, count: int, g: ReversalThreadWalkTargetState) -> List[int]:
+        """
+        预测之后要获取的页数。
+
+        反向遍历时，之后的页数依次是当前页数减一，直到第1页。
+        """
+        return list(range(current_page_number - 1, max(0, current_page_number - 1 - count), -1))
@@ -0,0 +1,50 @@
+from typing import Optional, FrozenSet, List
+from dataclasses import dataclass
+
+from datetime import datetime
+
+import anobbsclient
+
+from .boardwalktarget import ThreadListWalkTarget
+
+
+@dataclass(frozen=True)
+class TimelineWalkTarget(ThreadListWalkTarget):
+    """
+    遍历时间线。
+
+    时间线汇总了各版块的串，只关心最近的新回复时，
+    遍历一次时间线所需的请求远少于逐个遍历各个版块。
+    停止条件及去重与 :class:`BoardWalkTarget` 相同。
+    注意并非所有版块都会出现在时间线中。
+    """
+
+    # overriding
+    start_page_number: int
+
+    stop_before_datetime: datetime
+    """
+    停止于时间。
+    在看到最后回复时间早于此时间时停止。
+    """
+
+    board_ids: Optional[FrozenSet[int]] = None
+    """只保留这些版块中的串，为 ``None`` 时保留所有串。"""
+
+    gatekept_context = 'timeline_page_number'
+
+    # overriding
+    def get_page(self, current_page_number: int,
+                 client: anobbsclient.Client, options: anobbsclient.RequestOptions
+                 ) -> [anobbsclient.Timeline, anobbsclient.BandwidthUsage]:
+        return client.get_timeline_page(page=current_page_number, options=options)
+
+    # overriding
+    def page_requires_login(self, current_page_number: int, client: anobbsclient.Client) -> bool:
+        return client.timeline_page_requires_login(current_page_number)
+
+    # overriding
+    def filter_page(self, current_page: List[anobbsclient.TimelineThread]):
+        if self.board_ids is not None:
+            current_page[:] = [
+                thread for thread in current_page if thread.board_id in self.board_ids]
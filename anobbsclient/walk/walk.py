@@ -1,30 +1,141 @@
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, Future
+
 import anobbsclient
+from anobbsclient.requestutils import sum_bandwidth_usages, remaining_time
 
 from .walktarget import WalkTargetInterface
+from .profiler import WalkProfiler, profile_stage
+
+
+def create_walker(target: WalkTargetInterface, client: anobbsclient.Client, options: anobbsclient.RequestOptions = None,
+                  prefetch_depth: int = 0, timeout: Optional[float] = None,
+                  profiler: Optional[WalkProfiler] = None):
+    """
+    创建遍历目标页面的生成器。
 
+    生成器依次产出 ``(页数, 页面, 流量)``。
 
-def create_walker(target: WalkTargetInterface, client: anobbsclient.Client, options: anobbsclient.RequestOptions = None):
+    Parameters
+    ----------
+    target : WalkTargetInterface
+        遍历的目标。
+    client : anobbsclient.Client
+        用于发送请求的客户端。
+    options : anobbsclient.RequestOptions
+        要传入客户端的外部的请求设置。
+    prefetch_depth : int
+        预取的页数，默认为 ``0``，即不预取。
+
+        大于 ``0`` 时，会按照 ``target.predict_next_page_numbers`` 的预测，
+        在处理当前页期间于后台获取之后的若干页。
+        卡页检查及终止条件的判断仍按顺序进行；
+        预测落空或遍历提前终止时，预取的页面会被丢弃，
+        其产生的流量会计入之后（或终止时最后）产出的流量中。
+    timeout : Optional[float]
+        整个遍历的时限（秒），从开始遍历时算起。
+        超过时限后不会再获取新的页面，并抛出 :exc:`DeadlineExceededException`。
+        见 :attr:`RequestOptions.deadline`。
+    profiler : Optional[WalkProfiler]
+        用于记录各页在各阶段用时的 :class:`WalkProfiler`，默认不记录。
+        使用者处理每一页的时间计入 ``consumer`` 阶段。
+    """
 
     g = target.create_state()
     if options is None:
         options = {}
-    current_pn = target.start_page_number
-    while True:
-        # 获取页面
-        (current_page, usage) = target.get_page(current_pn, client, options)
-        # 检查是否卡页（卡页则抛异常）
-        target.check_gatekept(current_pn, current_page, client, options, g)
-        # TODO: 分离出 preprocess 进行如剪裁回复之类的操作？
-        # 检查是否满足终止条件
-        should_stop = target.should_stop(
-            current_page, current_pn, client, options, g)
-
-        # 产出当前页
-        yield (current_pn, current_page, usage)
-
-        # 满足终止条件则终止
-        if should_stop:
-            break
-
-        # 翻到下一页
-        current_pn = target.get_next_page_number(current_pn, g)
+    options = client.options_with_timeout(options, timeout)
+    deadline = client.get_deadline(options)
+
+    executor = None
+    if prefetch_depth > 0:
+        executor = ThreadPoolExecutor(
+            max_workers=prefetch_depth, thread_name_prefix="walker-prefetch")
+    prefetched: Dict[int, Future] = {}
+    wasted_usage = anobbsclient.BandwidthUsage(0, 0)
+
+    if profiler is not None:
+        profiler.start(client)
+    try:
+        current_pn = target.start_page_number
+        while True:
+            remaining_time(deadline)
+            future = prefetched.pop(current_pn, None)
+            if executor is not None:
+                # 在后台预取之后的页面
+                for pn in target.predict_next_page_numbers(current_pn, prefetch_depth, g):
+                    if pn not in prefetched:
+                        prefetched[pn] = executor.submit(
+                            _get_page, target, pn, client, options, profiler)
+
+            # 获取页面
+            if future is not None:
+                (current_page, usage) = future.result()
+            else:
+                (current_page, usage) = _get_page(
+                    target, current_pn, client, options, profiler)
+            # 检查是否卡页（卡页则抛异常）
+            with profile_stage(profiler, current_pn, "check_gatekept"):
+                target.check_gatekept(
+                    current_pn, current_page, client, options, g)
+            # TODO: 分离出 preprocess 进行如剪裁回复之类的操作？
+            # 检查是否满足终止条件
+            with profile_stage(profiler, current_pn, "should_stop"):
+                should_stop = target.should_stop(
+                    current_page, current_pn, client, options, g)
+
+            if should_stop:
+                wasted_usage = sum_bandwidth_usages(
+                    [wasted_usage, _discard_prefetched(prefetched)])
+            if wasted_usage != (0, 0):
+                usage = sum_bandwidth_usages([usage, wasted_usage])
+                wasted_usage = anobbsclient.BandwidthUsage(0, 0)
+
+            # 产出当前页
+            with profile_stage(profiler, current_pn, "consumer"):
+                yield (current_pn, current_page, usage)
+
+            # 满足终止条件则终止
+            if should_stop:
+                break
+
+            # 翻到下一页
+            current_pn = target.get_next_page_number(current_pn, g)
+            if len(prefetched) != 0 and current_pn not in prefetched:
+                # 预测落空
+                wasted_usage = sum_bandwidth_usages(
+                    [wasted_usage, _discard_prefetched(prefetched)])
+    finally:
+        if executor is not None:
+            for future in prefetched.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+        if profiler is not None:
+            profiler.finish(client)
+
+
+def _get_page(target: WalkTargetInterface, page_number: int, client: anobbsclient.Client,
+              options: anobbsclient.RequestOptions, profiler: Optional[WalkProfiler]):
+    with profile_stage(profiler, page_number, "fetch"):
+        return target.get_page(page_number, client, options)
+
+
+def _discard_prefetched(prefetched: Dict[int, Future]) -> anobbsclient.BandwidthUsage:
+    """
+    丢弃预取的页面，返回丢弃的页面产生的流量。
+
+    尚未开始获取的页面会被取消，正在获取的页面会等待其完成以统计流量。
+    """
+
+    wasted_usage = anobbsclient.BandwidthUsage(0, 0)
+    for future in prefetched.values():
+        if future.cancel():
+            continue
+        try:
+            (_, usage) = future.result()
+        except Exception:
+            continue
+        wasted_usage = sum_bandwidth_usages([wasted_usage, usage])
+    prefetched.clear()
+    return wasted_usage
+
@@ -1,4 +1,4 @@
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 from dataclasses import dataclass
 import abc
 
@@ -19,6 +19,12 @@ class WalkTargetInterface:
     def get_page(self, current_page_number: int,
                  client: anobbsclient.Client, options: anobbsclient.RequestOptions
                  ) -> Tuple[Any, anobbsclient.BandwidthUsage]:
+        """
+        获取当前页数对应的页面内容并返回。
+
+        如果 ``client`` 是 :class:`anobbsclient.AsyncClient`，
+        可以直接返回其 awaitable 的结果，供 :func:`create_async_walker` 使用。
+        """
         raise NotImplementedError()
 
     @abc.abstractmethod
@@ -37,3 +43,18 @@ class WalkTargetInterface:
     @abc.abstractmethod
     def get_next_page_number(self, current_page_number: int, g: Dict[str, Any]):
         raise NotImplementedError()
+
+    def predict_next_page_numbers(self, current_page_number: int, count: int, g: Dict[str, Any]) -> List[int]:
+        """
+        预测当前页之后依次要获取的页数，供 :func:`create_walker` 预取页面。
+
+        预测不应修改遍历的状态。默认不做预测，即不预取。
+
+        Parameters
+        ----------
+        current_page_number : int
+            当前页的页数。
+        count : int
+            最多要预测的页数。
+        """
+        return []
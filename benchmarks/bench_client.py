@@ -0,0 +1,302 @@
+"""
+在本地模拟的 AnoBBS 服务器上，测量客户端各主要路径的吞吐量、请求延迟、CPU 时间及内存峰值。
+
+模拟服务器（见 ``test/mockserver.py``）以 gzip 压缩响应，
+模拟未登录时访问第 100 页之后只能得到第 100 页的「卡页」现象，
+并对不存在的串返回「该主题不存在」。回应内容的长度接近真实的串。
+``walker: thread (replay)`` 以 :class:`ReplayTransport` 回放事先录制的响应，
+衡量的是不受网络影响的解压、解析及遍历逻辑的开销。
+
+    python3 -m benchmarks.bench_client [--pages 50] [--json report.json]
+
+``--json`` 会将结果写为机器可读的报告，以便比对不同版本之间的性能变化。
+
+CPU 时间为整个进程的 CPU 时间，包括在同一进程中运行的模拟服务器；
+内存峰值以 :mod:`tracemalloc` 另行运行一次测得，同样包括模拟服务器的分配。
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import os
+import sys
+import json
+import logging
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import timedelta
+
+from dateutil import tz
+
+import anobbsclient
+from anobbsclient.instrumentation import ClientEvent
+from anobbsclient.walk import create_walker, ReversalThreadWalkTarget, BoardWalkTarget
+
+from test.mockserver import MockAnoBBSServer, THREAD_PAGE_SIZE, BOARD_PAGE_SIZE, base_datetime
+
+from .payloads import RichMockThread
+
+THREAD_ID = 10000000
+MISSING_THREAD_ID = 99999999
+GATEKEPT_THREAD_ID = 20000000
+BOARD_ID = 4
+
+Scenario = Callable[[MockAnoBBSServer, Callable[[ClientEvent], None], int], int]
+"""
+以模拟服务器、要添加到客户端的钩子及页数运行，返回处理的页面（或请求）数。
+"""
+
+
+def new_client(server: MockAnoBBSServer, hook: Callable[[ClientEvent], None],
+               client_class=anobbsclient.Client,
+               transport: Optional[anobbsclient.Transport] = None) -> anobbsclient.Client:
+    return client_class(
+        user_agent="anobbsclient-bench",
+        host=server.host,
+        scheme="http",
+        hooks=[hook],
+        transport=transport or anobbsclient.HTTPTransport(),
+    )
+
+
+def get_thread_page(server, hook, pages: int) -> int:
+    client = new_client(server, hook)
+    for page in range(1, pages + 1):
+        client.get_thread_page(THREAD_ID, page=page)
+    return pages
+
+
+def get_missing_thread_page(server, hook, pages: int) -> int:
+    client = new_client(server, hook)
+    count = pages // 4
+    logging.disable(logging.ERROR)  # 不输出放弃重试的日志
+    try:
+        for _ in range(count):
+            try:
+                client.get_thread_page(MISSING_THREAD_ID, page=1)
+            except anobbsclient.ResourceNotExistsException:
+                pass
+            else:
+                raise AssertionError("应该抛出 ResourceNotExistsException")
+    finally:
+        logging.disable(logging.NOTSET)
+    return count
+
+
+def get_thread_pages(server, hook, pages: int) -> int:
+    client = new_client(server, hook)
+    (result, _) = client.get_thread_pages(
+        THREAD_ID, range(1, pages + 1), max_workers=8)
+    return len(result)
+
+
+def get_threads(server, hook, pages: int) -> int:
+    """获取版块中各串的第一页，其中每 10 个串号有一个不存在。"""
+    client = new_client(server, hook)
+    ids = [MISSING_THREAD_ID if i % 10 == 9 else 30000000 + i * 1000
+           for i in range(pages)]
+    logging.disable(logging.ERROR)
+    try:
+        batch = client.get_threads(ids, max_workers=8)
+        for _ in batch:
+            pass
+    finally:
+        logging.disable(logging.NOTSET)
+    stats = batch.stats()
+    if stats.failed != 0:
+        raise AssertionError(f"获取失败：{stats.errors}")
+    return stats.completed
+
+
+def get_thread_page_async(server, hook, pages: int) -> int:
+    async def run():
+        async with new_client(server, hook, anobbsclient.AsyncClient) as client:
+            return await asyncio.gather(*(
+                client.get_thread_page(THREAD_ID, page=page) for page in range(1, pages + 1)))
+    return len(asyncio.run(run()))
+
+
+def thread_walker(prefetch_depth: int = 0,
+                  archive: Optional[anobbsclient.ResponseArchive] = None) -> Scenario:
+    """遍历串的场景，提供 ``archive`` 时以 :class:`ReplayTransport` 回放其中录制的响应。"""
+    def run(server, hook, pages: int) -> int:
+        transport = None
+        if archive is not None:
+            transport = anobbsclient.ReplayTransport(archive)
+        client = new_client(server, hook, transport=transport)
+        target = ReversalThreadWalkTarget(
+            thread_id=THREAD_ID,
+            gatekeeper_post_id=None,
+            start_page_number=pages,
+        )
+        return sum(1 for _ in create_walker(target=target, client=client,
+                                            prefetch_depth=prefetch_depth))
+    return run
+
+
+def board_walker(server, hook, pages: int) -> int:
+    client = new_client(server, hook)
+    # 各串的最后回复时间依次相隔1分钟，停止时间设在约第 pages 页处
+    thread_count = len(server.board_threads(BOARD_ID))
+    stop_before_datetime = (base_datetime + timedelta(
+        minutes=thread_count - BOARD_PAGE_SIZE * min(pages, 99))) \
+        .replace(tzinfo=tz.gettz("Asia/Shanghai"))
+    target = BoardWalkTarget(
+        board_id=BOARD_ID,
+        start_page_number=1,
+        stop_before_datetime=stop_before_datetime,
+    )
+    return sum(1 for _ in create_walker(target=target, client=client))
+
+
+def gatekept_walker(server, hook, pages: int) -> int:
+    # 无效的饼干不被视为登录，第 100 页之后会得到第 100 页的内容
+    options = {"user_cookie": anobbsclient.UserCookie(userhash="")}
+    count = 0
+    for _ in range(max(1, pages // 20)):
+        client = new_client(server, hook)
+        target = ReversalThreadWalkTarget(
+            thread_id=GATEKEPT_THREAD_ID,
+            gatekeeper_post_id=GATEKEPT_THREAD_ID + THREAD_PAGE_SIZE * 100,
+            start_page_number=105,
+        )
+        try:
+            for _ in create_walker(target=target, client=client, options=options):
+                count += 1
+        except anobbsclient.GatekeptException:
+            count += 1
+        else:
+            raise AssertionError("应该抛出 GatekeptException")
+    return count
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "get_thread_page": get_thread_page,
+    "get_thread_page (该主题不存在)": get_missing_thread_page,
+    "get_thread_pages (8 workers)": get_thread_pages,
+    "get_threads (8 workers)": get_threads,
+    "AsyncClient.get_thread_page (gather)": get_thread_page_async,
+    "walker: thread": thread_walker(),
+    "walker: thread (prefetch 4)": thread_walker(prefetch_depth=4),
+    "walker: board": board_walker,
+    "walker: gatekept": gatekept_walker,
+}
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """以最近秩法求分位数。"""
+    if len(values) == 0:
+        return None
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, int(q * len(values) + 0.5) - 1))
+    return values[index]
+
+
+def measure(scenario: Scenario, server: MockAnoBBSServer, pages: int) -> Dict[str, Any]:
+    latencies = []
+
+    def hook(event: ClientEvent):
+        if event.type == "request_end":
+            latencies.append(event.duration)
+
+    cpu_started_at = time.process_time()
+    started_at = time.perf_counter()
+    count = scenario(server, hook, pages)
+    seconds = time.perf_counter() - started_at
+    cpu_seconds = time.process_time() - cpu_started_at
+
+    tracemalloc.start()
+    scenario(server, lambda _: None, pages)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50, p99 = percentile(latencies, 0.5), percentile(latencies, 0.99)
+    return {
+        "pages": count,
+        "requests": len(latencies),
+        "seconds": seconds,
+        "pages_per_second": count / seconds,
+        "p50_ms": p50 * 1000 if p50 is not None else None,
+        "p99_ms": p99 * 1000 if p99 is not None else None,
+        "cpu_seconds": cpu_seconds,
+        "peak_alloc_kib": peak / 1024,
+    }
+
+
+def main(pages: int = 50, json_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    pages = min(pages, 99)  # 不超过未登录能看到的页数
+    threads = [
+        RichMockThread(THREAD_ID, THREAD_PAGE_SIZE * pages),
+        RichMockThread(GATEKEPT_THREAD_ID, THREAD_PAGE_SIZE * 105),
+    ] + [
+        RichMockThread(30000000 + i * 1000, i % 50, board_id=BOARD_ID,
+                       created_at=base_datetime + timedelta(minutes=i - i % 50))
+        for i in range(BOARD_PAGE_SIZE * (pages + 1))
+    ]
+
+    rows = []
+    with MockAnoBBSServer(threads=threads) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        # 录制一次遍历，用于衡量不受网络影响的解析及遍历逻辑的开销
+        archive = anobbsclient.ResponseArchive(
+            os.path.join(directory, "thread.bin"))
+        recording_client = anobbsclient.Client(
+            user_agent="anobbsclient-bench", host=server.host, scheme="http",
+            transport=anobbsclient.RecordingTransport(archive))
+        for _ in create_walker(target=ReversalThreadWalkTarget(
+                thread_id=THREAD_ID, gatekeeper_post_id=None, start_page_number=pages),
+                client=recording_client):
+            pass
+
+        scenarios = dict(SCENARIOS)
+        scenarios["walker: thread (replay)"] = thread_walker(archive=archive)
+        for (name, scenario) in scenarios.items():
+            row = {"scenario": name}
+            row.update(measure(scenario, server, pages))
+            rows.append(row)
+
+    print(f"{'scenario':<38} {'pages':>6} {'pages/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'cpu s':>7} {'peak KiB':>9}")
+    for row in rows:
+        print(f"{row['scenario']:<38} {row['pages']:>6} {row['pages_per_second']:>9.1f} "
+              f"{_format_optional(row['p50_ms']):>8} {_format_optional(row['p99_ms']):>8} "
+              f"{row['cpu_seconds']:>7.3f} {row['peak_alloc_kib']:>9.1f}")
+
+    if json_path is not None:
+        report = {
+            "benchmark": "bench_client",
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "anobbsclient": _package_version(),
+            "pages": pages,
+            "rows": rows,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return rows
+
+
+def _format_optional(value: Optional[float]) -> str:
+    return f"{value:.2f}" if value is not None else "-"
+
+
+def _package_version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+        return version("anobbsclient")
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50,
+                        help="每个场景处理的页数（不超过 99）")
+    parser.add_argument("--json", dest="json_path",
+                        help="将结果写为 JSON 报告的路径")
+    args = parser.parse_args(sys.argv[1:])
+    main(pages=args.pages, json_path=args.json_path)
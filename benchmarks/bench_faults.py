@@ -0,0 +1,166 @@
+"""
+在注入故障的本地模拟服务器上，对比不同的重试策略及并发方式的吞吐量与白白浪费的流量。
+
+故障包括长尾的首字节延迟、502、连接重置及不完整的 gzip 响应体（见 ``test/mockserver.py`` 的 :class:`FaultProfile`）。
+每种组合都以新的客户端获取同一串的所有页面，单页失败不影响其余页面。
+
+    python3 -m benchmarks.bench_faults [--pages 40] [--json report.json]
+
+``wasted KiB`` 为服务器因故障而白白发送的响应体字节数（502 的响应体及被截断的部分内容），
+``useful KiB`` 为客户端成功取得的页面的下载流量。
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+from concurrent.futures import ThreadPoolExecutor
+
+import anobbsclient
+from anobbsclient.walk import create_walker, ReversalThreadWalkTarget
+
+from test.mockserver import MockAnoBBSServer, THREAD_PAGE_SIZE, FaultProfile, lognormal_latency
+
+from .payloads import RichMockThread
+
+THREAD_ID = 10000000
+
+FAULT_PROFILES: Dict[str, Callable[[], FaultProfile]] = {
+    "slow first byte": lambda: FaultProfile(
+        seed=0, latency=lognormal_latency(0.005, 1.2)),
+    "502 10%": lambda: FaultProfile(
+        seed=0, latency=lognormal_latency(0.002, 0.5), error_rate=0.1),
+    "mixed": lambda: FaultProfile(
+        seed=0, latency=lognormal_latency(0.005, 1.0),
+        error_rate=0.05, reset_rate=0.03, truncate_rate=0.03),
+}
+
+RETRY_POLICIES: Dict[str, anobbsclient.RetryPolicy] = {
+    "no retry": anobbsclient.RetryPolicy(max_attempts=1),
+    "3 attempts": anobbsclient.RetryPolicy(max_attempts=3, base_delay=0.05),
+    "8 attempts": anobbsclient.RetryPolicy(max_attempts=8, base_delay=0.01, max_delay=0.5),
+}
+
+Fetcher = Callable[[anobbsclient.Client, int], Dict[int, Optional[anobbsclient.BandwidthUsage]]]
+"""获取串的各页，返回各页的流量，失败的页面为 ``None``。"""
+
+
+def walker(client: anobbsclient.Client, pages: int) -> Dict[int, Optional[anobbsclient.BandwidthUsage]]:
+    result = {n: None for n in range(1, pages + 1)}
+    target = ReversalThreadWalkTarget(
+        thread_id=THREAD_ID, gatekeeper_post_id=None, start_page_number=pages)
+    try:
+        for (n, _, usage) in create_walker(target=target, client=client):
+            result[n] = usage
+    except Exception:
+        pass  # 遍历在失败的页面处终止，之后的页面都算作失败
+    return result
+
+
+def thread_pool(workers: int) -> Fetcher:
+    def fetch(client: anobbsclient.Client, pages: int) -> Dict[int, Optional[anobbsclient.BandwidthUsage]]:
+        def get(page: int) -> Optional[anobbsclient.BandwidthUsage]:
+            try:
+                return client.get_thread_page(THREAD_ID, page=page)[1]
+            except Exception:
+                return None
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(range(1, pages + 1), executor.map(get, range(1, pages + 1))))
+    return fetch
+
+
+CONCURRENCY: Dict[str, Callable[[], Dict[str, Any]]] = {
+    # 值为创建客户端时额外的参数及所用的获取方式
+    "walker": lambda: {"fetch": walker},
+    "8 workers": lambda: {"fetch": thread_pool(8)},
+    "32 workers + AIMD": lambda: {
+        "fetch": thread_pool(32),
+        "concurrency_limiter": anobbsclient.AdaptiveConcurrencyLimiter(
+            initial_limit=4, max_limit=32),
+    },
+}
+
+
+def measure(server: MockAnoBBSServer, policy: anobbsclient.RetryPolicy,
+            concurrency: Dict[str, Any], pages: int) -> Dict[str, Any]:
+    fetch = concurrency.pop("fetch")
+    client = anobbsclient.Client(
+        user_agent="anobbsclient-bench",
+        host=server.host,
+        scheme="http",
+        default_request_options={"retry_policy": policy},
+        **concurrency,
+    )
+    requests_before = server.stats.requests
+    wasted_before = server.stats.wasted_body_bytes_sent
+
+    started_at = time.perf_counter()
+    usages = fetch(client, pages)
+    seconds = time.perf_counter() - started_at
+
+    succeeded = [usage for usage in usages.values() if usage is not None]
+    retry_stats = client.retry_budget.stats()
+    return {
+        "pages_ok": len(succeeded),
+        "pages_failed": pages - len(succeeded),
+        "seconds": seconds,
+        "pages_per_second": len(succeeded) / seconds,
+        "requests": server.stats.requests - requests_before,
+        "retries": retry_stats.retries,
+        "retry_wait_seconds": retry_stats.wait_seconds,
+        "useful_kib": sum(usage.downloaded for usage in succeeded) / 1024,
+        "wasted_kib": (server.stats.wasted_body_bytes_sent - wasted_before) / 1024,
+    }
+
+
+def main(pages: int = 40, json_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    logging.disable(logging.CRITICAL)  # 不输出重试的日志
+    rows = []
+    try:
+        for (profile_name, make_profile) in FAULT_PROFILES.items():
+            with MockAnoBBSServer(threads=[RichMockThread(THREAD_ID, THREAD_PAGE_SIZE * pages)],
+                                  faults=make_profile()) as server:
+                for (policy_name, policy) in RETRY_POLICIES.items():
+                    for (concurrency_name, make_concurrency) in CONCURRENCY.items():
+                        row = {"faults": profile_name, "retry": policy_name,
+                               "concurrency": concurrency_name}
+                        row.update(measure(server, policy,
+                                           make_concurrency(), pages))
+                        rows.append(row)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    print(f"{'faults':<16} {'retry':<11} {'concurrency':<18} {'ok':>4} {'fail':>5} "
+          f"{'pages/s':>8} {'reqs':>5} {'retries':>7} {'useful KiB':>11} {'wasted KiB':>11}")
+    for row in rows:
+        print(f"{row['faults']:<16} {row['retry']:<11} {row['concurrency']:<18} "
+              f"{row['pages_ok']:>4} {row['pages_failed']:>5} {row['pages_per_second']:>8.1f} "
+              f"{row['requests']:>5} {row['retries']:>7} "
+              f"{row['useful_kib']:>11.1f} {row['wasted_kib']:>11.1f}")
+
+    if json_path is not None:
+        report = {
+            "benchmark": "bench_faults",
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pages": pages,
+            "rows": rows,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=40,
+                        help="串的页数（不超过 99）")
+    parser.add_argument("--json", dest="json_path",
+                        help="将结果写为 JSON 报告的路径")
+    args = parser.parse_args(sys.argv[1:])
+    main(pages=min(args.pages, 99), json_path=args.json_path)
@@ -0,0 +1,86 @@
+"""
+对比解析响应 JSON 的新旧实现的 CPU 耗时及内存分配。
+
+    python3 -m benchmarks.bench_json_decode
+"""
+
+from typing import Any, Callable, Dict, List, OrderedDict
+
+import io
+import json
+import timeit
+import tracemalloc
+
+import urllib3
+
+from anobbsclient.requestutils import ContentDecoder, make_json_loads, orjson
+
+from .payloads import thread_page_payload, board_page_payload, encode
+
+
+def legacy_decode(raw_content: bytes) -> Any:
+    """改动前 ``get_json`` 的实现：完整读入后借助伪造的 urllib3 响应解压。"""
+    with io.BytesIO(raw_content) as f:
+        fake_resp = urllib3.response.HTTPResponse(
+            body=f,
+            headers={'Content-Encoding': 'gzip'},
+        )
+        decoded_content = fake_resp.data
+        return json.loads(decoded_content, object_pairs_hook=OrderedDict)
+
+
+def streaming_decode(loads: Callable[[bytes], Any]) -> Callable[[bytes], Any]:
+    def decode(raw_content: bytes) -> Any:
+        decoder = ContentDecoder('gzip')
+        # 模拟分块接收
+        for i in range(0, len(raw_content), 64 * 1024):
+            decoder.feed(raw_content[i:i+64*1024])
+        return loads(decoder.finish())
+    return decode
+
+
+def measure(decode: Callable[[bytes], Any], raw_content: bytes, number: int) -> Dict[str, float]:
+    seconds = min(timeit.repeat(
+        lambda: decode(raw_content), number=number, repeat=5)) / number
+
+    tracemalloc.start()
+    decode(raw_content)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"us_per_page": seconds * 1e6, "peak_alloc_kib": peak / 1024}
+
+
+def main(number: int = 200) -> List[Dict[str, Any]]:
+    decoders = {
+        "legacy (OrderedDict)": legacy_decode,
+        "stream + json (OrderedDict)": streaming_decode(make_json_loads()),
+        "stream + json (dict)": streaming_decode(
+            make_json_loads("json", uses_plain_dict=True)),
+    }
+    if orjson is not None:
+        decoders["stream + orjson (dict)"] = streaming_decode(
+            make_json_loads("orjson", uses_plain_dict=True))
+
+    rows = []
+    for (payload_name, payload) in [
+        ("thread page", thread_page_payload()),
+        ("board page", board_page_payload()),
+    ]:
+        raw_content = encode(payload)
+        for (decoder_name, decode) in decoders.items():
+            assert decode(raw_content) == payload
+            row = {"payload": payload_name, "decoder": decoder_name,
+                   "raw_bytes": len(raw_content)}
+            row.update(measure(decode, raw_content, number))
+            rows.append(row)
+
+    print(f"{'payload':<12} {'decoder':<28} {'raw B':>7} {'µs/page':>9} {'peak KiB':>9}")
+    for row in rows:
+        print(f"{row['payload']:<12} {row['decoder']:<28} {row['raw_bytes']:>7} "
+              f"{row['us_per_page']:>9.1f} {row['peak_alloc_kib']:>9.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+对比 :class:`Post` 与 :class:`CompactPost` 在构建、按发布时间排序及筛选时的耗时与内存占用。
+
+内存占用包括解析响应 JSON 所得的、构建后仍被帖子持有的数据。
+
+    python3 -m benchmarks.bench_post_model
+"""
+
+from typing import Any, Callable, Dict, List
+
+import json
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from anobbsclient.objects import Post, CompactPost
+
+from test.mockserver import MockThread
+
+
+def make_raw_posts(count: int) -> List[Dict[str, Any]]:
+    thread = MockThread(10000000, count)
+    # 打乱发布时间，使排序有实际工作可做
+    return [thread.reply((i * 7919) % count) for i in range(count)]
+
+
+def measure(cls: Callable[[Dict[str, Any]], Any], raw_posts: List[Dict[str, Any]]) -> Dict[str, float]:
+    start = time.perf_counter()
+    posts = [cls(raw) for raw in raw_posts]
+    construct_seconds = time.perf_counter() - start
+
+    # tracemalloc 会显著拖慢构建，因此单独测量内存占用。
+    # 从 JSON 文本开始解析，使 Post 持有的原始数据也计入其中
+    del posts
+    texts = [json.dumps(raw, ensure_ascii=False) for raw in raw_posts]
+    tracemalloc.start()
+    posts = [cls(json.loads(text, object_pairs_hook=OrderedDict))
+             for text in texts]
+    (memory, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    sorted(posts, key=lambda post: post.created_at_timestamp)
+    sort_seconds = time.perf_counter() - start
+
+    threshold = posts[len(posts) // 2].created_at_timestamp - 60
+    start = time.perf_counter()
+    [post for post in posts
+     if post.created_at_timestamp >= threshold and not post.marked_sage]
+    filter_seconds = time.perf_counter() - start
+
+    return {
+        "construct_ms": construct_seconds * 1e3,
+        "sort_ms": sort_seconds * 1e3,
+        "filter_ms": filter_seconds * 1e3,
+        "bytes_per_post": memory / len(posts),
+    }
+
+
+def main(count: int = 100_000) -> List[Dict[str, Any]]:
+    raw_posts = make_raw_posts(count)
+
+    rows = []
+    for (name, cls) in [("Post", Post), ("CompactPost", CompactPost)]:
+        row = {"model": name, "posts": count}
+        row.update(measure(cls, raw_posts))
+        rows.append(row)
+
+    print(f"{'model':<12} {'construct ms':>13} {'sort ms':>9} {'filter ms':>10} {'B/post':>8}")
+    for row in rows:
+        print(f"{row['model']:<12} {row['construct_ms']:>13.1f} {row['sort_ms']:>9.1f} "
+              f"{row['filter_ms']:>10.1f} {row['bytes_per_post']:>8.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
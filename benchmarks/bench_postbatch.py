@@ -0,0 +1,79 @@
+"""
+对比以 :class:`ThreadPage` 与以 :class:`PostBatch` 统计大量串页面的耗时与内存占用。
+
+统计内容为各饼干的回应数、sage 的回应数及最早/最晚的发布时间。
+
+    python3 -m benchmarks.bench_postbatch
+"""
+
+from typing import Any, Callable, Dict, List
+
+import copy
+import time
+import tracemalloc
+from collections import Counter
+
+from anobbsclient import ThreadPage, PostBatch
+
+from test.mockserver import MockThread
+
+
+def make_page_jsons(page_count: int) -> List[Dict[str, Any]]:
+    thread = MockThread(10000000, 19 * page_count)
+    return [thread.page(page) for page in range(1, page_count + 1)]
+
+
+def stats_with_objects(page_jsons: List[Dict[str, Any]]):
+    pages = [ThreadPage(data) for data in page_jsons]
+    replies = [reply for page in pages for reply in page.replies]
+    by_user = Counter(reply.user_id for reply in replies)
+    sage_count = sum(1 for reply in replies if reply.marked_sage)
+    times = [reply.created_at.timestamp() for reply in replies]
+    return pages, (by_user, sage_count, min(times), max(times))
+
+
+def stats_with_batch(page_jsons: List[Dict[str, Any]]):
+    batch = PostBatch.concat(
+        PostBatch.from_thread_page_json(data) for data in page_jsons)
+    by_user = Counter(batch.user_ids)
+    sage_count = sum(batch.sage_marks)
+    times = batch.created_at_timestamps
+    return batch, (by_user, sage_count, min(times), max(times))
+
+
+def measure(fn: Callable[[List[Dict[str, Any]]], Any], page_jsons: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # ThreadPage 会修改传入的 JSON，因此每次都用新的副本
+    inputs = copy.deepcopy(page_jsons)
+    start = time.perf_counter()
+    (_, result) = fn(inputs)
+    seconds = time.perf_counter() - start
+
+    inputs = copy.deepcopy(page_jsons)
+    tracemalloc.start()
+    (kept, _) = fn(inputs)
+    (memory, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    return {"ms": seconds * 1e3, "retained_kib": memory / 1024, "result": result}
+
+
+def main(page_count: int = 2000) -> List[Dict[str, Any]]:
+    page_jsons = make_page_jsons(page_count)
+
+    rows = []
+    for (name, fn) in [("ThreadPage", stats_with_objects), ("PostBatch", stats_with_batch)]:
+        row = {"representation": name, "pages": page_count}
+        row.update(measure(fn, page_jsons))
+        rows.append(row)
+    assert rows[0].pop("result") == rows[1].pop("result")
+
+    print(f"{'representation':<15} {'pages':>6} {'ms':>9} {'retained KiB':>13}")
+    for row in rows:
+        print(f"{row['representation']:<15} {row['pages']:>6} {row['ms']:>9.1f} "
+              f"{row['retained_kib']:>13.1f}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+在本地模拟服务器上，对比以时间线遍历与逐个遍历各版块取得最近有新回复的串时的请求数、流量及耗时。
+
+每种场景都有若干版块，各串的最后回复时间依次相隔1分钟、轮流分布在各版块中，
+停止时间之后有新回复的串的数量即为「活跃串数」。两种方式取得的串应当相同。
+
+    python3 -m benchmarks.bench_timeline [--json report.json]
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import timedelta
+
+from dateutil import tz
+
+import anobbsclient
+from anobbsclient.walk import create_walker, BoardWalkTarget, TimelineWalkTarget
+
+from test.mockserver import MockAnoBBSServer, base_datetime
+
+from .payloads import RichMockThread
+
+SCENARIOS = [
+    # (版块数, 每个版块的串数, 活跃串数)
+    (10, 100, 50),
+    (30, 100, 60),
+    (30, 100, 600),
+    (60, 50, 120),
+]
+
+Walk = Callable[[anobbsclient.Client, int, Any], Set[int]]
+"""以客户端、版块数及停止时间遍历，返回见到的各串的串号。"""
+
+
+def timeline_walk(client: anobbsclient.Client, boards: int, stop_before_datetime) -> Set[int]:
+    target = TimelineWalkTarget(
+        start_page_number=1, stop_before_datetime=stop_before_datetime)
+    return {thread.id for (_, page, _) in create_walker(target=target, client=client)
+            for thread in page}
+
+
+def per_board_walk(client: anobbsclient.Client, boards: int, stop_before_datetime) -> Set[int]:
+    seen = set()
+    for board_id in range(1, boards + 1):
+        target = BoardWalkTarget(
+            board_id=board_id, start_page_number=1,
+            stop_before_datetime=stop_before_datetime)
+        seen.update(thread.id for (_, page, _) in create_walker(target=target, client=client)
+                    for thread in page)
+    return seen
+
+
+WALKS: Dict[str, Walk] = {
+    "timeline": timeline_walk,
+    "per board": per_board_walk,
+}
+
+
+def measure(server: MockAnoBBSServer, walk: Walk, boards: int, stop_before_datetime) -> Dict[str, Any]:
+    client = anobbsclient.Client(
+        user_agent="anobbsclient-bench",
+        host=server.host,
+        scheme="http",
+    )
+    requests_before = server.stats.requests
+    bytes_before = server.stats.body_bytes_sent
+
+    started_at = time.perf_counter()
+    seen = walk(client, boards, stop_before_datetime)
+    seconds = time.perf_counter() - started_at
+
+    return {
+        "threads": len(seen),
+        "requests": server.stats.requests - requests_before,
+        "body_kib": (server.stats.body_bytes_sent - bytes_before) / 1024,
+        "seconds": seconds,
+        "_seen": seen,
+    }
+
+
+def main(json_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    rows = []
+    for (boards, threads_per_board, active) in SCENARIOS:
+        total = boards * threads_per_board
+        threads = [
+            RichMockThread(10000000 + i * 1000, 0, board_id=1 + i % boards,
+                           created_at=base_datetime + timedelta(minutes=i))
+            for i in range(total)
+        ]
+        stop_before_datetime = (base_datetime + timedelta(minutes=total - active)) \
+            .replace(tzinfo=tz.gettz("Asia/Shanghai"))
+        with MockAnoBBSServer(threads=threads) as server:
+            results = {name: measure(server, walk, boards, stop_before_datetime)
+                       for (name, walk) in WALKS.items()}
+        if len({frozenset(result.pop("_seen")) for result in results.values()}) != 1:
+            raise AssertionError("两种方式见到的串不同")
+        for (name, result) in results.items():
+            row = {"boards": boards, "active_threads": active, "walk": name}
+            row.update(result)
+            rows.append(row)
+
+    print(f"{'boards':>6} {'active':>6} {'walk':<10} {'threads':>7} {'reqs':>5} "
+          f"{'body KiB':>9} {'seconds':>8}")
+    for row in rows:
+        print(f"{row['boards']:>6} {row['active_threads']:>6} {row['walk']:<10} "
+              f"{row['threads']:>7} {row['requests']:>5} {row['body_kib']:>9.1f} "
+              f"{row['seconds']:>8.3f}")
+
+    if json_path is not None:
+        report = {
+            "benchmark": "bench_timeline",
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "rows": rows,
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", dest="json_path",
+                        help="将结果写为 JSON 报告的路径")
+    args = parser.parse_args(sys.argv[1:])
+    main(json_path=args.json_path)
@@ -0,0 +1,47 @@
+"""
+对比逐个以正则表达式及 ``strptime`` 解析发布时间，与批量解析的耗时。
+
+    python3 -m benchmarks.bench_timestamp_parse
+"""
+
+from typing import Any, Callable, Dict, List
+
+import time
+from datetime import timedelta
+
+from anobbsclient import utils
+
+from test.mockserver import format_now, base_datetime
+
+
+def make_texts(count: int) -> List[str]:
+    return [format_now(base_datetime + timedelta(seconds=i * 37)) for i in range(count)]
+
+
+def main(count: int = 200_000) -> List[Dict[str, Any]]:
+    texts = make_texts(count)
+
+    parsers: Dict[str, Callable[[List[str]], Any]] = {
+        "regex + strptime": lambda texts: [utils._parse_now_text_slow(text) for text in texts],
+        "parse_now_texts": utils.parse_now_texts,
+    }
+    if utils.numpy is not None:
+        parsers["parse_now_texts_as_datetime64"] = utils.parse_now_texts_as_datetime64
+
+    rows = []
+    for (name, parse) in parsers.items():
+        utils._parse_day.cache_clear()
+        start = time.perf_counter()
+        parse(texts)
+        seconds = time.perf_counter() - start
+        rows.append({"parser": name, "texts": count,
+                     "ns_per_text": seconds / count * 1e9})
+
+    print(f"{'parser':<32} {'texts':>8} {'ns/text':>9}")
+    for row in rows:
+        print(f"{row['parser']:<32} {row['texts']:>8} {row['ns_per_text']:>9.0f}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+
+import json
+import gzip
+import random
+
+from test.mockserver import MockThread, THREAD_PAGE_SIZE
+
+_sample_text = "这是芦苇。今天也是摸鱼的一天，" \
+    "&gt;&gt;No.12345678 <br />\n围观<br />\n(`ε´ )"
+
+
+def _content(rng: random.Random) -> str:
+    return _sample_text * rng.randint(1, 6)
+
+
+class RichMockThread(MockThread):
+    """回应内容长度接近真实串的 :class:`MockThread`，内容由串号决定。"""
+
+    def body(self) -> Dict[str, Any]:
+        data = super().body()
+        data["content"] = _content(random.Random(self.id))
+        return data
+
+    def reply(self, i: int) -> Dict[str, Any]:
+        data = super().reply(i)
+        data["content"] = _content(random.Random(self.id + 1 + i))
+        return data
+
+
+def thread_page_payload(page: int = 2, seed: int = 0) -> Dict[str, Any]:
+    """生成一页有 19 条回应的串页面的响应内容。"""
+    rng = random.Random(seed)
+    thread = MockThread(10000000, THREAD_PAGE_SIZE * 10)
+    data = thread.page(page)
+    for post in [data] + data["replys"]:
+        post["content"] = _content(rng)
+    return data
+
+
+def board_page_payload(seed: int = 0) -> List[Dict[str, Any]]:
+    """生成一页有 20 串、各串带 5 条最新回应的版块页面的响应内容。"""
+    rng = random.Random(seed)
+    threads = []
+    for i in range(20):
+        thread = MockThread(10000000 + i * 100000, 50)
+        data = thread.body()
+        data["replys"] = [thread.reply(j) for j in range(45, 50)]
+        for post in [data] + data["replys"]:
+            post["content"] = _content(rng)
+        threads.append(data)
+    return threads
+
+
+def encode(payload: Any, compress: bool = True) -> bytes:
+    """以服务器响应的形式编码，默认以 gzip 压缩。"""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    if compress:
+        body = gzip.compress(body)
+    return body
@@ -1,3 +1,3 @@
 #!/usr/bin/env sh
 
-python3 -m unittest test.simple_test
\ No newline at end of file
+python3 -m unittest test.simple_test test.objects_test test.client_test test.asyncclient_test test.walk_test test.retry_test test.ratelimit_test test.concurrency_test test.instrumentation_test test.transport_test test.faults_test test.threadsafety_test test.cookiepool_test test.sessionpool_test test.requestutils_test
\ No newline at end of file
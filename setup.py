@@ -12,7 +12,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/FToovvr/anobbs-client-py",
-    packages=setuptools.find_packages(exclude=("test",)),
+    packages=setuptools.find_packages(exclude=("test", "benchmarks")),
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -26,4 +26,7 @@ setuptools.setup(
         "requests>=2.24",
         "requests-toolbelt>=0.9.1",
     ],
+    extras_require={
+        "async": ["aiohttp>=3.7"],
+    },
 )
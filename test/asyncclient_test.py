@@ -0,0 +1,92 @@
+import unittest
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anobbsclient
+
+from .mockserver import MockAnoBBSServer, MockThread
+
+
+class AsyncClientTest(unittest.TestCase):
+
+    def new_client(self, server: MockAnoBBSServer, **kwargs) -> anobbsclient.AsyncClient:
+        return anobbsclient.AsyncClient(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+            **kwargs,
+        )
+
+    def new_sync_client(self, server: MockAnoBBSServer) -> anobbsclient.Client:
+        return anobbsclient.Client(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+        )
+
+    def test_get_pages(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50)]) as server:
+            sync_client = self.new_sync_client(server)
+            (expected, _) = sync_client.get_thread_page(10000000, page=2)
+
+            async def run():
+                async with self.new_client(server) as client:
+                    (thread_page, usage) = await client.get_thread_page(10000000, page=2)
+                    (board, _) = await client.get_board_page(1, page=1)
+                    return thread_page, usage, board
+            (thread_page, usage, board) = asyncio.run(run())
+
+            self.assertEqual(thread_page.to_json(), expected.to_json())
+            self.assertEqual(thread_page.total_reply_count, 50)
+            self.assertGreater(usage.downloaded, 0)
+            self.assertEqual(board[0].id, 10000000)
+
+    def test_get_404_thread_page(self):
+        with MockAnoBBSServer() as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    await client.get_thread_page(28804321, page=1)
+            self.assertRaises(
+                anobbsclient.ResourceNotExistsException, asyncio.run, run())
+
+    def test_requires_login(self):
+        with MockAnoBBSServer() as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    await client.get_thread_page(10000000, page=101)
+            self.assertRaises(
+                anobbsclient.RequiresLoginException, asyncio.run, run())
+
+    def test_concurrent_in_flight_requests(self):
+        request_count = 200
+        delay = 0.3
+        threads = [MockThread(10000000, 19 * 10)]
+
+        with MockAnoBBSServer(threads=threads, delay=delay) as server:
+            async def run():
+                async with self.new_client(server, max_connections=request_count) as client:
+                    return await asyncio.gather(*(
+                        client.get_thread_page(10000000, page=i % 10 + 1)
+                        for i in range(request_count)
+                    ))
+            start = time.monotonic()
+            results = asyncio.run(run())
+            async_elapsed = time.monotonic() - start
+            async_peak = server.stats.peak_in_flight
+
+        self.assertEqual(len(results), request_count)
+        self.assertGreater(async_peak, request_count // 2)
+        self.assertLess(async_elapsed, request_count * delay / 10)
+
+        with MockAnoBBSServer(threads=threads, delay=delay) as server:
+            client = self.new_sync_client(server)
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                list(executor.map(
+                    lambda i: client.get_thread_page(
+                        10000000, page=i % 10 + 1),
+                    range(request_count // 4),
+                ))
+            threaded_peak = server.stats.peak_in_flight
+
+        self.assertGreater(async_peak, threaded_peak * 4)
@@ -0,0 +1,366 @@
+import unittest
+import os
+import tempfile
+import time
+
+import anobbsclient
+
+from .mockserver import MockAnoBBSServer, MockThread, TIPS_POST_ID
+
+
+class ClientTest(unittest.TestCase):
+    """不依赖实际服务器，以本地模拟的服务器测试 :class:`anobbsclient.Client`。"""
+
+    def new_client(self, server: MockAnoBBSServer) -> anobbsclient.Client:
+        return anobbsclient.Client(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+        )
+
+    def test_get_thread_pages(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 10)]) as server:
+            client = self.new_client(server)
+            (pages, usage) = client.get_thread_pages(
+                10000000, range(10, 0, -1), max_workers=4)
+
+            expected_downloaded = 0
+            for (n, page) in pages:
+                (expected, expected_usage) = client.get_thread_page(
+                    10000000, page=n)
+                self.assertEqual(page.to_json(), expected.to_json())
+                expected_downloaded += expected_usage.downloaded
+
+        self.assertEqual([n for (n, _) in pages], list(range(1, 11)))
+        self.assertEqual(usage.downloaded, expected_downloaded)
+
+    def test_get_thread_pages_requires_login(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 102)]) as server:
+            client = self.new_client(server)
+            self.assertRaises(anobbsclient.RequiresLoginException,
+                              client.get_thread_pages, 10000000, [100, 101])
+            self.assertEqual(server.stats.requests, 0)
+
+    def test_get_thread_pages_gatekept(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 102)]) as server:
+            client = self.new_client(server)
+            options = {
+                "user_cookie": anobbsclient.UserCookie(
+                    userhash="",  # 无效的饼干
+                ),
+            }
+            self.assertRaises(anobbsclient.GatekeptException,
+                              client.get_thread_pages, 10000000, range(99, 103),
+                              options=options)
+            self.assertRaises(anobbsclient.GatekeptException,
+                              client.get_thread_pages, 10000000, [101],
+                              options=options,
+                              gatekeeper_post_id=10000000 + 19 * 100)
+
+    def test_get_thread_pages_with_tips(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 102, with_tips=True)]) as server:
+            client = self.new_client(server)
+            # 每页最前面的 Tips 不会被误判为卡页
+            (pages, _) = client.get_thread_pages(10000000, range(1, 6))
+            self.assertEqual([page.replies[0].id for (_, page) in pages],
+                             [TIPS_POST_ID] * 5)
+            self.assertEqual([page.replies[1].id for (_, page) in pages],
+                             [10000000 + 1 + 19 * (n - 1) for n in range(1, 6)])
+
+            options = {
+                "user_cookie": anobbsclient.UserCookie(
+                    userhash="",  # 无效的饼干
+                ),
+            }
+            for for_analysis in [False, True]:
+                self.assertRaises(anobbsclient.GatekeptException,
+                                  client.get_thread_pages, 10000000, range(99, 103),
+                                  options=options, for_analysis=for_analysis)
+
+    def test_falsy_option_values(self):
+        client = anobbsclient.Client(
+            user_agent="anobbsclient-test",
+            host="127.0.0.1:1",
+            default_request_options={
+                "connect_timeout": 5,
+                "thread_gatekeeper_page_number": 50,
+                "uses_luwei_cookie_format": {"expires": "x"},
+                "uses_response_cache": True,
+                "read_timeout": None,
+            },
+        )
+        # 只有 None 及缺少的项才会退回到之后的来源，其他假值都会覆盖
+        self.assertEqual(client.get_timeout({"connect_timeout": 0}), (0, 20))
+        self.assertEqual(client.get_timeout({"connect_timeout": None}), (5, 20))
+        self.assertEqual(client.get_thread_gatekeeper_page_number(
+            {"thread_gatekeeper_page_number": 0}), 0)
+        self.assertEqual(client.get_thread_gatekeeper_page_number({}), 50)
+        self.assertEqual(client.get_uses_luwei_cookie_format(
+            {"uses_luwei_cookie_format": {}}), {})
+        self.assertIs(client.get_uses_luwei_cookie_format(
+            {"uses_luwei_cookie_format": False}), False)
+        self.assertIs(client.get_uses_response_cache(
+            {"uses_response_cache": False}), False)
+        self.assertRaises(ValueError, client.get_retry_policy,
+                          {"max_attempts": 0})
+
+    def test_invalid_max_attempts(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19)]) as server:
+            client = self.new_client(server)
+            self.assertRaises(ValueError, client.get_thread_page, 10000000, page=1,
+                              options={"max_attempts": 0})
+            self.assertEqual(server.stats.requests, 0)
+
+    def test_response_cache(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 3 + 5)]) as server:
+            client = self.new_client(server)
+            client.response_cache = anobbsclient.ResponseCache(max_entries=2)
+
+            (first, usage) = client.get_thread_page(10000000, page=1)
+            (cached, cached_usage) = client.get_thread_page(10000000, page=1)
+            self.assertEqual(cached.to_json(), first.to_json())
+            self.assertEqual(cached_usage, anobbsclient.BandwidthUsage(0, 0))
+            self.assertEqual(server.stats.requests, 1)
+
+            # 最后一页的有效期较短
+            client.response_cache.ttls["thread_last_page"] = 0
+            client.get_thread_page(10000000, page=4)
+            client.get_thread_page(10000000, page=4)
+            self.assertEqual(server.stats.requests, 3)
+
+            client.get_thread_page(10000000, page=1,
+                                   options={"uses_response_cache": False})
+            self.assertEqual(server.stats.requests, 4)
+
+            # 超出条目数后淘汰最久未用的
+            client.get_thread_page(10000000, page=2)
+            client.get_thread_page(10000000, page=3)
+            client.get_thread_page(10000000, page=1)
+            self.assertEqual(server.stats.requests, 7)
+
+        stats = client.response_cache.stats()
+        self.assertEqual(stats.hits, 1)
+        self.assertEqual(stats.bytes_saved, usage.downloaded)
+        self.assertEqual(stats.evictions, 2)
+
+    def test_response_cache_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                MockAnoBBSServer(threads=[MockThread(10000000, 19 * 3)]) as server:
+            client = self.new_client(server)
+            client.response_cache = anobbsclient.ResponseCache(
+                directory=directory)
+            (page, _) = client.get_thread_page(10000000, page=1)
+
+            # 模拟重启后的新客户端
+            client = self.new_client(server)
+            client.response_cache = anobbsclient.ResponseCache(
+                directory=directory)
+            (cached, _) = client.get_thread_page(10000000, page=1)
+            self.assertEqual(cached.to_json(), page.to_json())
+            self.assertEqual(server.stats.requests, 1)
+
+    def test_response_cache_disk_limit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            content = b'{"id": "1"}' * 10
+            cache = anobbsclient.ResponseCache(
+                directory=directory, max_disk_bytes=1000)
+            for i in range(20):
+                cache.put(i, content, "thread_full_page")
+            files = os.listdir(directory)
+            self.assertLess(len(files), 20)
+            self.assertLessEqual(
+                sum(os.path.getsize(os.path.join(directory, name)) for name in files), 1000)
+
+            # 重新创建时计入已有的文件，最早写入的先被删除
+            cache = anobbsclient.ResponseCache(
+                directory=directory, max_disk_bytes=1000)
+            for i in range(20, 20 + len(files)):
+                cache.put(i, content, "thread_full_page")
+            self.assertEqual(len(os.listdir(directory)), len(files))
+            cache.clear()
+            self.assertIsNone(cache.get(19))
+            self.assertEqual(cache.get(20 + len(files) - 1), content)
+
+    def test_sync_thread(self):
+        thread = MockThread(10000000, 19 * 50 + 3)
+        with MockAnoBBSServer(threads=[thread]) as server:
+            client = self.new_client(server)
+            known_reply_count = thread.reply_count
+            last_known_post_id = 10000000 + known_reply_count
+
+            thread.reply_count += 40
+            (result, _) = client.sync_thread(
+                10000000, known_reply_count, last_known_post_id)
+
+            self.assertEqual([reply.id for reply in result.new_replies],
+                             list(range(last_known_post_id + 1, 10000000 + thread.reply_count + 1)))
+            self.assertEqual(result.fetched_page_numbers, [51, 52, 53])
+            self.assertEqual(result.body.total_reply_count, thread.reply_count)
+            self.assertEqual(server.stats.requests, 3)
+
+    def test_sync_thread_with_deletions(self):
+        thread = MockThread(10000000, 19 * 3)
+        with MockAnoBBSServer(threads=[thread]) as server:
+            client = self.new_client(server)
+            known_post_ids = [10000000 + 1 + i for i in range(thread.reply_count)]
+            known_reply_count = thread.reply_count
+            last_known_post_id = known_post_ids[-1]
+
+            # 删除重叠页中的一条及之前的几条回应
+            thread.deleted = {50} | set(range(0, 5))
+            thread.reply_count += 10
+            (result, _) = client.sync_thread(
+                10000000, known_reply_count, last_known_post_id,
+                known_post_ids=known_post_ids)
+
+            self.assertEqual([reply.id for reply in result.new_replies],
+                             list(range(last_known_post_id + 1, 10000000 + thread.reply_count + 1)))
+            self.assertEqual(result.deleted_post_ids, [10000000 + 1 + 50])
+            self.assertEqual(result.fetched_page_numbers, [3, 4])
+
+            # 之前的回应被大量删除后，新回应会被挤到更前面的页
+            thread.deleted = set(range(0, 40))
+            (result, _) = client.sync_thread(
+                10000000, known_reply_count, last_known_post_id)
+            self.assertEqual([reply.id for reply in result.new_replies],
+                             list(range(last_known_post_id + 1, 10000000 + thread.reply_count + 1)))
+            self.assertEqual(result.fetched_page_numbers, [1, 2, 3])
+
+    def test_sync_thread_with_tips(self):
+        thread = MockThread(10000000, 19 * 3, with_tips=True)
+        with MockAnoBBSServer(threads=[thread]) as server:
+            client = self.new_client(server)
+            known_post_ids = [10000000 + 1 + i for i in range(thread.reply_count)]
+            known_reply_count = thread.reply_count
+            last_known_post_id = known_post_ids[-1]
+
+            thread.deleted = {50}
+            thread.reply_count += 10
+            (result, _) = client.sync_thread(
+                10000000, known_reply_count, last_known_post_id,
+                known_post_ids=known_post_ids)
+            self.assertEqual([reply.id for reply in result.new_replies],
+                             list(range(last_known_post_id + 1, 10000000 + thread.reply_count + 1)))
+            # 重叠页之前的回应不会因为 Tips 的串号较小而被当作已删除
+            self.assertEqual(result.deleted_post_ids, [10000000 + 1 + 50])
+            self.assertEqual(result.fetched_page_numbers, [3, 4])
+
+            thread.deleted = set(range(0, 40))
+            (result, _) = client.sync_thread(
+                10000000, known_reply_count, last_known_post_id)
+            self.assertEqual([reply.id for reply in result.new_replies],
+                             list(range(last_known_post_id + 1, 10000000 + thread.reply_count + 1)))
+            self.assertEqual(result.fetched_page_numbers, [1, 2, 3])
+
+    def test_locate_post(self):
+        thread = MockThread(10000000, 19 * 80 + 7)
+        with MockAnoBBSServer(threads=[thread]) as server:
+            client = self.new_client(server)
+            for i in [0, 18, 19, 19 * 40 + 3, 19 * 80 + 6]:
+                (location, _) = client.locate_post(10000000, 10000000 + 1 + i)
+                self.assertEqual(location.page_number, i // 19 + 1)
+                self.assertEqual(location.last_page_number, 81)
+                self.assertIsNone(location.gatekeeper_post_id)
+                # 第1页 + 二分查找
+                self.assertLessEqual(len(location.probed_page_numbers), 1 + 7)
+
+            # 已删除的回应返回其本应在的页
+            thread.deleted = {19 * 40 + 3}
+            (location, _) = client.locate_post(10000000, 10000000 + 1 + 19 * 40 + 3)
+            self.assertEqual(location.page_number, 41)
+
+    def test_locate_post_gatekept(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 120)]) as server:
+            client = self.new_client(server)
+            post_id = 10000000 + 1 + 19 * 110
+            self.assertRaises(anobbsclient.RequiresLoginException,
+                              client.locate_post, 10000000, post_id)
+
+            options = {"user_cookie": anobbsclient.UserCookie(userhash="")}
+            self.assertRaises(anobbsclient.GatekeptException,
+                              client.locate_post, 10000000, post_id, options=options)
+
+            options = {"user_cookie": anobbsclient.UserCookie(userhash="foo")}
+            (location, _) = client.locate_post(10000000, post_id, options=options)
+            self.assertEqual(location.page_number, 111)
+            self.assertEqual(location.gatekeeper_post_id, 10000000 + 19 * 100)
+
+    def test_locate_post_skips_gatekeeper_page(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 120)]) as server:
+            client = self.new_client(server)
+            # 查找的范围不超过守门页时，不需要守门页，也不需要饼干
+            (location, _) = client.locate_post(10000000, 10000000 + 1 + 19 * 30)
+            self.assertEqual(location.page_number, 31)
+            self.assertEqual(location.last_page_number, 120)
+            self.assertIsNone(location.gatekeeper_post_id)
+            self.assertNotIn(100, location.probed_page_numbers)
+            self.assertEqual(server.stats.requests,
+                             len(location.probed_page_numbers))
+
+    def test_get_thread_pages_timeout(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 10)], delay=1) as server:
+            client = self.new_client(server)
+            start = time.monotonic()
+            self.assertRaises(anobbsclient.DeadlineExceededException,
+                              client.get_thread_pages, 10000000, range(1, 11),
+                              timeout=0.3)
+            self.assertLess(time.monotonic() - start, 1)
+
+    def test_get_threads(self):
+        threads = [MockThread(10000000 + i * 1000, 5 * i) for i in range(1, 21)]
+        ids = [thread.id for thread in threads] + [20000000, 20001000]
+        with MockAnoBBSServer(threads=threads, delay=0.01) as server:
+            client = self.new_client(server)
+            batch = client.get_threads(iter(ids), max_workers=4)
+            results = list(batch)
+            self.assertLessEqual(server.stats.peak_in_flight, 4)
+
+        self.assertEqual(sorted(result.id for result in results), sorted(ids))
+        downloaded = 0
+        for result in results:
+            if result.id >= 20000000:
+                self.assertIsInstance(result.exception,
+                                      anobbsclient.ResourceNotExistsException)
+                self.assertIsNone(result.thread_page)
+                continue
+            self.assertIsNone(result.exception)
+            self.assertEqual(result.thread_page.body.id, result.id)
+            self.assertEqual(result.thread_page.body.total_reply_count,
+                             5 * ((result.id - 10000000) // 1000))
+            downloaded += result.bandwidth_usage.downloaded
+
+        stats = batch.stats()
+        self.assertEqual((stats.completed, stats.succeeded, stats.not_found, stats.failed),
+                         (22, 20, 2, 0))
+        self.assertEqual(stats.errors, {"ResourceNotExistsException": 2})
+        self.assertEqual(stats.bandwidth_usage.downloaded, downloaded)
+
+    def test_get_threads_timeout(self):
+        threads = [MockThread(10000000 + i * 1000, 5) for i in range(20)]
+        with MockAnoBBSServer(threads=threads, delay=0.05) as server:
+            client = self.new_client(server)
+            batch = client.get_threads(
+                [thread.id for thread in threads], max_workers=2, timeout=0.2)
+            # 时限从开始迭代时起算
+            time.sleep(0.3)
+            results = list(batch)
+
+        stats = batch.stats()
+        self.assertEqual(stats.completed, 20)
+        self.assertGreater(stats.succeeded, 0)
+        self.assertLess(stats.succeeded, 20)
+        self.assertEqual(stats.errors, {
+            "DeadlineExceededException": 20 - stats.succeeded})
+        self.assertTrue(all(result.exception is None for result in results[:2]))
+
+    def test_get_threads_stops_early(self):
+        threads = [MockThread(10000000 + i * 1000, 5) for i in range(100)]
+        with MockAnoBBSServer(threads=threads, delay=0.05) as server:
+            client = self.new_client(server)
+            batch = client.get_threads(
+                (thread.id for thread in threads), max_workers=2)
+            for _ in batch:
+                break
+            # 停止迭代后只会完成已经提交的请求（至多 max_workers 的两倍）
+            self.assertLessEqual(server.stats.requests, 4)
+        self.assertEqual(batch.stats().completed, 1)
@@ -0,0 +1,141 @@
+import unittest
+import asyncio
+import time
+import threading
+import logging
+
+import requests
+import aiohttp
+
+import anobbsclient
+from anobbsclient.concurrency import is_overload_error
+
+from .mockserver import MockAnoBBSServer, MockThread, FaultProfile
+
+
+class AdaptiveConcurrencyLimiterTest(unittest.TestCase):
+
+    def test_additive_increase_multiplicative_decrease(self):
+        limiter = anobbsclient.AdaptiveConcurrencyLimiter(
+            initial_limit=4, max_limit=8)
+        for _ in range(10):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.limit, 6)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            with limiter.slot():
+                raise requests.exceptions.ConnectionError()
+        self.assertEqual(limiter.limit, 3)
+
+        # 与负载无关的错误不影响上限
+        with self.assertRaises(anobbsclient.ResourceNotExistsException):
+            with limiter.slot():
+                raise anobbsclient.ResourceNotExistsException()
+        self.assertEqual(limiter.limit, 3)
+
+        self.assertEqual([change.reason for change in limiter.history()],
+                         ["initial", "increase", "increase", "error"])
+
+    def test_decrease_once_per_batch(self):
+        limiter = anobbsclient.AdaptiveConcurrencyLimiter(initial_limit=16)
+        barrier = threading.Barrier(8)
+
+        def fail():
+            try:
+                with limiter.slot():
+                    barrier.wait()
+                    raise requests.exceptions.Timeout()
+            except requests.exceptions.Timeout:
+                pass
+        threads = [threading.Thread(target=fail) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(limiter.limit, 8)
+
+    def test_latency(self):
+        limiter = anobbsclient.AdaptiveConcurrencyLimiter(
+            initial_limit=8, latency_slack=0.01)
+        with limiter.slot():
+            pass
+        with limiter.slot():
+            time.sleep(0.05)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.history()[-1].reason, "latency")
+
+    def test_overload_errors(self):
+        for e in [requests.exceptions.ConnectionError(), requests.exceptions.ReadTimeout(),
+                  aiohttp.ServerDisconnectedError(), aiohttp.ClientConnectionError(),
+                  aiohttp.ClientPayloadError(), asyncio.TimeoutError()]:
+            with self.subTest(e=e):
+                self.assertTrue(is_overload_error(e))
+        self.assertFalse(is_overload_error(
+            anobbsclient.ResourceNotExistsException()))
+
+    def test_get_thread_pages(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 40)], delay=0.01) as server:
+            limiter = anobbsclient.AdaptiveConcurrencyLimiter(
+                initial_limit=2, max_limit=6)
+            client = anobbsclient.Client(
+                user_agent="anobbsclient-test",
+                host=server.host,
+                scheme="http",
+                concurrency_limiter=limiter,
+            )
+            (pages, _) = client.get_thread_pages(10000000, range(1, 41))
+
+        self.assertEqual(len(pages), 40)
+        self.assertLessEqual(server.stats.peak_in_flight, 6)
+        self.assertGreater(max(change.limit for change in limiter.history()), 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_async(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 20)], delay=0.01) as server:
+            limiter = anobbsclient.AdaptiveConcurrencyLimiter(
+                initial_limit=3, max_limit=3)
+
+            async def run():
+                async with anobbsclient.AsyncClient(
+                    user_agent="anobbsclient-test",
+                    host=server.host,
+                    scheme="http",
+                    concurrency_limiter=limiter,
+                ) as client:
+                    await asyncio.gather(*(client.get_thread_page(10000000, page=page)
+                                           for page in range(1, 21)))
+            asyncio.run(run())
+
+        self.assertEqual(server.stats.requests, 20)
+        self.assertLessEqual(server.stats.peak_in_flight, 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_async_backs_off_on_connection_errors(self):
+        faults = FaultProfile(reset_rate=0.5, truncate_rate=0.5, seed=0)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 20)], faults=faults) as server:
+            limiter = anobbsclient.AdaptiveConcurrencyLimiter(
+                initial_limit=8, max_limit=8)
+
+            async def run():
+                async with anobbsclient.AsyncClient(
+                    user_agent="anobbsclient-test",
+                    host=server.host,
+                    scheme="http",
+                    concurrency_limiter=limiter,
+                    default_request_options={
+                        "retry_policy": anobbsclient.RetryPolicy(max_attempts=2, base_delay=0.001)},
+                ) as client:
+                    return await asyncio.gather(*(client.get_thread_page(10000000, page=page)
+                                                  for page in range(1, 21)),
+                                                return_exceptions=True)
+            logging.disable(logging.CRITICAL)
+            try:
+                asyncio.run(run())
+            finally:
+                logging.disable(logging.NOTSET)
+
+        self.assertLess(limiter.limit, 8)
+        self.assertIn("error", [change.reason for change in limiter.history()])
+        self.assertEqual(limiter.in_flight, 0)
@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import time
+import logging
+
+import anobbsclient
+
+from .mockserver import MockAnoBBSServer, MockThread, THREAD_PAGE_SIZE
+
+THREAD_ID = 10000000
+
+
+def make_pool(*userhashes: str, **kwargs) -> anobbsclient.UserCookiePool:
+    return anobbsclient.UserCookiePool(
+        user_cookies=[anobbsclient.UserCookie(userhash=userhash)
+                      for userhash in userhashes],
+        **kwargs,
+    )
+
+
+class UserCookiePoolTest(unittest.TestCase):
+
+    def test_lru(self):
+        pool = make_pool("a", "b", "c")
+        self.assertEqual([pool.acquire().userhash for _ in range(7)],
+                         ["a", "b", "c", "a", "b", "c", "a"])
+        self.assertEqual(pool.stats()["a"].requests, 3)
+
+    def test_weighted(self):
+        pool = make_pool("a", "b", "c", selection="weighted",
+                         weights={"a": 2, "c": 0})
+        picks = [pool.acquire().userhash for _ in range(30)]
+        self.assertEqual(picks.count("a"), 20)
+        self.assertEqual(picks.count("b"), 10)
+        self.assertEqual(picks.count("c"), 0)
+        # 平滑加权轮询不会连续多次选取权重较大的饼干
+        self.assertNotIn("aaa", "".join(picks))
+
+    def test_cooldown(self):
+        pool = make_pool("a", "b", failure_threshold=2, cooldown=0.2)
+        a = anobbsclient.UserCookie(userhash="a")
+        pool.record_failure(a)
+        self.assertFalse(pool.stats()["a"].cooling_down)
+        pool.record_failure(a)
+        self.assertTrue(pool.stats()["a"].cooling_down)
+        self.assertEqual([pool.acquire().userhash for _ in range(3)],
+                         ["b", "b", "b"])
+
+        # 所有饼干都在冷却时等待最先结束冷却的饼干
+        pool.record_failure(a)
+        b = anobbsclient.UserCookie(userhash="b")
+        pool.record_failure(b)
+        pool.record_failure(b)
+        self.assertRaises(anobbsclient.DeadlineExceededException,
+                          pool.acquire, deadline=time.monotonic() + 0.05)
+        started_at = time.monotonic()
+        self.assertEqual(pool.acquire().userhash, "a")
+        self.assertGreater(time.monotonic() - started_at, 0.05)
+
+        stats = pool.stats()["a"]
+        self.assertEqual((stats.failures, stats.cooldowns), (3, 1))
+
+    def test_min_interval(self):
+        pool = make_pool("a", "b", min_interval=0.1)
+        started_at = time.monotonic()
+        self.assertEqual([pool.acquire().userhash for _ in range(4)],
+                         ["a", "b", "a", "b"])
+        self.assertGreater(time.monotonic() - started_at, 0.09)
+
+
+class ClientWithUserCookiePoolTest(unittest.TestCase):
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def new_client(self, server: MockAnoBBSServer, pool: anobbsclient.UserCookiePool,
+                   client_class=anobbsclient.Client) -> anobbsclient.Client:
+        return client_class(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+            default_request_options={
+                "user_cookie_pool": pool,
+                "retry_policy": anobbsclient.RetryPolicy(max_attempts=5, base_delay=0.001),
+            },
+            retry_budget=anobbsclient.RetryBudget(ratio=1, max_tokens=100),
+        )
+
+    def test_spreads_logged_in_requests(self):
+        pool = make_pool("a", "b", "c")
+        with MockAnoBBSServer(threads=[MockThread(THREAD_ID, THREAD_PAGE_SIZE * 110)]) as server:
+            client = self.new_client(server, pool)
+            (pages, _) = client.get_thread_pages(
+                THREAD_ID, range(95, 110), max_workers=6)
+            # 不需要登录的页面不使用饼干
+            self.assertEqual(sum(server.stats.userhashes.values()), 9)
+            self.assertEqual(server.stats.userhashes, {"a": 3, "b": 3, "c": 3})
+
+        for (n, page) in pages:
+            self.assertEqual(page.replies[0].id,
+                             THREAD_ID + 1 + (n - 1) * THREAD_PAGE_SIZE)
+        self.assertEqual(sorted(client.cookiejar_store.keys()), ["a", "b", "c"])
+
+        # 明确设置的饼干优先于饼干池
+        user_cookie = anobbsclient.UserCookie(userhash="d")
+        with MockAnoBBSServer(threads=[MockThread(THREAD_ID, THREAD_PAGE_SIZE * 110)]) as server:
+            client = self.new_client(server, pool)
+            client.get_thread_page(THREAD_ID, page=105,
+                                   options={"user_cookie": user_cookie})
+            self.assertEqual(server.stats.userhashes, {"d": 1})
+
+    def test_rate_limited_cookie_cools_down(self):
+        pool = make_pool("a", "b", failure_threshold=2, cooldown=60)
+        with MockAnoBBSServer(threads=[MockThread(THREAD_ID, THREAD_PAGE_SIZE * 110)],
+                              rate_limited_userhashes={"a"}) as server:
+            client = self.new_client(server, pool)
+            for page in range(101, 111):
+                (thread_page, _) = client.get_thread_page(
+                    THREAD_ID, page=page)
+                self.assertEqual(thread_page.replies[0].id,
+                                 THREAD_ID + 1 + (page - 1) * THREAD_PAGE_SIZE)
+            self.assertEqual(server.stats.userhashes["a"], 2)
+            self.assertEqual(server.stats.userhashes["b"], 10)
+
+        stats = pool.stats()
+        self.assertTrue(stats["a"].cooling_down)
+        self.assertEqual((stats["a"].failures, stats["a"].cooldowns), (2, 1))
+        self.assertEqual(stats["b"].failures, 0)
+
+    def test_async_client(self):
+        pool = make_pool("a", "b")
+        with MockAnoBBSServer(threads=[MockThread(THREAD_ID, THREAD_PAGE_SIZE * 110)]) as server:
+            async def run():
+                async with self.new_client(server, pool, anobbsclient.AsyncClient) as client:
+                    return await asyncio.gather(*(
+                        client.get_thread_page(THREAD_ID, page=page) for page in range(101, 105)))
+            results = asyncio.run(run())
+            self.assertEqual(server.stats.userhashes, {"a": 2, "b": 2})
+        self.assertEqual([page.replies[0].id for (page, _) in results],
+                         [THREAD_ID + 1 + (n - 1) * THREAD_PAGE_SIZE for n in range(101, 105)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import asyncio
+import gzip
+import logging
+
+import requests
+
+import anobbsclient
+from anobbsclient.requestutils import ContentDecoder, TruncatedContentError
+from anobbsclient.walk import create_walker, ReversalThreadWalkTarget
+
+from .mockserver import MockAnoBBSServer, MockThread, FaultProfile, lognormal_latency
+
+FAST_RETRY = anobbsclient.RetryPolicy(max_attempts=10, base_delay=0.001)
+
+
+class FaultInjectionTest(unittest.TestCase):
+    """以注入故障的模拟服务器测试客户端的重试等处理。"""
+
+    def setUp(self):
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def new_client(self, server: MockAnoBBSServer, client_class=anobbsclient.Client) -> anobbsclient.Client:
+        return client_class(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+            retry_budget=anobbsclient.RetryBudget(ratio=1, max_tokens=1000),
+            default_request_options={"retry_policy": FAST_RETRY},
+        )
+
+    def test_truncated_gzip(self):
+        body = gzip.compress(b'{"id": "1"}' * 100)
+        decoder = ContentDecoder("gzip")
+        decoder.feed(body[:len(body) // 2])
+        self.assertRaises(TruncatedContentError, decoder.finish)
+
+    def test_each_fault_is_retried(self):
+        for fault in ["error", "reset", "truncate"]:
+            faults = FaultProfile(seed=0, **{f"{fault}_rate": 0.5})
+            with self.subTest(fault=fault), \
+                    MockAnoBBSServer(threads=[MockThread(10000000, 19 * 10)], faults=faults) as server:
+                client = self.new_client(server)
+                for page in range(1, 11):
+                    (thread_page, _) = client.get_thread_page(
+                        10000000, page=page)
+                    self.assertEqual(len(thread_page.replies), 19)
+                self.assertGreater(server.stats.faults[fault], 0)
+                self.assertEqual(server.stats.requests,
+                                 10 + server.stats.faults[fault])
+                self.assertEqual(client.retry_budget.stats().retries,
+                                 server.stats.faults[fault])
+
+    def test_gives_up(self):
+        faults = FaultProfile(truncate_rate=1)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19)], faults=faults) as server:
+            client = self.new_client(server)
+            self.assertRaises(requests.exceptions.ChunkedEncodingError,
+                              client.get_thread_page, 10000000, 1,
+                              {"retry_policy": anobbsclient.RetryPolicy(max_attempts=3, base_delay=0.001)})
+            self.assertEqual(server.stats.requests, 3)
+            self.assertGreater(server.stats.wasted_body_bytes_sent, 0)
+
+    def test_async_client(self):
+        faults = FaultProfile(seed=1, error_rate=0.2, truncate_rate=0.2)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 10)], faults=faults) as server:
+            async def run():
+                async with self.new_client(server, anobbsclient.AsyncClient) as client:
+                    return await asyncio.gather(*(
+                        client.get_thread_page(10000000, page=page) for page in range(1, 11)))
+            results = asyncio.run(run())
+            self.assertGreater(len(server.stats.faults), 0)
+        self.assertEqual([len(page.replies) for (page, _) in results], [19] * 10)
+
+    def test_walker_under_faults(self):
+        target = ReversalThreadWalkTarget(
+            thread_id=10000000,
+            gatekeeper_post_id=None,
+            start_page_number=8,
+        )
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 8)]) as server:
+            expected = [(n, [post.id for post in page.replies]) for (n, page, _) in
+                        create_walker(target=target, client=self.new_client(server))]
+
+        faults = FaultProfile(seed=1, latency=lognormal_latency(0.002, 1),
+                              error_rate=0.1, reset_rate=0.1, truncate_rate=0.1)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 8)], faults=faults) as server:
+            pages = [(n, [post.id for post in page.replies]) for (n, page, _) in
+                     create_walker(target=target, client=self.new_client(server), prefetch_depth=2)]
+            self.assertGreater(sum(server.stats.faults.values()), 0)
+        self.assertEqual(pages, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
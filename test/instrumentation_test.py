@@ -0,0 +1,133 @@
+import unittest
+import os
+import socket
+import tempfile
+
+import requests
+
+import anobbsclient
+from anobbsclient.instrumentation import endpoint_of
+
+from .mockserver import MockAnoBBSServer, MockThread
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def new_client(self, host: str, **kwargs) -> anobbsclient.Client:
+        return anobbsclient.Client(
+            user_agent="anobbsclient-test",
+            host=host,
+            scheme="http",
+            **kwargs,
+        )
+
+    def test_endpoint_of(self):
+        self.assertEqual(endpoint_of("/Api/thread/id/123"), "/Api/thread")
+        self.assertEqual(endpoint_of("/Api/showf"), "/Api/showf")
+        self.assertEqual(endpoint_of(
+            "/Home/Forum/doReplyThread.html"), "doReplyThread")
+
+    def test_hook_events(self):
+        events = []
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50, board_id=4)]) as server:
+            client = self.new_client(
+                server.host, response_cache=anobbsclient.ResponseCache())
+            client.add_hook(events.append)
+            (_, usage) = client.get_thread_page(10000000, page=1)
+            client.get_thread_page(10000000, page=1)
+            client.get_board_page(4, page=1)
+
+        self.assertEqual([event.type for event in events], [
+            "request_start", "request_end", "response_decoded",
+            "cache_hit",
+            "request_start", "request_end", "response_decoded",
+        ])
+        end = events[1]
+        self.assertEqual(end.endpoint, "/Api/thread")
+        self.assertIsNone(end.error)
+        self.assertEqual(end.bandwidth_usage, usage)
+        self.assertLess(end.raw_bytes, end.decoded_bytes)  # gzip
+        self.assertGreaterEqual(end.duration, 0)
+        self.assertEqual(events[3].page_number, 1)
+        self.assertEqual(events[4].endpoint, "/Api/showf")
+
+        client.remove_hook(events.append)
+        self.assertEqual(client.hooks, [])
+
+    def test_retry_and_error_events(self):
+        # 找一个没有在监听的端口，使连接被拒绝
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        collector = anobbsclient.MetricsCollector()
+        client = self.new_client(f"127.0.0.1:{port}", hooks=[collector])
+        options = {"retry_policy": anobbsclient.RetryPolicy(
+            max_attempts=3, base_delay=0.01)}
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          client.get_thread_page, 10000000, 1, options)
+
+        self.assertEqual(collector.counter(
+            "requests_started_total", "/Api/thread"), 3)
+        self.assertEqual(collector.counter(
+            "requests_total", "/Api/thread", outcome="error"), 3)
+        self.assertEqual(collector.counter(
+            "retries_total", "/Api/thread"), 2)
+        self.assertGreater(collector.counter(
+            "retry_wait_seconds_total", "/Api/thread"), 0)
+
+    def test_gatekept_event(self):
+        collector = anobbsclient.MetricsCollector()
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 102)]) as server:
+            client = self.new_client(server.host, hooks=[collector])
+            options = {
+                "user_cookie": anobbsclient.UserCookie(userhash=""),
+            }
+            self.assertRaises(anobbsclient.GatekeptException,
+                              client.get_thread_pages, 10000000, range(99, 103),
+                              options=options)
+        self.assertEqual(collector.counter("gatekept_total", "/Api/thread"), 1)
+
+    def test_metrics_collector(self):
+        collector = anobbsclient.MetricsCollector(latency_buckets=(0.1, 1))
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50)]) as server:
+            client = self.new_client(server.host)
+            client.add_hook(collector)
+            usages = [client.get_thread_page(10000000, page=page)[1]
+                      for page in [1, 2, 3]]
+
+        self.assertEqual(collector.counter(
+            "requests_total", "/Api/thread", outcome="success"), 3)
+        self.assertEqual(collector.counter("downloaded_bytes_total", "/Api/thread"),
+                         sum(usage.downloaded for usage in usages))
+        self.assertGreater(collector.counter(
+            "response_decoded_bytes_total", "/Api/thread"), 0)
+        self.assertGreater(collector.counter(
+            "json_decode_seconds_total", "/Api/thread"), 0)
+        histogram = collector.latency_histogram("/Api/thread")
+        self.assertEqual([bound for (bound, _) in histogram],
+                         [0.1, 1, float("inf")])
+        self.assertEqual(histogram[-1][1], 3)
+        self.assertEqual(collector.latency_histogram("/Api/showf"), [])
+
+        text = collector.to_prometheus()
+        self.assertIn("# TYPE anobbsclient_requests_total counter", text)
+        self.assertIn(
+            'anobbsclient_requests_total{endpoint="/Api/thread",outcome="success"} 3', text)
+        self.assertIn(
+            'anobbsclient_request_duration_seconds_bucket{endpoint="/Api/thread",le="+Inf"} 3', text)
+        self.assertIn(
+            'anobbsclient_request_duration_seconds_count{endpoint="/Api/thread"} 3', text)
+
+        exported = []
+        collector.export(exported.append)
+        self.assertEqual(exported, [text])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "anobbsclient.prom")
+            collector.export(path)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), text)
+            self.assertEqual(os.listdir(directory), ["anobbsclient.prom"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,360 @@
+from typing import Callable, Dict, List, Optional, Any, Set, Tuple
+from dataclasses import dataclass, field
+
+import json
+import gzip
+import time
+import random
+import socket
+import struct
+import math
+import threading
+import urllib.parse
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from http.cookies import SimpleCookie
+
+THREAD_PAGE_SIZE = 19
+BOARD_PAGE_SIZE = 20
+GATEKEEPER_PAGE_NUMBER = 100
+
+base_datetime = datetime(2021, 3, 7, 12, 0, 0)
+
+
+def format_now(dt: datetime) -> str:
+    """以 A 岛的格式输出时间，如 ``2021-03-07(日)12:00:00``。"""
+    return (dt.strftime("%Y-%m-%d") +
+            "(" + "一二三四五六日"[dt.weekday()] + ")" +
+            dt.strftime("%H:%M:%S"))
+
+
+def make_post(id: int, created_at: datetime, **extra) -> Dict[str, Any]:
+    post = {
+        "id": str(id),
+        "img": "",
+        "ext": "",
+        "now": format_now(created_at),
+        "userid": f"u{id % 97:07d}",
+        "name": "无名氏",
+        "email": "",
+        "title": "无标题",
+        "content": f"内容 {id}",
+        "sage": "0",
+        "admin": "0",
+    }
+    post.update(extra)
+    return post
+
+
+TIPS_POST_ID = 9999999
+
+
+def make_tips_post() -> Dict[str, Any]:
+    """实际的服务器在串的每页中插入的芦苇的 Tips。"""
+    return make_post(TIPS_POST_ID, base_datetime,
+                     userid="芦苇", name="无名氏", title="无标题",
+                     content="这是芦苇", status="n")
+
+
+@dataclass
+class MockThread:
+    """
+    模拟的串。
+
+    串的第 i 条回应（从0开始）的串号为 ``id + 1 + i``，发布时间为串首发布时间之后的第 i+1 分钟。
+    ``deleted`` 中的回应被视为已删除，之后的回应会依次前移。
+    ``with_tips`` 为真时，与实际的服务器一样在每页回应的最前面插入一条芦苇的 Tips。
+    """
+
+    id: int
+    reply_count: int
+    created_at: datetime = base_datetime
+    board_id: int = 1
+    deleted: Set[int] = field(default_factory=set)
+    with_tips: bool = False
+
+    def _visible_replies(self) -> List[int]:
+        return [i for i in range(self.reply_count) if i not in self.deleted]
+
+    def body(self) -> Dict[str, Any]:
+        return make_post(self.id, self.created_at,
+                         fid=str(self.board_id),
+                         replyCount=str(self.reply_count - len(self.deleted)))
+
+    def reply(self, i: int) -> Dict[str, Any]:
+        return make_post(self.id + 1 + i, self.created_at + timedelta(minutes=i+1),
+                         status="n")
+
+    @property
+    def last_page_number(self) -> int:
+        visible_count = self.reply_count - len(self.deleted)
+        return max(1, (visible_count + THREAD_PAGE_SIZE - 1) // THREAD_PAGE_SIZE)
+
+    def page(self, page: int) -> Dict[str, Any]:
+        start = (page - 1) * THREAD_PAGE_SIZE
+        data = self.body()
+        data["replys"] = [self.reply(i) for i in
+                          self._visible_replies()[start:start + THREAD_PAGE_SIZE]]
+        if self.with_tips:
+            data["replys"].insert(0, make_tips_post())
+        return data
+
+    def last_modified_time(self) -> datetime:
+        return self.created_at + timedelta(minutes=self.reply_count)
+
+
+@dataclass
+class MockServerStats:
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    paths: Dict[str, int] = field(default_factory=dict)
+    faults: Dict[str, int] = field(default_factory=dict)
+    """各种注入的故障发生的次数，键为 ``"error"``、``"reset"`` 或 ``"truncate"``。"""
+    userhashes: Dict[str, int] = field(default_factory=dict)
+    """携带各饼干的请求数，键为 ``userhash``。"""
+    body_bytes_sent: int = 0
+    """发送的响应体的字节数。"""
+    wasted_body_bytes_sent: int = 0
+    """其中由于注入的故障而白白发送的字节数。"""
+
+
+Latency = Callable[[random.Random], float]
+"""以随机数生成器生成一次响应延迟（秒）的函数。"""
+
+
+def constant_latency(seconds: float) -> Latency:
+    return lambda _: seconds
+
+
+def uniform_latency(low: float, high: float) -> Latency:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float) -> Latency:
+    """中位数为 ``median`` 的对数正态分布，``sigma`` 越大长尾越明显。"""
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+@dataclass
+class FaultProfile:
+    """
+    模拟服务器注入的故障。
+
+    每个请求依次以各比例决定是否发生相应的故障，至多发生一种。
+    """
+
+    latency: Latency = constant_latency(0)
+    """返回首字节前的延迟。"""
+
+    error_rate: float = 0
+    """返回 502 的比例。"""
+
+    reset_rate: float = 0
+    """不返回任何内容而直接重置连接的比例。"""
+
+    truncate_rate: float = 0
+    """只发送一半的响应体就关闭连接的比例，此时响应头中的 ``Content-Length`` 仍为完整的长度。"""
+
+    seed: Optional[int] = None
+    """随机数种子，用于复现。"""
+
+    def choose_fault(self, rng: random.Random) -> Optional[str]:
+        for (name, rate) in [("error", self.error_rate), ("reset", self.reset_rate),
+                             ("truncate", self.truncate_rate)]:
+            if rate > 0 and rng.random() < rate:
+                return name
+        return None
+
+
+class MockAnoBBSServer:
+    """
+    在本地模拟 AnoBBS API 的 HTTP 服务器，供离线测试使用。
+
+    支持 ``/Api/showf``、``/Api/timeline`` 及 ``/Api/thread/id/{id}``，
+    会在客户端接受时以 gzip 压缩响应，
+    并模拟未登录时访问第 100 页之后的页面只能得到第 100 页内容的「卡页」现象。
+
+    提供 ``faults`` 时，会按照 :class:`FaultProfile` 注入延迟、502、连接重置及不完整的响应体。
+    携带 ``rate_limited_userhashes`` 中的饼干的请求总是得到 429，模拟被限制频率的饼干。
+    """
+
+    def __init__(self, threads: List[MockThread] = [], delay: float = 0,
+                 faults: Optional[FaultProfile] = None,
+                 rate_limited_userhashes: Set[str] = frozenset()):
+        self.threads: Dict[int, MockThread] = {
+            thread.id: thread for thread in threads}
+        self.delay = delay
+        self.faults = faults
+        self.rate_limited_userhashes = rate_limited_userhashes
+        self._rng = random.Random(faults.seed if faults is not None else None)
+        self.stats = MockServerStats()
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), _make_handler(self), bind_and_activate=False)
+        self._server.daemon_threads = True
+        # 需在 listen 之前设置，否则大量并发连接时会因队列已满而等待重传
+        self._server.request_queue_size = 1024
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> 'MockAnoBBSServer':
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockAnoBBSServer':
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def draw_fault(self) -> Tuple[float, Optional[str]]:
+        """为一个请求决定延迟及要注入的故障。"""
+        if self.faults is None:
+            return 0, None
+        with self._lock:
+            return self.faults.latency(self._rng), self.faults.choose_fault(self._rng)
+
+    def board_threads(self, board_id: int) -> List[MockThread]:
+        """返回版块中按最后回复时间从晚到早排列的串。"""
+        threads = [thread for thread in self.threads.values()
+                   if thread.board_id == board_id]
+        return sorted(threads, key=lambda t: t.last_modified_time(), reverse=True)
+
+    def timeline_threads(self) -> List[MockThread]:
+        """返回所有版块中按最后回复时间从晚到早排列的串。"""
+        return sorted(self.threads.values(), key=lambda t: t.last_modified_time(), reverse=True)
+
+    def handle_api(self, path: str, queries: Dict[str, str], logged_in: bool) -> Any:
+        page = int(queries.get("page", "1"))
+        if not logged_in:
+            page = min(page, GATEKEEPER_PAGE_NUMBER)
+
+        if path == "/Api/showf":
+            threads = self.board_threads(int(queries["id"]))
+            start = (page - 1) * BOARD_PAGE_SIZE
+            return [self.__board_thread(thread) for thread in threads[start:start+BOARD_PAGE_SIZE]]
+
+        if path == "/Api/timeline":
+            threads = self.timeline_threads()
+            start = (page - 1) * BOARD_PAGE_SIZE
+            return [self.__board_thread(thread) for thread in threads[start:start+BOARD_PAGE_SIZE]]
+
+        if path.startswith("/Api/thread/id/"):
+            thread = self.threads.get(int(path[len("/Api/thread/id/"):]))
+            if thread is None:
+                return "该主题不存在"
+            return thread.page(page)
+
+        return None
+
+    def __board_thread(self, thread: MockThread) -> Dict[str, Any]:
+        data = thread.body()
+        data["replys"] = [thread.reply(i)
+                          for i in thread._visible_replies()[-5:]]
+        return data
+
+
+def _make_handler(server: MockAnoBBSServer):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # 响应头与响应体分开写出，不关闭 Nagle 算法会与延迟确认相互等待约 40ms
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            queries = dict(urllib.parse.parse_qsl(url.query))
+            cookies = SimpleCookie(self.headers.get("Cookie", ""))
+            logged_in = "userhash" in cookies and cookies["userhash"].value != ""
+            userhash = cookies["userhash"].value if logged_in else None
+
+            with server._lock:
+                server.stats.requests += 1
+                if userhash is not None:
+                    server.stats.userhashes[userhash] = server.stats.userhashes.get(
+                        userhash, 0) + 1
+                server.stats.paths[url.path] = server.stats.paths.get(
+                    url.path, 0) + 1
+                server.stats.in_flight += 1
+                server.stats.peak_in_flight = max(
+                    server.stats.peak_in_flight, server.stats.in_flight)
+            (latency, fault) = server.draw_fault()
+            try:
+                if server.delay + latency > 0:
+                    time.sleep(server.delay + latency)
+                obj = server.handle_api(url.path, queries, logged_in)
+            finally:
+                with server._lock:
+                    server.stats.in_flight -= 1
+                    if fault is not None:
+                        server.stats.faults[fault] = server.stats.faults.get(
+                            fault, 0) + 1
+
+            if fault == "reset":
+                # 以 SO_LINGER 为 0 关闭，使客户端收到 RST
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                           struct.pack("ii", 1, 0))
+                self.connection.close()
+                self.close_connection = True
+                return
+            if fault == "error":
+                self.send_body(502, b"<html>502 Bad Gateway</html>",
+                               "text/html", wasted=True)
+                return
+            if userhash in server.rate_limited_userhashes:
+                self.send_body(429, b"<html>429 Too Many Requests</html>",
+                               "text/html", wasted=True)
+                return
+            if obj is None:
+                self.send_error(404)
+                return
+
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            content_encoding = None
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                content_encoding = "gzip"
+            self.send_body(200, body, "application/json", content_encoding,
+                           truncated=fault == "truncate",
+                           # 与实际的服务器一样下发会话的饼干
+                           cookie="PHPSESSID=mocksession; path=/")
+
+        def send_body(self, status: int, body: bytes, content_type: str,
+                      content_encoding: Optional[str] = None,
+                      wasted: bool = False, truncated: bool = False,
+                      cookie: Optional[str] = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            if cookie is not None:
+                self.send_header("Set-Cookie", cookie)
+            if content_encoding is not None:
+                self.send_header("Content-Encoding", content_encoding)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if truncated:
+                body = body[:len(body) // 2]
+                self.close_connection = True
+            self.wfile.write(body)
+            with server._lock:
+                server.stats.body_bytes_sent += len(body)
+                if wasted or truncated:
+                    server.stats.wasted_body_bytes_sent += len(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
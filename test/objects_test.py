@@ -0,0 +1,103 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import anobbsclient
+from anobbsclient.utils import parse_now_text, parse_now_texts, parse_now_text_as_datetime, parse_now_texts_as_datetime64
+
+from .mockserver import MockThread, format_now, base_datetime
+
+
+class ObjectsTest(unittest.TestCase):
+
+    def test_compact_post(self):
+        page = anobbsclient.ThreadPage(MockThread(10000000, 30).page(1))
+
+        for (post, compact) in zip(page.replies, page.compact_replies()):
+            for attr in ["id", "attachment_base", "attachment_extension",
+                         "created_at_raw_text", "created_at", "created_at_timestamp", "user_id",
+                         "name", "email", "title", "content",
+                         "sage_mark", "marked_sage", "admin_mark", "marked_admin"]:
+                self.assertEqual(getattr(compact, attr),
+                                 getattr(post, attr), attr)
+            self.assertEqual(compact.raw_copy(), post.raw_copy())
+            self.assertEqual(compact.to_json(), post.to_json())
+
+        compact = page.compact_replies()[0]
+        self.assertFalse(hasattr(compact, "__dict__"))
+        # 不保留原始数据的字典，字段名由各帖子共用
+        self.assertFalse(hasattr(compact, "_raw"))
+        self.assertIs(compact._layout, page.compact_replies()[1]._layout)
+        self.assertEqual(compact, anobbsclient.CompactPost(page.replies[0].raw_copy()))
+
+    def test_thread_page_body_is_cached(self):
+        page = anobbsclient.ThreadPage(MockThread(10000000, 30).page(1))
+
+        self.assertIs(page.body, page.body)
+        self.assertEqual(page.body.total_reply_count, 30)
+
+    def test_post_batch(self):
+        thread = MockThread(10000000, 19 * 3)
+        pages = [anobbsclient.ThreadPage(thread.page(n)) for n in [1, 2, 3]]
+        batch = anobbsclient.PostBatch.concat(
+            anobbsclient.PostBatch.from_thread_page_json(thread.page(n)) for n in [1, 2, 3])
+        replies = [reply for page in pages for reply in page.replies]
+
+        self.assertEqual(len(batch), 19 * 3)
+        self.assertEqual(list(batch.ids), [reply.id for reply in replies])
+        self.assertEqual(list(batch.created_at_timestamps),
+                         [int(reply.created_at.timestamp()) for reply in replies])
+        self.assertEqual(batch.user_ids, [reply.user_id for reply in replies])
+        self.assertEqual(set(batch.thread_ids), {10000000})
+
+        self.assertEqual(list(batch[19:21].ids), [10000000 + 20, 10000000 + 21])
+        filtered = batch.filter(user_id == replies[0].user_id
+                                for user_id in batch.user_ids)
+        self.assertEqual(list(filtered.ids),
+                         [reply.id for reply in replies if reply.user_id == replies[0].user_id])
+
+        self.assertEqual(
+            list(anobbsclient.PostBatch.from_thread_page(pages[0]).ids),
+            list(batch[:19].ids))
+
+    def test_parse_now_texts(self):
+        texts = [format_now(base_datetime + timedelta(days=d, seconds=s))
+                 for d in range(0, 800, 7) for s in [0, 59, 3600 * 23 + 59]]
+        expected = [int(anobbsclient.utils._parse_now_text_slow(text))
+                    for text in texts]
+
+        self.assertEqual(list(parse_now_texts(texts)), expected)
+        for text in texts[:10]:
+            self.assertEqual(
+                anobbsclient.utils._parse_now_text_slow_as_datetime(text),
+                parse_now_text_as_datetime(text))
+
+        malformed = ["2021-02-30(二)00:00:00", "2021-03-07(日)25:00:00", "",
+                     "2021-03-07(日) 12:34:56"]
+        self.assertRaises(ValueError, parse_now_texts, malformed[:1])
+        self.assertEqual(list(parse_now_texts(malformed, invalid=-1))[:3],
+                         [-1, -1, -1])
+        # 非标准格式由正则表达式兜底
+        self.assertEqual(parse_now_texts(malformed[3:])[0],
+                         parse_now_text("2021-03-07(日)12:34:56"))
+
+        # 上海时间曾经实行夏令时，切换当日的零点与当时的时差不同
+        dst_texts = ["1988-04-17(日)12:00:00", "1988-09-11(日)12:00:00",
+                     "1991-04-14(日)23:59:59", "1991-09-15(日)12:00:00"]
+        dst_expected = [anobbsclient.utils._parse_now_text_slow(text)
+                        for text in dst_texts]
+        self.assertEqual(list(parse_now_texts(dst_texts)), dst_expected)
+        self.assertEqual([parse_now_text(text) for text in dst_texts],
+                         dst_expected)
+        self.assertEqual(dst_expected[0], int(datetime(
+            1988, 4, 17, 3, tzinfo=timezone.utc).timestamp()))
+
+        if anobbsclient.utils.numpy is None:
+            return
+        import numpy
+        self.assertEqual(parse_now_texts_as_datetime64(dst_texts).astype("int64").tolist(),
+                         dst_expected)
+        result = parse_now_texts_as_datetime64(texts + malformed)
+        self.assertEqual(result[:len(texts)].astype("int64").tolist(), expected)
+        self.assertTrue(numpy.isnat(result[len(texts):len(texts)+3]).all())
+        self.assertEqual(int(result[-1].astype("int64")),
+                         parse_now_text("2021-03-07(日)12:34:56"))
@@ -0,0 +1,80 @@
+import unittest
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anobbsclient
+from anobbsclient.ratelimit import TokenBucket
+
+from .mockserver import MockAnoBBSServer, MockThread
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=10, burst=3)
+        waits = [bucket.reserve() for _ in range(6)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        # 之后的请求依次排队，每个间隔 1/rate 秒
+        for (i, wait) in enumerate(waits[3:], start=1):
+            self.assertAlmostEqual(wait, i / 10, delta=0.02)
+
+        self.assertRaises(anobbsclient.DeadlineExceededException,
+                          bucket.reserve, deadline=time.monotonic() + 0.1)
+
+    def test_invalid_token_bucket(self):
+        for kwargs in [{"rate": 0}, {"rate": -1}, {"rate": float("nan")},
+                       {"rate": 1, "burst": 0.5}, {"rate": 1, "burst": 0}]:
+            with self.subTest(**kwargs):
+                self.assertRaises(ValueError, TokenBucket, **kwargs)
+        self.assertRaises(ValueError, anobbsclient.RateLimiter,
+                          anonymous_rate=0)
+        # 不限速应设为 None
+        anobbsclient.RateLimiter(anonymous_rate=None)
+
+    def test_shared_by_threads(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 20)]) as server:
+            limiter = anobbsclient.RateLimiter(
+                anonymous_rate=50, anonymous_burst=5)
+            client = anobbsclient.Client(
+                user_agent="anobbsclient-test",
+                host=server.host,
+                scheme="http",
+                rate_limiter=limiter,
+            )
+
+            start = time.monotonic()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(
+                    lambda page: client.get_thread_page(10000000, page=page),
+                    range(1, 21)))
+            elapsed = time.monotonic() - start
+
+        # 突发的5个请求之后，剩下的15个请求至少需要 15/50 秒
+        self.assertGreaterEqual(elapsed, 0.28)
+        stats = limiter.stats("anonymous")
+        self.assertEqual(stats.requests, 20)
+        # 请求发出期间也会补充令牌，因此需要等待的请求可能少于15个
+        self.assertGreaterEqual(stats.delayed_requests, 10)
+        self.assertLessEqual(stats.max_wait_seconds, 0.3 + 0.01)
+        self.assertEqual(limiter.stats("logged_in").requests, 0)
+
+    def test_async(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 10)]) as server:
+            limiter = anobbsclient.RateLimiter(anonymous_rate=50)
+
+            async def run():
+                async with anobbsclient.AsyncClient(
+                    user_agent="anobbsclient-test",
+                    host=server.host,
+                    scheme="http",
+                    rate_limiter=limiter,
+                ) as client:
+                    start = time.monotonic()
+                    await asyncio.gather(*(client.get_thread_page(10000000, page=page)
+                                           for page in range(1, 11)))
+                    return time.monotonic() - start
+            elapsed = asyncio.run(run())
+
+        self.assertGreaterEqual(elapsed, 0.17)
+        self.assertGreaterEqual(limiter.stats("anonymous").delayed_requests, 8)
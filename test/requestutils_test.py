@@ -0,0 +1,123 @@
+import unittest
+import gzip
+import zlib
+import json
+from collections import OrderedDict
+
+import anobbsclient
+from anobbsclient.requestutils import ContentDecoder, TruncatedContentError, make_json_loads, brotli, orjson
+
+from .mockserver import MockAnoBBSServer, MockThread
+
+CONTENT = json.dumps([{"id": str(i), "content": f"内容 {i}"}
+                      for i in range(200)], ensure_ascii=False).encode("utf-8")
+
+
+def raw_deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+ENCODINGS = {
+    "identity": lambda data: data,
+    "gzip": gzip.compress,
+    "deflate": zlib.compress,
+    "br": brotli.compress if brotli is not None else None,
+}
+
+
+class ContentDecoderTest(unittest.TestCase):
+
+    def decode(self, encoding: str, body: bytes, chunk_size: int) -> bytes:
+        decoder = ContentDecoder(encoding)
+        for i in range(0, len(body), chunk_size):
+            decoder.feed(body[i:i + chunk_size])
+        content = decoder.finish()
+        self.assertEqual(decoder.raw_length, len(body))
+        return content
+
+    def test_chunked(self):
+        for (encoding, compress) in ENCODINGS.items():
+            if compress is None:
+                continue
+            body = compress(CONTENT)
+            for chunk_size in [1, 7, len(body)]:
+                with self.subTest(encoding=encoding, chunk_size=chunk_size):
+                    self.assertEqual(
+                        self.decode(encoding, body, chunk_size), CONTENT)
+
+    def test_raw_deflate(self):
+        body = raw_deflate(CONTENT)
+        for chunk_size in [1, 7, len(body)]:
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(
+                    self.decode("deflate", body, chunk_size), CONTENT)
+
+    def test_multiple_encodings(self):
+        body = zlib.compress(gzip.compress(CONTENT))
+        self.assertEqual(self.decode("gzip, deflate", body, 7), CONTENT)
+
+    def test_truncated(self):
+        encodings = dict(ENCODINGS, **{"deflate (raw)": raw_deflate})
+        del encodings["identity"]
+        for (name, compress) in encodings.items():
+            if compress is None:
+                continue
+            encoding = name.split(" ")[0]
+            body = compress(CONTENT)
+            for length in [1, len(body) // 2, len(body) - 1]:
+                with self.subTest(encoding=name, length=length):
+                    self.assertRaises(TruncatedContentError, self.decode,
+                                      encoding, body[:length], 7)
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, ContentDecoder, "compress")
+
+
+class JSONLoadsTest(unittest.TestCase):
+
+    def test_backends(self):
+        expected = json.loads(CONTENT)
+
+        loads = make_json_loads()
+        self.assertEqual(loads(CONTENT), expected)
+        self.assertIsInstance(loads(CONTENT)[0], OrderedDict)
+
+        plain = make_json_loads(backend="json", uses_plain_dict=True)
+        self.assertEqual(plain(CONTENT), expected)
+        self.assertNotIsInstance(plain(CONTENT)[0], OrderedDict)
+
+        self.assertRaises(ValueError, make_json_loads, backend="simplejson")
+
+    @unittest.skipIf(orjson is None, "未安装 orjson")
+    def test_orjson(self):
+        loads = make_json_loads(uses_plain_dict=True)
+        self.assertIs(loads, orjson.loads)
+        self.assertEqual(loads(CONTENT), json.loads(CONTENT))
+        self.assertRaises(ValueError, make_json_loads, backend="orjson")
+
+    def test_client_backends(self):
+        backends = [{}, {"uses_plain_dict": True, "json_backend": "json"}]
+        if orjson is not None:
+            backends.append({"uses_plain_dict": True,
+                             "json_backend": "orjson"})
+
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 2)]) as server:
+            pages = []
+            for options in backends:
+                client = anobbsclient.Client(
+                    user_agent="anobbsclient-test",
+                    host=server.host,
+                    scheme="http",
+                    default_request_options=options,
+                )
+                (thread_page, _) = client.get_thread_page(10000000, page=2)
+                (board, _) = client.get_board_page(1, page=1)
+                pages.append((thread_page.to_json(),
+                              [thread.to_json() for thread in board]))
+        for page in pages[1:]:
+            self.assertEqual(page, pages[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+import asyncio
+import time
+
+import requests
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+import anobbsclient
+from anobbsclient.requestutils import try_request, try_request_async
+from anobbsclient.retry import parse_retry_after
+
+
+def make_http_error(status_code: int, headers={}) -> requests.exceptions.HTTPError:
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.headers.update(headers)
+    return requests.exceptions.HTTPError(response=resp)
+
+
+class FlakyRequest:
+    """前若干次调用依次抛出给定的异常，之后返回 ``"ok"``。"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if len(self.errors) != 0:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class RetryTest(unittest.TestCase):
+
+    def test_backoff_with_jitter(self):
+        policy = anobbsclient.RetryPolicy(base_delay=1, max_delay=5)
+        for retry in range(1, 6):
+            cap = min(5, 2 ** (retry - 1))
+            delays = [policy.compute_delay(retry) for _ in range(100)]
+            self.assertTrue(all(0 <= delay <= cap for delay in delays))
+            self.assertGreater(len(set(delays)), 1)
+
+        policy = anobbsclient.RetryPolicy(base_delay=1, jitter=False)
+        self.assertEqual(policy.compute_delay(3), 4)
+        self.assertEqual(policy.compute_delay(1, retry_after=10), 10)
+        self.assertIsNone(policy.compute_delay(1, retry_after=1000))
+
+    def test_retry_statuses_and_retry_after(self):
+        sleeps = []
+        fn = FlakyRequest(
+            requests.exceptions.ConnectionError(),
+            make_http_error(503, {"Retry-After": "7"}),
+            make_http_error(429),
+        )
+        budget = anobbsclient.RetryBudget()
+        policy = anobbsclient.RetryPolicy(base_delay=0.01)
+        self.assertEqual(
+            try_request(fn, "test", policy, budget=budget, sleep=sleeps.append), "ok")
+
+        self.assertEqual(fn.calls, 4)
+        self.assertEqual(sleeps[1], 7)
+        stats = budget.stats()
+        self.assertEqual(stats.requests, 1)
+        self.assertEqual(stats.retries, 3)
+        self.assertEqual(stats.retries_histogram, {3: 1})
+        self.assertAlmostEqual(stats.wait_seconds, sum(sleeps))
+
+    def test_non_retryable(self):
+        fn = FlakyRequest(make_http_error(404))
+        self.assertRaises(anobbsclient.ResourceNotExistsException,
+                          try_request, fn, "test", 5, sleep=lambda _: None)
+        fn = FlakyRequest(make_http_error(403))
+        self.assertRaises(requests.exceptions.HTTPError,
+                          try_request, fn, "test", 5, sleep=lambda _: None)
+        self.assertEqual(fn.calls, 1)
+
+    def test_async(self):
+        def make_response_error(status: int) -> aiohttp.ClientResponseError:
+            request_info = aiohttp.RequestInfo(
+                URL("http://127.0.0.1/"), "GET", CIMultiDictProxy(CIMultiDict()))
+            return aiohttp.ClientResponseError(request_info, (), status=status)
+
+        fn = FlakyRequest(aiohttp.ServerDisconnectedError(),
+                          make_response_error(503))
+
+        async def request():
+            return fn()
+        policy = anobbsclient.RetryPolicy(base_delay=0.001)
+        retries = []
+        self.assertEqual(asyncio.run(try_request_async(
+            request, "test", policy,
+            on_retry=lambda i, e, delay: retries.append(i))), "ok")
+        self.assertEqual(retries, [1, 2])
+
+        fn = FlakyRequest(make_response_error(404))
+        with self.assertRaises(anobbsclient.ResourceNotExistsException):
+            asyncio.run(try_request_async(request, "test", policy))
+        fn = FlakyRequest(make_response_error(403))
+        with self.assertRaises(aiohttp.ClientResponseError):
+            asyncio.run(try_request_async(request, "test", policy))
+        self.assertEqual(fn.calls, 1)
+
+    def test_max_attempts(self):
+        fn = FlakyRequest(*[make_http_error(502)] * 10)
+        self.assertRaises(requests.exceptions.HTTPError,
+                          try_request, fn, "test", 3, sleep=lambda _: None)
+        self.assertEqual(fn.calls, 3)
+
+        # 至少要尝试一次，否则没有结果可以返回
+        for max_attempts in [0, -1]:
+            self.assertRaises(ValueError, anobbsclient.RetryPolicy,
+                              max_attempts=max_attempts)
+            self.assertRaises(ValueError, try_request,
+                              fn, "test", max_attempts, sleep=lambda _: None)
+
+    def test_budget(self):
+        budget = anobbsclient.RetryBudget(ratio=0.5, max_tokens=2)
+        fn = FlakyRequest(*[requests.exceptions.Timeout()] * 10)
+        self.assertRaises(requests.exceptions.Timeout,
+                          try_request, fn, "test", 10, budget=budget, sleep=lambda _: None)
+        # 起初的2个令牌及本次请求存入的0.5个令牌只够重试2次
+        self.assertEqual(fn.calls, 3)
+        self.assertEqual(budget.stats().budget_exhausted, 1)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertEqual(parse_retry_after(
+            "Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_deadline(self):
+        sleeps = []
+        fn = FlakyRequest(requests.exceptions.Timeout())
+        policy = anobbsclient.RetryPolicy(base_delay=10, jitter=False)
+        self.assertRaises(anobbsclient.DeadlineExceededException,
+                          try_request, fn, "test", policy,
+                          deadline=time.monotonic() + 1, sleep=sleeps.append)
+        self.assertEqual(sleeps, [])
+
+        fn = FlakyRequest()
+        self.assertRaises(anobbsclient.DeadlineExceededException,
+                          try_request, fn, "test", policy,
+                          deadline=time.monotonic() - 1)
+        self.assertEqual(fn.calls, 0)
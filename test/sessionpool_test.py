@@ -0,0 +1,88 @@
+import unittest
+import time
+
+import requests
+
+import anobbsclient
+
+from .mockserver import MockAnoBBSServer, MockThread
+
+
+class SessionPoolTest(unittest.TestCase):
+
+    def test_session_reuse(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50)]) as server:
+            client = anobbsclient.Client(
+                user_agent="anobbsclient-test",
+                host=server.host,
+                scheme="http",
+            )
+            for page in [1, 2, 3]:
+                client.get_thread_page(10000000, page=page)
+
+        stats = client.session_pool.stats()
+        self.assertEqual(stats.sessions_created, 1)
+        self.assertEqual(stats.sessions_reused, 2)
+        self.assertEqual(stats.requests_sent, 3)
+        self.assertEqual(stats.connections_reused, 2)
+
+    def test_keys_are_separate(self):
+        pool = anobbsclient.SessionPool()
+        a = pool.acquire("a", requests.Session)
+        pool.release("a", a)
+        b = pool.acquire("b", requests.Session)
+        self.assertIsNot(a, b)
+        self.assertIs(pool.acquire("a", requests.Session), a)
+
+    def test_exhaustion(self):
+        pool = anobbsclient.SessionPool(max_idle_sessions_per_key=2)
+        sessions = [pool.acquire("a", requests.Session) for _ in range(3)]
+        self.assertEqual(len(set(map(id, sessions))), 3)
+        for session in sessions:
+            pool.release("a", session)
+
+        # 超出闲置上限的会话在归还时直接关闭
+        stats = pool.stats()
+        self.assertEqual((stats.sessions_created, stats.sessions_evicted), (3, 1))
+        self.assertIs(pool.acquire("a", requests.Session), sessions[1])
+        self.assertIs(pool.acquire("a", requests.Session), sessions[0])
+        pool.acquire("a", requests.Session)
+        self.assertEqual(pool.stats().sessions_created, 4)
+
+    def test_idle_timeout(self):
+        pool = anobbsclient.SessionPool(idle_timeout=0.05)
+        session = pool.acquire("a", requests.Session)
+        pool.release("a", session)
+        time.sleep(0.1)
+        self.assertIsNot(pool.acquire("a", requests.Session), session)
+        stats = pool.stats()
+        self.assertEqual((stats.sessions_created, stats.sessions_evicted), (2, 1))
+
+    def test_no_keep_alive(self):
+        pool = anobbsclient.SessionPool(keep_alive=False)
+        session = pool.acquire("a", requests.Session)
+        self.assertEqual(session.headers["Connection"], "close")
+        pool.release("a", session)
+        self.assertIsNot(pool.acquire("a", requests.Session), session)
+        self.assertEqual(pool.stats().sessions_evicted, 1)
+
+    def test_clear(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50)]) as server:
+            client = anobbsclient.Client(
+                user_agent="anobbsclient-test",
+                host=server.host,
+                scheme="http",
+            )
+            client.get_thread_page(10000000, page=1)
+            client.session_pool.clear()
+            client.get_thread_page(10000000, page=1)
+
+        # 关闭的会话的统计仍然计入
+        stats = client.session_pool.stats()
+        self.assertEqual((stats.sessions_created, stats.sessions_reused), (2, 0))
+        self.assertEqual(stats.requests_sent, 2)
+        self.assertEqual(stats.connections_created, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import anobbsclient
+
+from .mockserver import MockAnoBBSServer, MockThread, THREAD_PAGE_SIZE
+
+THREAD_ID = 10000000
+PAGES = 103
+
+
+class ThreadSafetyTest(unittest.TestCase):
+    """多个线程共用同一个客户端。"""
+
+    def new_client(self, server: MockAnoBBSServer) -> anobbsclient.Client:
+        return anobbsclient.Client(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+        )
+
+    def test_cookiejar_created_once(self):
+        with MockAnoBBSServer(threads=[]) as server:
+            client = self.new_client(server)
+        options = {"user_cookie": anobbsclient.UserCookie(userhash="a")}
+        barrier = threading.Barrier(16)
+
+        def make_session(_):
+            barrier.wait()
+            return client._make_session(options, needs_login=True)
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            sessions = list(executor.map(make_session, range(16)))
+        self.assertEqual(list(client.cookiejar_store.keys()), ["a"])
+        for session in sessions:
+            self.assertIs(session.cookies, client.cookiejar_store["a"])
+
+    def test_shared_client(self):
+        user_cookies = [anobbsclient.UserCookie(userhash=f"user{i}")
+                        for i in range(3)]
+        metrics = anobbsclient.MetricsCollector()
+        with MockAnoBBSServer(threads=[MockThread(THREAD_ID, THREAD_PAGE_SIZE * PAGES)]) as server:
+            client = self.new_client(server)
+            client.add_hook(metrics)
+
+            def fetch(i: int):
+                # 未登录时 100 页之后的页面会卡页，可借此确认请求是否带上了饼干
+                user_cookie = user_cookies[i % 4] if i % 4 < 3 else None
+                if user_cookie is None:
+                    options = {"login_policy": "always_no"}
+                    page = 100 - i % 3
+                else:
+                    options = {"user_cookie": user_cookie,
+                               "login_policy": "enforce"}
+                    page = PAGES - i % 3
+                (thread_page, _) = client.get_thread_page(
+                    THREAD_ID, page=page, options=options)
+                return i, page, thread_page
+
+            n = 32 * 8
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                results = list(executor.map(fetch, range(n)))
+            requests = server.stats.requests
+        client.close()
+
+        for (i, page, thread_page) in results:
+            first_reply_id = THREAD_ID + 1 + (page - 1) * THREAD_PAGE_SIZE
+            self.assertEqual(thread_page.replies[0].id, first_reply_id,
+                             msg=f"request #{i}")
+
+        self.assertEqual(requests, n)
+        self.assertEqual(sorted(client.cookiejar_store.keys()),
+                         sorted(c.userhash for c in user_cookies))
+        for user_cookie in user_cookies:
+            self.assertEqual(
+                client.cookiejar_store[user_cookie.userhash].get("userhash"),
+                user_cookie.userhash)
+
+        stats = client.session_pool.stats()
+        self.assertEqual(stats.sessions_created + stats.sessions_reused, n)
+        self.assertEqual(stats.requests_sent, n)
+        self.assertLessEqual(stats.connections_created, stats.requests_sent)
+
+        self.assertEqual(metrics.counter("requests_started_total", "/Api/thread"), n)
+        self.assertEqual(metrics.counter(
+            "requests_total", "/Api/thread", outcome="success"), n)
+        self.assertEqual(metrics.latency_histogram("/Api/thread")[-1][1], n)
+
+    def test_hooks_changed_while_requesting(self):
+        with MockAnoBBSServer(threads=[MockThread(THREAD_ID, 50)]) as server:
+            client = self.new_client(server)
+            metrics = anobbsclient.MetricsCollector()
+            client.add_hook(metrics)
+            stop = threading.Event()
+
+            def toggle_hooks():
+                while not stop.is_set():
+                    hook = (lambda event: None)
+                    client.add_hook(hook)
+                    client.remove_hook(hook)
+
+            toggler = threading.Thread(target=toggle_hooks)
+            toggler.start()
+            try:
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    list(executor.map(lambda page: client.get_thread_page(THREAD_ID, page=page),
+                                      [1, 2, 3] * 20))
+            finally:
+                stop.set()
+                toggler.join()
+
+        self.assertEqual(client.hooks, [metrics])
+        self.assertEqual(metrics.counter(
+            "requests_total", "/Api/thread", outcome="success"), 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+import os
+import asyncio
+import tempfile
+import threading
+
+import anobbsclient
+from anobbsclient.walk import create_walker, ReversalThreadWalkTarget
+
+from .mockserver import MockAnoBBSServer, MockThread
+
+
+class TransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = anobbsclient.ResponseArchive(
+            os.path.join(self.directory.name, "responses.bin"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def new_client(self, host: str, transport: anobbsclient.Transport,
+                   client_class=anobbsclient.Client) -> anobbsclient.Client:
+        return client_class(
+            user_agent="anobbsclient-test",
+            host=host,
+            scheme="http",
+            transport=transport,
+        )
+
+    def test_record_and_replay(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50)]) as server:
+            client = self.new_client(
+                server.host, anobbsclient.RecordingTransport(self.archive))
+            recorded = [client.get_thread_page(10000000, page=page)
+                        for page in [1, 2, 3]]
+            self.assertRaises(anobbsclient.ResourceNotExistsException,
+                              client.get_thread_page, 10000001, 1)
+            requests = server.stats.requests
+
+        # 服务器已经关闭，主机也不同
+        client = self.new_client(
+            "127.0.0.1:1", anobbsclient.ReplayTransport(self.archive))
+        for (page, (expected_page, expected_usage)) in zip([1, 2, 3], recorded):
+            (thread_page, usage) = client.get_thread_page(10000000, page=page)
+            self.assertEqual(thread_page.to_json(), expected_page.to_json())
+            self.assertEqual(usage, expected_usage)
+        self.assertRaises(anobbsclient.ResourceNotExistsException,
+                          client.get_thread_page, 10000001, 1)
+        self.assertRaises(anobbsclient.ReplayMissException,
+                          client.get_thread_page, 10000000, 4)
+        self.assertEqual(len(self.archive.load()), requests)
+
+        # 存档中不包含饼干
+        with open(self.archive.path, "rb") as f:
+            content = f.read()
+        self.assertNotIn(b"userhash", content)
+        self.assertNotIn(b"PHPSESSID", content)
+        for response in self.archive.load():
+            self.assertNotIn("set-cookie",
+                             {key.lower() for key in response.headers})
+
+    def test_replay_async(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 50)]) as server:
+            client = self.new_client(
+                server.host, anobbsclient.RecordingTransport(self.archive))
+            (expected, _) = client.get_thread_page(10000000, page=2)
+
+        async def run():
+            async with self.new_client("127.0.0.1:1", anobbsclient.ReplayTransport(self.archive),
+                                       anobbsclient.AsyncClient) as client:
+                return await client.get_thread_page(10000000, page=2)
+        (thread_page, _) = asyncio.run(run())
+        self.assertEqual(thread_page.to_json(), expected.to_json())
+
+    def test_record_async_off_event_loop(self):
+        """异步客户端在线程池中调用自定义的传输层，不阻塞事件循环。"""
+
+        transport_threads = set()
+
+        class ThreadTrackingTransport(anobbsclient.RecordingTransport):
+            def get_content(self, request):
+                transport_threads.add(threading.get_ident())
+                return super().get_content(request)
+
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 5)]) as server:
+            async def run():
+                async with self.new_client(server.host, ThreadTrackingTransport(self.archive),
+                                           anobbsclient.AsyncClient) as client:
+                    return await asyncio.gather(*(client.get_thread_page(10000000, page=page)
+                                                  for page in range(1, 6)))
+            pages = asyncio.run(run())
+
+        self.assertNotIn(threading.get_ident(), transport_threads)
+        self.assertEqual(len(self.archive.load()), 5)
+        replay = self.new_client(
+            "127.0.0.1:1", anobbsclient.ReplayTransport(self.archive))
+        for (page, (thread_page, _)) in enumerate(pages, start=1):
+            (replayed, _) = replay.get_thread_page(10000000, page=page)
+            self.assertEqual(replayed.to_json(), thread_page.to_json())
+
+    def test_replay_gatekept_walk(self):
+        """以录制的数据回归测试 :class:`ReversalThreadWalkTarget` 对卡页的检测。"""
+
+        options = {
+            "user_cookie": anobbsclient.UserCookie(
+                userhash="",  # 无效的饼干
+            ),
+        }
+        target = ReversalThreadWalkTarget(
+            thread_id=10000000,
+            gatekeeper_post_id=None,  # 通过对比前后两页检测
+            start_page_number=103,
+        )
+
+        def walk(client: anobbsclient.Client):
+            pages = []
+            with self.assertRaises(anobbsclient.GatekeptException) as cm:
+                for (n, page, _) in create_walker(target=target, client=client, options=options):
+                    pages.append((n, [post.id for post in page.replies]))
+            return pages, cm.exception
+
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 103)]) as server:
+            (expected_pages, expected_exception) = walk(self.new_client(
+                server.host, anobbsclient.RecordingTransport(self.archive)))
+
+        (pages, exception) = walk(self.new_client(
+            "127.0.0.1:1", anobbsclient.ReplayTransport(self.archive)))
+        self.assertEqual(len(expected_pages), 1)
+        self.assertEqual(pages, expected_pages)
+        self.assertEqual(exception.context, expected_exception.context)
+        self.assertEqual(exception.current_page_number,
+                         expected_exception.current_page_number)
+
+
+if __name__ == '__main__':
+    unittest.main()
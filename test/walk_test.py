@@ -0,0 +1,377 @@
+import unittest
+import asyncio
+import time
+from unittest import mock
+from datetime import timedelta
+
+from dateutil import tz
+
+import anobbsclient
+from anobbsclient.walk import create_walker, create_async_walker, ReversalThreadWalkTarget, BoardWalkTarget, TimelineWalkTarget, WalkProfiler
+
+from .mockserver import MockAnoBBSServer, MockThread, base_datetime
+
+local_tz = tz.gettz("Asia/Shanghai")
+
+
+class AsyncWalkerTest(unittest.TestCase):
+
+    def new_client(self, server: MockAnoBBSServer) -> anobbsclient.AsyncClient:
+        return anobbsclient.AsyncClient(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+        )
+
+    def test_thread_page_reverse_walker(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 5)]) as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    return [(n, len(page.replies)) async for (n, page, _) in create_async_walker(
+                        target=ReversalThreadWalkTarget(
+                            thread_id=10000000,
+                            gatekeeper_post_id=None,
+                            start_page_number=5,
+                            stop_before_post_id=10000000 + 19 * 2 + 5,
+                        ),
+                        client=client,
+                    )]
+            pages = asyncio.run(run())
+
+        self.assertEqual(pages, [(5, 19), (4, 19), (3, 14)])
+
+    def test_thread_page_reverse_walker_gatekept(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 102)]) as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    async for _ in create_async_walker(
+                        target=ReversalThreadWalkTarget(
+                            thread_id=10000000,
+                            gatekeeper_post_id=10000000 + 19 * 100,
+                            start_page_number=102,
+                        ),
+                        client=client,
+                        options={
+                            "user_cookie": anobbsclient.UserCookie(
+                                userhash="",  # 无效的饼干
+                            ),
+                        },
+                    ):
+                        assert(False)
+            self.assertRaises(anobbsclient.GatekeptException,
+                              asyncio.run, run())
+
+    def test_backpressure(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 20)]) as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    consumed = 0
+                    async for _ in create_async_walker(
+                        target=ReversalThreadWalkTarget(
+                            thread_id=10000000,
+                            gatekeeper_post_id=None,
+                            start_page_number=20,
+                        ),
+                        client=client,
+                        max_queued_pages=2,
+                    ):
+                        consumed += 1
+                        await asyncio.sleep(0.05)
+                        # 积压的页面包括后台正在获取的一页
+                        self.assertLessEqual(
+                            server.stats.requests, consumed + 2)
+                        if consumed == 5:
+                            break
+            asyncio.run(run())
+
+    def test_aclose_after_break(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 20)]) as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    walker = create_async_walker(
+                        target=ReversalThreadWalkTarget(
+                            thread_id=10000000,
+                            gatekeeper_post_id=None,
+                            start_page_number=20,
+                        ),
+                        client=client,
+                        max_queued_pages=2,
+                    )
+                    async for _ in walker:
+                        break
+                    # 生成器未关闭时，后台的获取保持暂停
+                    await asyncio.sleep(0.1)
+                    self.assertEqual(server.stats.requests, 1 + 2)
+                    self.assertEqual(len(asyncio.all_tasks()), 2)
+
+                    await walker.aclose()
+                    self.assertEqual(asyncio.all_tasks(),
+                                     {asyncio.current_task()})
+            asyncio.run(run())
+
+    def test_invalid_max_queued_pages(self):
+        async def run():
+            async for _ in create_async_walker(
+                target=ReversalThreadWalkTarget(
+                    thread_id=10000000,
+                    gatekeeper_post_id=None,
+                    start_page_number=1,
+                ),
+                client=None,
+                max_queued_pages=0,
+            ):
+                pass
+        self.assertRaises(ValueError, asyncio.run, run())
+
+    def test_board_page_walker(self):
+        threads = [MockThread(10000000 * (i+1), i * 10, board_id=1)
+                   for i in range(50)]
+        stop_before_datetime = (base_datetime + timedelta(minutes=200)) \
+            .replace(tzinfo=local_tz)
+        with MockAnoBBSServer(threads=threads) as server:
+            async def run():
+                async with self.new_client(server) as client:
+                    return [page async for (_, page, _) in create_async_walker(
+                        target=BoardWalkTarget(
+                            board_id=1,
+                            start_page_number=1,
+                            stop_before_datetime=stop_before_datetime,
+                        ),
+                        client=client,
+                    )]
+            pages = asyncio.run(run())
+
+        seen_thread_ids = [thread.id for page in pages for thread in page]
+        self.assertEqual(len(seen_thread_ids), len(set(seen_thread_ids)))
+        for page in pages:
+            for thread in page:
+                self.assertGreaterEqual(
+                    thread.last_modified_time, stop_before_datetime)
+
+
+class TimelineWalkerTest(unittest.TestCase):
+
+    def test_naive_stop_before_datetime(self):
+        # 不带时区的时间会被当作本地时间，因此直接拒绝
+        self.assertRaises(TypeError, ReversalThreadWalkTarget,
+                          thread_id=10000000, gatekeeper_post_id=None,
+                          start_page_number=1, stop_before_datetime=base_datetime)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 1)]) as server:
+            client = anobbsclient.Client(
+                user_agent="anobbsclient-test",
+                host=server.host,
+                scheme="http",
+            )
+            for target in [BoardWalkTarget(board_id=1, start_page_number=1,
+                                           stop_before_datetime=base_datetime),
+                           TimelineWalkTarget(start_page_number=1,
+                                              stop_before_datetime=base_datetime)]:
+                with self.assertRaises(TypeError):
+                    list(create_walker(target=target, client=client))
+            self.assertEqual(server.stats.requests, 0)
+
+    def test_timeline_walker(self):
+        # 20 个版块，只关心其中 15 个；每个版块都只需要获取一页
+        threads = [MockThread(10000000 + i * 1000, i % 7, board_id=1 + i % 20,
+                              created_at=base_datetime + timedelta(minutes=i))
+                   for i in range(400)]
+        stop_before = base_datetime + timedelta(minutes=340)
+        stop_before_datetime = stop_before.replace(tzinfo=local_tz)
+        board_ids = set(range(1, 16))
+        expected = sorted(thread.id for thread in threads
+                          if thread.board_id in board_ids and thread.last_modified_time() >= stop_before)
+
+        with MockAnoBBSServer(threads=threads) as server:
+            client = anobbsclient.Client(
+                user_agent="anobbsclient-test", host=server.host, scheme="http")
+            seen = {}
+            for (_, page, _) in create_walker(
+                target=TimelineWalkTarget(
+                    start_page_number=1,
+                    stop_before_datetime=stop_before_datetime,
+                    board_ids=frozenset(board_ids),
+                ),
+                client=client,
+            ):
+                for thread in page:
+                    self.assertNotIn(thread.id, seen)
+                    seen[thread.id] = thread.board_id
+            timeline_requests = server.stats.requests
+
+            board_seen = []
+            for board_id in sorted(board_ids):
+                for (_, page, _) in create_walker(
+                    target=BoardWalkTarget(
+                        board_id=board_id,
+                        start_page_number=1,
+                        stop_before_datetime=stop_before_datetime,
+                    ),
+                    client=client,
+                ):
+                    board_seen += [thread.id for thread in page]
+            board_requests = server.stats.requests - timeline_requests
+
+        self.assertEqual(sorted(seen.keys()), expected)
+        self.assertEqual(sorted(board_seen), expected)
+        for (id, board_id) in seen.items():
+            self.assertEqual(board_id, 1 + (id - 10000000) // 1000 % 20)
+        self.assertLess(timeline_requests, board_requests)
+
+
+class WalkerPrefetchTest(unittest.TestCase):
+
+    def new_client(self, server: MockAnoBBSServer) -> anobbsclient.Client:
+        return anobbsclient.Client(
+            user_agent="anobbsclient-test",
+            host=server.host,
+            scheme="http",
+        )
+
+    def walk(self, server: MockAnoBBSServer, prefetch_depth: int, **kwargs):
+        pages, total_downloaded = [], 0
+        for (n, page, usage) in create_walker(
+            target=ReversalThreadWalkTarget(
+                thread_id=10000000,
+                gatekeeper_post_id=None,
+                **kwargs,
+            ),
+            client=self.new_client(server),
+            prefetch_depth=prefetch_depth,
+        ):
+            pages.append((n, [post.id for post in page.replies]))
+            total_downloaded += usage.downloaded
+            time.sleep(server.delay)  # 模拟消费者处理页面的耗时
+        return pages, total_downloaded
+
+    def test_prefetch_keeps_order(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 8)], delay=0.05) as server:
+            start = time.monotonic()
+            (expected, _) = self.walk(server, 0, start_page_number=8)
+            sequential_elapsed = time.monotonic() - start
+
+            start = time.monotonic()
+            (pages, _) = self.walk(server, 3, start_page_number=8)
+            prefetch_elapsed = time.monotonic() - start
+
+        self.assertEqual(pages, expected)
+        self.assertEqual([n for (n, _) in pages], list(range(8, 0, -1)))
+        self.assertLess(prefetch_elapsed, sequential_elapsed)
+
+    def test_prefetch_discarded_on_early_stop(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 8)], delay=0.05) as server:
+            kwargs = {
+                "start_page_number": 8,
+                "stop_before_post_id": 10000000 + 19 * 5 + 1,
+            }
+            (expected, expected_downloaded) = self.walk(server, 0, **kwargs)
+            requests_without_prefetch = server.stats.requests
+
+            (pages, downloaded) = self.walk(server, 3, **kwargs)
+            requests_with_prefetch = server.stats.requests - requests_without_prefetch
+
+        self.assertEqual(pages, expected)
+        self.assertEqual([n for (n, _) in pages], [8, 7, 6])
+        # 多获取的页面的流量也计入了产出的流量中
+        self.assertGreater(requests_with_prefetch, len(pages))
+        self.assertGreater(downloaded, expected_downloaded)
+
+    def test_locate(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 8 + 3)]) as server:
+            client = self.new_client(server)
+            stop_before_post_id = 10000000 + 19 * 5 + 1
+            (target, _) = ReversalThreadWalkTarget.locate(
+                10000000, stop_before_post_id, client=client)
+
+            self.assertEqual(target.start_page_number, 9)
+            self.assertEqual(target.expected_stop_page_number, 6)
+            pages = [n for (n, _, _) in create_walker(target=target, client=client)]
+        self.assertEqual(pages, [9, 8, 7, 6])
+
+    def test_locate_with_tips(self):
+        # 之前的回应被删除后，要找的回应不在按串号估计的上界所在的页
+        thread = MockThread(10000000, 19 * 8 + 3,
+                            deleted=set(range(0, 40)), with_tips=True)
+        with MockAnoBBSServer(threads=[thread]) as server:
+            client = self.new_client(server)
+            stop_before_post_id = 10000000 + 19 * 5 + 1
+            (target, _) = ReversalThreadWalkTarget.locate(
+                10000000, stop_before_post_id, client=client)
+
+            self.assertEqual(target.start_page_number, 7)
+            self.assertEqual(target.expected_stop_page_number, 3)
+            pages = [n for (n, _, _) in create_walker(target=target, client=client)]
+        self.assertEqual(pages, [7, 6, 5, 4, 3])
+
+    def test_timeout(self):
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 8)], delay=0.1) as server:
+            pages = []
+            with self.assertRaises(anobbsclient.DeadlineExceededException):
+                for (n, _, _) in create_walker(
+                    target=ReversalThreadWalkTarget(
+                        thread_id=10000000,
+                        gatekeeper_post_id=None,
+                        start_page_number=8,
+                    ),
+                    client=self.new_client(server),
+                    timeout=0.35,
+                ):
+                    pages.append(n)
+        self.assertGreater(len(pages), 0)
+        self.assertLess(len(pages), 8)
+
+    def test_profiler(self):
+        profiler = WalkProfiler(traces_allocations=True)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 4)], delay=0.02) as server:
+            client = self.new_client(server)
+            for (n, _, _) in create_walker(
+                target=ReversalThreadWalkTarget(
+                    thread_id=10000000,
+                    gatekeeper_post_id=None,
+                    start_page_number=4,
+                ),
+                client=client,
+                profiler=profiler,
+            ):
+                time.sleep(0.03)  # 模拟消费者处理页面的耗时
+        self.assertEqual(client.hooks, [])
+
+        self.assertEqual([page.page_number for page in profiler.pages()],
+                         [4, 3, 2, 1])
+        summary = {s.stage: s for s in profiler.summary()}
+        self.assertEqual(set(summary.keys()), {
+            "fetch", "network", "decompress", "json_decode", "object_build",
+            "check_gatekept", "should_stop", "consumer",
+        })
+        for s in summary.values():
+            self.assertEqual(s.pages, 4)
+        self.assertGreaterEqual(summary["network"].wall_seconds, 0.02 * 4)
+        self.assertGreaterEqual(summary["consumer"].wall_seconds, 0.03 * 4)
+        self.assertLess(summary["consumer"].cpu_seconds,
+                        summary["consumer"].wall_seconds)
+        self.assertLessEqual(summary["network"].wall_seconds,
+                             summary["fetch"].wall_seconds)
+        self.assertIsNone(summary["network"].cpu_seconds)
+        self.assertGreater(summary["fetch"].max_allocated_bytes, 0)
+
+        report = profiler.report()
+        self.assertIn("遍历 4 页", report)
+        self.assertIn("  json_decode", report)
+
+    def test_profiler_without_reset_peak(self):
+        # Python 3.8 的 tracemalloc 没有 reset_peak
+        profiler = WalkProfiler(traces_allocations=True)
+        with MockAnoBBSServer(threads=[MockThread(10000000, 19 * 2)]) as server, \
+                mock.patch("anobbsclient.walk.profiler._CAN_RESET_PEAK", False), \
+                mock.patch("tracemalloc.reset_peak", side_effect=AttributeError, create=True):
+            for _ in create_walker(
+                target=ReversalThreadWalkTarget(
+                    thread_id=10000000,
+                    gatekeeper_post_id=None,
+                    start_page_number=2,
+                ),
+                client=self.new_client(server),
+                profiler=profiler,
+            ):
+                pass
+        for page in profiler.pages():
+            self.assertGreaterEqual(page.stages["fetch"].allocated_bytes, 0)